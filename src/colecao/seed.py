@@ -1,10 +1,10 @@
 from typing import List
 
-import requests
 from sqlalchemy.orm import Session
 
 from src.colecao.models import Colecao, Figurinha, Pacote, RaridadeEnum
 from src.config import settings
+from src.partidas.client import client
 
 # -----------------------------
 # Times da Série A 2025 (fallback)
@@ -39,12 +39,11 @@ def fetch_times_thesportsdb() -> List[dict]:
     Se falhar, retorna lista vazia (cai no fallback).
     """
     api_key = settings.THESPORTSDB_API_KEY
-    url = f"https://www.thesportsdb.com/api/v1/json/{api_key}/lookup_all_teams.php?id=4351"
+    base_url = settings.THESPORTSDB_BASE_URL.rstrip("/")
+    url = f"{base_url}/{api_key}/lookup_all_teams.php"
 
     try:
-        resp = requests.get(url, timeout=15)
-        resp.raise_for_status()
-        data = resp.json()
+        data = client.get_json(url, params={"id": 4351})
         return data.get("teams") or []
     except Exception:
         return []
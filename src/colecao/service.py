@@ -21,6 +21,7 @@ from src.colecao.schema import (
     AlbumResponse,
     FigurinhaAlbum,
 )
+from src.ranking.repository import sincronizar_pontos
 
 
 # ===================================================
@@ -45,6 +46,7 @@ def abrir_pacote(db: Session, usuario, pacote_id: int):
         raise ValueError("Moedas insuficientes")
 
     usuario.coins -= pacote.preco_moedas
+    sincronizar_pontos(db, [usuario.id])
 
     colecao = get_colecao_ativa(db)
     if not colecao:
@@ -1,5 +1,10 @@
+from pydantic import model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+# sufixos das bases da TheSportsDB (e do fake de testes de carga)
+SUFIXO_V1 = "/api/v1/json"
+SUFIXO_V2 = "/api/v2/json"
+
 
 class Settings(BaseSettings):
     DATABASE_URL: str
@@ -9,11 +14,107 @@ class Settings(BaseSettings):
 
     # Adicionar as novas variáveis da API
     THESPORTSDB_BASE_URL: str
+    # Vazio = mesma origem da THESPORTSDB_BASE_URL, com /api/v2/json no
+    # lugar de /api/v1/json (obrigatória se a V1 não terminar assim)
+    THESPORTSDB_V2_BASE_URL: str = ""
     THESPORTSDB_API_KEY: str
     THESPORTSDB_DEFAULT_LEAGUE_ID: int
     THESPORTSDB_DEFAULT_SEASON: str
 
+    # Pool de conexões HTTP com a TheSportsDB
+    THESPORTSDB_POOL_CONNECTIONS: int = 10
+    THESPORTSDB_POOL_MAXSIZE: int = 50
+    THESPORTSDB_CONNECT_TIMEOUT: float = 3.0
+    THESPORTSDB_READ_TIMEOUT: float = 15.0
+
+    # Circuit breaker e timeout adaptativo (por família de endpoint)
+    PARTIDAS_BREAKER_LIMITE_FALHAS: int = 5
+    PARTIDAS_BREAKER_TEMPO_ABERTO: float = 30.0
+    PARTIDAS_TIMEOUT_MIN: float = 1.0
+    PARTIDAS_TIMEOUT_FATOR_P99: float = 2.0
+
+    # Corrida V2 x V1 (hedge) e aprendizado por liga
+    PARTIDAS_HEDGE_JANELA: int = 20
+    PARTIDAS_HEDGE_MIN_AMOSTRAS: int = 5
+    PARTIDAS_HEDGE_LIMIAR: float = 0.8
+
+    # Poller em background do livescore (/partidas/ao-vivo)
+    PARTIDAS_AO_VIVO_POLLER: bool = True
+    PARTIDAS_AO_VIVO_INTERVALO: float = 10.0
+
+    # Cache em memória das respostas da TheSportsDB
+    PARTIDAS_CACHE_MAXSIZE: int = 2048
+
+    # Snapshots em disco (SQLite) — vazio desativa; caminho relativo é
+    # resolvido a partir da raiz do projeto, não do diretório atual
+    PARTIDAS_SNAPSHOT_PATH: str = "thesportsdb_snapshots.db"
+    PARTIDAS_SNAPSHOT_MAX_IDADE: float = 7 * 24 * 3600
+    PARTIDAS_SNAPSHOT_TTL_STALE: float = 10.0
+
+    # Apuração em lote: ligas cujos últimos resultados são buscados de uma
+    # vez (vazio = liga padrão) e limite de lookups individuais simultâneos
+    PARTIDAS_RESOLVER_LIGAS: str = ""
+    PARTIDAS_RESOLVER_CONCORRENCIA: int = 8
+
+    # Worker de apuração: só consulta partidas que já começaram há pelo
+    # menos ATRASO_MIN minutos; o calendário das ligas é relido a cada
+    # AGENDA_INTERVALO segundos
+    PARTIDAS_APURACAO_WORKER: bool = True
+    PARTIDAS_APURACAO_INTERVALO: float = 300.0
+    PARTIDAS_APURACAO_ATRASO_MIN: int = 105
+    PARTIDAS_APURACAO_AGENDA_INTERVALO: float = 3600.0
+    # partida que o lookup por id não achou: nova tentativa só depois disto (s)
+    PARTIDAS_APURACAO_LOOKUP_ESPERA: float = 3600.0
+    # palpites por lote na apuração de uma partida; cada lote é uma transação
+    PARTIDAS_APURACAO_LOTE: int = 1000
+
+    # Horários de início em memória (calendário das ligas monitoradas),
+    # relidos a cada INICIOS_INTERVALO segundos; palpites fecham
+    # FECHAMENTO_MIN minutos antes do início
+    PARTIDAS_INICIOS_CACHE: bool = True
+    PARTIDAS_INICIOS_INTERVALO: float = 900.0
+    PALPITES_FECHAMENTO_MIN: int = 0
+    # Partida fora do calendário: o palpite é recusado e o id vai para uma
+    # fila consultada por id em background a cada PENDENTES_INTERVALO
+    # segundos; se a TheSportsDB não a conhece, só consulta de novo depois
+    # de DESCONHECIDA_ESPERA
+    PARTIDAS_INICIOS_PENDENTES_INTERVALO: float = 5.0
+    PARTIDAS_INICIOS_DESCONHECIDA_ESPERA: float = 600.0
+
+    # Rankings mensal/semanal: fuso em que o mês/semana vira e dia em que
+    # a semana começa (0 = segunda ... 6 = domingo)
+    RANKING_FUSO: str = "UTC"
+    RANKING_INICIO_SEMANA: int = 0
+
+    # Retratos do ranking em memória (por processo), refeitos a cada
+    # SNAPSHOT_INTERVALO segundos ou logo após uma apuração
+    RANKING_SNAPSHOT: bool = True
+    RANKING_SNAPSHOT_INTERVALO: float = 30.0
+
+    # Páginas do ranking já serializadas (JSON), por versão do retrato;
+    # a chave inclui a versão, então o TTL só libera memória
+    RANKING_PAGINAS_CACHE: int = 256
+    RANKING_PAGINAS_TTL: float = 300.0
+
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8")
 
+    @model_validator(mode="after")
+    def _bases_thesportsdb(self):
+        v1 = self.THESPORTSDB_BASE_URL.rstrip("/")
+        v2 = self.THESPORTSDB_V2_BASE_URL.rstrip("/")
+
+        if not v2:
+            if not v1.endswith(SUFIXO_V1):
+                raise ValueError(f"THESPORTSDB_BASE_URL não termina em {SUFIXO_V1}; defina THESPORTSDB_V2_BASE_URL")
+            v2 = v1[: -len(SUFIXO_V1)] + SUFIXO_V2
+
+        for nome, url in (("THESPORTSDB_BASE_URL", v1), ("THESPORTSDB_V2_BASE_URL", v2)):
+            if not url.startswith(("http://", "https://")):
+                raise ValueError(f"{nome} precisa ser uma URL http(s): {url!r}")
+
+        self.THESPORTSDB_BASE_URL = v1
+        self.THESPORTSDB_V2_BASE_URL = v2
+        return self
+
 
 settings = Settings()
@@ -0,0 +1,350 @@
+"""
+Migrações incrementais do schema.
+
+As tabelas são criadas com `Base.metadata.create_all`, que não altera
+tabelas que já existem. Cada migração aqui é idempotente e roda na sua
+transação.
+
+- MIGRACOES: só schema (colunas, índices, deduplicação exigida por índice
+  único). Rodam no startup, logo depois do create_all.
+- CARGAS: preenchimento de dados existentes (backfills). Não rodam no
+  startup; rode uma vez no deploy, antes de subir a nova versão:
+
+      python -m src.db.migrations
+
+Com vários workers (uvicorn --workers N), cada etapa roda sob um advisory
+lock no PostgreSQL: um processo migra, os outros esperam e encontram tudo
+feito. As inserções das cargas usam ON CONFLICT DO NOTHING.
+"""
+
+from collections import Counter
+from contextlib import contextmanager
+
+from sqlalchemy import bindparam, delete, func, inspect, select, text, update
+from sqlalchemy.engine import Connection, Engine
+
+from src.db.session import Base
+from src.db.upsert import insert_on_conflict
+from src.grupos.model import GrupoPrivado, MembroGrupo
+from src.palpites.model import AgendaPartida, DistribuicaoPalpite, Palpite, parse_placar
+from src.ranking.model import ClassificacaoEscopo, ClassificacaoRanking
+from src.ranking.periodos import GERAL, INICIO_GERAL, periodos_de
+from src.ranking.repository import PONTOS_POR_ACERTO, escopo_do_time, replicar_nos_escopos
+from src.usuario.models.user import User
+
+TAMANHO_LOTE = 1000
+
+# chave do pg_advisory_lock das migrações
+CHAVE_TRAVA = 7310
+
+# placeholder antigo do cadastro para quem não escolhia time
+SEM_TIME = "Sem time"
+
+
+def _colunas(conn: Connection, tabela: str) -> set:
+    return {c["name"] for c in inspect(conn).get_columns(tabela)}
+
+
+# ---------------------------------------------------
+# PALPITES: gols_casa / gols_fora inteiros + índice de pendentes
+# ---------------------------------------------------
+def palpites_gols_inteiros(conn: Connection):
+    tabela = Palpite.__table__
+
+    existentes = _colunas(conn, tabela.name)
+    for coluna in ("gols_casa", "gols_fora"):
+        if coluna not in existentes:
+            conn.execute(text(f"ALTER TABLE {tabela.name} ADD COLUMN {coluna} INTEGER"))
+
+
+def palpites_gols_carga(conn: Connection):
+    """
+    Backfill a partir da string, em lotes por id. A apuração ignora
+    palpites sem gols até esta carga rodar; os de formato inválido ficam
+    com NULL e já saem apurados como erro (processado, sem acerto).
+    """
+    tabela = Palpite.__table__
+    ultimo_id = 0
+    while True:
+        rows = conn.execute(
+            select(tabela.c.id, tabela.c.palpite)
+            .where(tabela.c.gols_casa.is_(None), tabela.c.id > ultimo_id)
+            .order_by(tabela.c.id)
+            .limit(TAMANHO_LOTE)
+        ).all()
+        if not rows:
+            break
+        ultimo_id = rows[-1].id
+
+        valores, invalidos = [], []
+        for row in rows:
+            try:
+                gols_casa, gols_fora = parse_placar(row.palpite)
+            except ValueError:
+                invalidos.append(row.id)
+                continue
+            valores.append({"_id": row.id, "_gols_casa": gols_casa, "_gols_fora": gols_fora})
+
+        if invalidos:
+            conn.execute(
+                update(tabela)
+                .where(tabela.c.id.in_(invalidos), tabela.c.processado.is_(False))
+                .values(processado=True, acertou=False)
+            )
+
+        if valores:
+            conn.execute(
+                update(tabela)
+                .where(tabela.c.id == bindparam("_id"))
+                .values(gols_casa=bindparam("_gols_casa"), gols_fora=bindparam("_gols_fora")),
+                valores,
+            )
+
+
+# ---------------------------------------------------
+# PALPITES: no máximo um por (usuario_id, partida_id)
+# ---------------------------------------------------
+def palpites_unicos_por_partida(conn: Connection):
+    """
+    Remove duplicatas antes do índice único: fica o palpite já processado
+    (se houver) ou o mais recente.
+    """
+    tabela = Palpite.__table__
+
+    duplicados = conn.execute(
+        select(tabela.c.usuario_id, tabela.c.partida_id)
+        .group_by(tabela.c.usuario_id, tabela.c.partida_id)
+        .having(func.count() > 1)
+    ).all()
+
+    for usuario_id, partida_id in duplicados:
+        ids = (
+            conn.execute(
+                select(tabela.c.id)
+                .where(tabela.c.usuario_id == usuario_id, tabela.c.partida_id == partida_id)
+                .order_by(func.coalesce(tabela.c.processado, False).desc(), tabela.c.id.desc())
+            )
+            .scalars()
+            .all()
+        )
+
+        conn.execute(delete(tabela).where(tabela.c.id.in_(ids[1:])))
+
+
+# ---------------------------------------------------
+# DISTRIBUIÇÃO POR PLACAR: carga inicial a partir dos palpites existentes
+# ---------------------------------------------------
+def distribuicao_inicial(conn: Connection):
+    """Só roda com a tabela vazia; dali em diante ela é incremental."""
+    distribuicao = DistribuicaoPalpite.__table__
+    palpites = Palpite.__table__
+
+    distribuicao.create(bind=conn, checkfirst=True)
+    if conn.execute(select(func.count()).select_from(distribuicao)).scalar_one():
+        return
+
+    agregado = (
+        select(palpites.c.partida_id, palpites.c.gols_casa, palpites.c.gols_fora, func.count())
+        .where(palpites.c.gols_casa.is_not(None), palpites.c.gols_fora.is_not(None))
+        .group_by(palpites.c.partida_id, palpites.c.gols_casa, palpites.c.gols_fora)
+    )
+    conn.execute(
+        insert_on_conflict(conn)(distribuicao)
+        .from_select(["partida_id", "gols_casa", "gols_fora", "total"], agregado)
+        .on_conflict_do_nothing()
+    )
+
+
+# ---------------------------------------------------
+# USUÁRIOS: flag de admin (rotas de álbum e progresso de apuração)
+# ---------------------------------------------------
+def usuarios_is_admin(conn: Connection):
+    tabela = User.__table__
+    if not inspect(conn).has_table(tabela.name):
+        return
+    if "is_admin" not in _colunas(conn, tabela.name):
+        conn.execute(text(f"ALTER TABLE {tabela.name} ADD COLUMN is_admin BOOLEAN NOT NULL DEFAULT FALSE"))
+
+
+# ---------------------------------------------------
+# AGENDA: espera entre lookups de partidas sem início conhecido
+# ---------------------------------------------------
+def agenda_consultar_apos(conn: Connection):
+    tabela = AgendaPartida.__table__
+    if not inspect(conn).has_table(tabela.name):
+        return
+    if "consultar_apos" not in _colunas(conn, tabela.name):
+        conn.execute(text(f"ALTER TABLE {tabela.name} ADD COLUMN consultar_apos TIMESTAMP"))
+
+
+# ---------------------------------------------------
+# RANKING: carga inicial da classificação materializada
+# ---------------------------------------------------
+def classificacao_inicial(conn: Connection):
+    """
+    Só roda com a tabela vazia; dali em diante ela é incremental. Os
+    palpites são lidos em lotes por id e agregados por (período, usuário).
+    """
+    classificacao = ClassificacaoRanking.__table__
+    palpites = Palpite.__table__
+    usuarios = User.__table__
+
+    existentes = set(inspect(conn).get_table_names())
+    if not {palpites.name, usuarios.name} <= existentes:
+        return
+
+    classificacao.create(bind=conn, checkfirst=True)
+    if conn.execute(select(func.count()).select_from(classificacao)).scalar_one():
+        return
+
+    totais: Counter = Counter()
+    acertos: Counter = Counter()
+    for (usuario_id,) in conn.execute(select(usuarios.c.id)):
+        totais[(GERAL, INICIO_GERAL, usuario_id)] += 0
+
+    ultimo_id = 0
+    while True:
+        rows = conn.execute(
+            select(palpites.c.id, palpites.c.usuario_id, palpites.c.created_at, palpites.c.acertou)
+            .where(palpites.c.id > ultimo_id)
+            .order_by(palpites.c.id)
+            .limit(TAMANHO_LOTE)
+        ).all()
+        if not rows:
+            break
+        ultimo_id = rows[-1].id
+
+        for row in rows:
+            periodos = periodos_de(row.created_at) if row.created_at else [(GERAL, INICIO_GERAL)]
+            for tipo, inicio in periodos:
+                totais[(tipo, inicio, row.usuario_id)] += 1
+                acertos[(tipo, inicio, row.usuario_id)] += 1 if row.acertou else 0
+
+    valores = [
+        {
+            "tipo": tipo,
+            "inicio": inicio,
+            "usuario_id": usuario_id,
+            "pontos": 0,
+            "palpites": n,
+            "acertos": acertos[(tipo, inicio, usuario_id)],
+        }
+        for (tipo, inicio, usuario_id), n in totais.items()
+    ]
+    inserir = insert_on_conflict(conn)(classificacao).on_conflict_do_nothing()
+    for i in range(0, len(valores), TAMANHO_LOTE):
+        conn.execute(inserir, valores[i : i + TAMANHO_LOTE])
+
+    moedas = select(usuarios.c.coins).where(usuarios.c.id == classificacao.c.usuario_id).scalar_subquery()
+    conn.execute(
+        update(classificacao).values(pontos=func.coalesce(moedas, classificacao.c.acertos * PONTOS_POR_ACERTO))
+    )
+
+
+# ---------------------------------------------------
+# RANKING: classificação por escopo (time do coração, grupos privados)
+# ---------------------------------------------------
+def classificacao_escopos_inicial(conn: Connection):
+    """Só roda com a tabela vazia: replica as linhas globais em cada escopo dos usuários."""
+    escopos = ClassificacaoEscopo.__table__
+    usuarios = User.__table__
+
+    existentes = set(inspect(conn).get_table_names())
+    if not {usuarios.name, ClassificacaoRanking.__tablename__} <= existentes:
+        return
+    if "time_do_coracao" not in _colunas(conn, usuarios.name):
+        return
+
+    for tabela in (GrupoPrivado.__table__, MembroGrupo.__table__, escopos):
+        tabela.create(bind=conn, checkfirst=True)
+    if conn.execute(select(func.count()).select_from(escopos)).scalar_one():
+        return
+
+    replicar_nos_escopos(conn)
+
+
+def usuarios_sem_time(conn: Connection):
+    """
+    O cadastro gravava "Sem time" para quem não escolheu time, o que juntava
+    todos numa torcida só. Volta para NULL e apaga as linhas desse escopo.
+    """
+    usuarios = User.__table__
+    existentes = set(inspect(conn).get_table_names())
+    if usuarios.name not in existentes or "time_do_coracao" not in _colunas(conn, usuarios.name):
+        return
+
+    conn.execute(update(usuarios).where(usuarios.c.time_do_coracao == SEM_TIME).values(time_do_coracao=None))
+    if ClassificacaoEscopo.__tablename__ in existentes:
+        escopos = ClassificacaoEscopo.__table__
+        conn.execute(delete(escopos).where(escopos.c.escopo == escopo_do_time(SEM_TIME)))
+
+
+# ---------------------------------------------------
+# ÍNDICES DECLARADOS NOS MODELS (create_all só cria em tabela nova)
+# ---------------------------------------------------
+def indices_dos_models(conn: Connection):
+    existentes = set(inspect(conn).get_table_names())
+    for tabela in Base.metadata.sorted_tables:
+        if tabela.name not in existentes:
+            continue
+        for indice in tabela.indexes:
+            indice.create(bind=conn, checkfirst=True)
+
+
+MIGRACOES = [
+    palpites_gols_inteiros,
+    palpites_unicos_por_partida,
+    usuarios_is_admin,
+    agenda_consultar_apos,
+    indices_dos_models,
+]
+
+CARGAS = [
+    palpites_gols_carga,
+    distribuicao_inicial,
+    classificacao_inicial,
+    usuarios_sem_time,
+    classificacao_escopos_inicial,
+]
+
+
+@contextmanager
+def _trava(engine: Engine):
+    """Um processo por vez (advisory lock de sessão no PostgreSQL)."""
+    if engine.dialect.name != "postgresql":
+        yield
+        return
+
+    with engine.connect() as conn:
+        conn.execute(text("SELECT pg_advisory_lock(:chave)"), {"chave": CHAVE_TRAVA})
+        try:
+            yield
+        finally:
+            conn.execute(text("SELECT pg_advisory_unlock(:chave)"), {"chave": CHAVE_TRAVA})
+
+
+def _rodar(engine: Engine, etapas):
+    with _trava(engine):
+        Base.metadata.create_all(bind=engine)
+        for etapa in etapas:
+            with engine.begin() as conn:
+                etapa(conn)
+
+
+def rodar_migracoes(engine: Engine):
+    """Schema: create_all + MIGRACOES (startup)."""
+    _rodar(engine, MIGRACOES)
+
+
+def rodar_cargas(engine: Engine):
+    """Backfills (CARGAS), fora do startup."""
+    _rodar(engine, CARGAS)
+
+
+if __name__ == "__main__":
+    # registra todos os models no metadata antes do create_all
+    import src.main  # noqa: F401
+    from src.db.session import engine
+
+    rodar_migracoes(engine)
+    rodar_cargas(engine)
@@ -0,0 +1,13 @@
+from typing import Union
+
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+
+def insert_on_conflict(db: Union[Session, Connection]):
+    """`insert` com ON CONFLICT do dialeto da sessão/conexão (mesma API em PG e SQLite)."""
+    dialeto = db.dialect if isinstance(db, Connection) else db.bind.dialect
+    if dialeto.name == "postgresql":
+        return postgresql.insert
+    return sqlite.insert
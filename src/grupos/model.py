@@ -0,0 +1,33 @@
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, String
+from sqlalchemy.sql import func
+
+from src.db.session import Base
+
+
+# -----------------------------
+# GRUPOS PRIVADOS (LIGAS DE AMIGOS)
+# -----------------------------
+class GrupoPrivado(Base):
+    """Grupo fechado com ranking próprio; só entra quem tem o `codigo` de convite."""
+
+    __tablename__ = "grupos"
+
+    id = Column(Integer, primary_key=True, index=True)
+    nome = Column(String, nullable=False)
+    codigo = Column(String, unique=True, index=True, nullable=False)
+    dono_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+
+    created_at = Column(DateTime, server_default=func.now())
+
+
+class MembroGrupo(Base):
+    __tablename__ = "grupos_membros"
+
+    grupo_id = Column(Integer, ForeignKey("grupos.id"), primary_key=True)
+    usuario_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+
+    entrou_em = Column(DateTime, server_default=func.now())
+
+
+# Grupos de um usuário (replicar palpites/acertos no ranking de cada grupo).
+Index("ix_grupos_membros_usuario", MembroGrupo.usuario_id)
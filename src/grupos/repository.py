@@ -0,0 +1,58 @@
+from typing import Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session, aliased
+
+from src.grupos.model import GrupoPrivado, MembroGrupo
+
+
+def get_grupo(db: Session, grupo_id: int) -> Optional[GrupoPrivado]:
+    return db.get(GrupoPrivado, grupo_id)
+
+
+def get_grupo_por_codigo(db: Session, codigo: str) -> Optional[GrupoPrivado]:
+    return db.execute(select(GrupoPrivado).where(GrupoPrivado.codigo == codigo)).scalar_one_or_none()
+
+
+def get_membro(db: Session, grupo_id: int, usuario_id: int) -> Optional[MembroGrupo]:
+    return db.get(MembroGrupo, (grupo_id, usuario_id))
+
+
+def criar_grupo(db: Session, nome: str, codigo: str, dono_id: int) -> GrupoPrivado:
+    """Não faz commit."""
+    grupo = GrupoPrivado(nome=nome, codigo=codigo, dono_id=dono_id)
+    db.add(grupo)
+    db.flush()
+    return grupo
+
+
+def adicionar_membro(db: Session, grupo_id: int, usuario_id: int) -> MembroGrupo:
+    """Não faz commit."""
+    membro = MembroGrupo(grupo_id=grupo_id, usuario_id=usuario_id)
+    db.add(membro)
+    db.flush()
+    return membro
+
+
+def remover_membro(db: Session, membro: MembroGrupo):
+    """Não faz commit."""
+    db.delete(membro)
+    db.flush()
+
+
+def get_grupos_do_usuario(db: Session, usuario_id: int):
+    """(grupo, total de membros) dos grupos do usuário, mais novos primeiro."""
+    outros = aliased(MembroGrupo)
+    membros = select(func.count()).where(outros.grupo_id == GrupoPrivado.id).scalar_subquery()
+    return db.execute(
+        select(GrupoPrivado, membros.label("membros"))
+        .join(MembroGrupo, MembroGrupo.grupo_id == GrupoPrivado.id)
+        .where(MembroGrupo.usuario_id == usuario_id)
+        .order_by(GrupoPrivado.id.desc())
+    ).all()
+
+
+def contar_membros(db: Session, grupo_id: int) -> int:
+    return db.execute(
+        select(func.count()).select_from(MembroGrupo).where(MembroGrupo.grupo_id == grupo_id)
+    ).scalar_one()
@@ -0,0 +1,35 @@
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from src.db.session import get_db
+from src.grupos.schema import GrupoCreate, GrupoEntrar, GrupoResponse
+from src.grupos.service import criar_grupo, entrar_no_grupo, listar_grupos, sair_do_grupo
+from src.usuario.auth import get_current_user
+
+router = APIRouter(prefix="/grupos", tags=["Grupos"])
+
+
+@router.post("/", response_model=GrupoResponse, status_code=201)
+def criar(dados: GrupoCreate, db: Session = Depends(get_db), usuario=Depends(get_current_user)):
+    return criar_grupo(db, usuario.id, dados.nome)
+
+
+@router.get("/", response_model=List[GrupoResponse])
+def meus_grupos(db: Session = Depends(get_db), usuario=Depends(get_current_user)):
+    return listar_grupos(db, usuario.id)
+
+
+@router.post("/entrar", response_model=GrupoResponse)
+def entrar(dados: GrupoEntrar, db: Session = Depends(get_db), usuario=Depends(get_current_user)):
+    grupo = entrar_no_grupo(db, usuario.id, dados.codigo)
+    if grupo is None:
+        raise HTTPException(404, "Convite inválido")
+    return grupo
+
+
+@router.delete("/{grupo_id}/membros/me", status_code=204)
+def sair(grupo_id: int, db: Session = Depends(get_db), usuario=Depends(get_current_user)):
+    if not sair_do_grupo(db, usuario.id, grupo_id):
+        raise HTTPException(404, "Grupo não encontrado")
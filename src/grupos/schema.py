@@ -0,0 +1,18 @@
+from pydantic import BaseModel, Field
+
+
+class GrupoCreate(BaseModel):
+    nome: str = Field(min_length=1, max_length=60)
+
+
+class GrupoEntrar(BaseModel):
+    codigo: str
+
+
+class GrupoResponse(BaseModel):
+    id: int
+    nome: str
+    # convite: quem tem o código entra no grupo
+    codigo: str
+    dono_id: int
+    membros: int
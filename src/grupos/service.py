@@ -0,0 +1,69 @@
+import secrets
+from typing import List, Optional
+
+from sqlalchemy.orm import Session
+
+from src.grupos import repository
+from src.grupos.schema import GrupoResponse
+from src.ranking.repository import entrar_no_escopo, escopo_do_grupo, sair_do_escopo
+
+
+def _resposta(grupo, membros: int) -> GrupoResponse:
+    return GrupoResponse(id=grupo.id, nome=grupo.nome, codigo=grupo.codigo, dono_id=grupo.dono_id, membros=membros)
+
+
+def _entrar(db: Session, grupo_id: int, usuario_id: int):
+    # a classificação do grupo é uma cópia das linhas do usuário, mantida
+    # dali em diante junto com a global
+    repository.adicionar_membro(db, grupo_id, usuario_id)
+    entrar_no_escopo(db, escopo_do_grupo(grupo_id), usuario_id)
+
+
+def criar_grupo(db: Session, usuario_id: int, nome: str) -> GrupoResponse:
+    """Cria o grupo com o usuário como dono e primeiro membro."""
+    try:
+        grupo = repository.criar_grupo(db, nome, secrets.token_urlsafe(8), usuario_id)
+        _entrar(db, grupo.id, usuario_id)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    return _resposta(grupo, 1)
+
+
+def entrar_no_grupo(db: Session, usuario_id: int, codigo: str) -> Optional[GrupoResponse]:
+    """Entra pelo código de convite; None se o código não existe. Entrar de novo não muda nada."""
+    grupo = repository.get_grupo_por_codigo(db, codigo)
+    if grupo is None:
+        return None
+
+    if repository.get_membro(db, grupo.id, usuario_id) is None:
+        try:
+            _entrar(db, grupo.id, usuario_id)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+
+    return _resposta(grupo, repository.contar_membros(db, grupo.id))
+
+
+def sair_do_grupo(db: Session, usuario_id: int, grupo_id: int) -> bool:
+    """False se o usuário não é membro do grupo."""
+    membro = repository.get_membro(db, grupo_id, usuario_id)
+    if membro is None:
+        return False
+
+    try:
+        repository.remover_membro(db, membro)
+        sair_do_escopo(db, escopo_do_grupo(grupo_id), usuario_id)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return True
+
+
+def listar_grupos(db: Session, usuario_id: int) -> List[GrupoResponse]:
+    return [_resposta(grupo, membros) for grupo, membros in repository.get_grupos_do_usuario(db, usuario_id)]
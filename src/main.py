@@ -4,10 +4,20 @@ from fastapi.middleware.cors import CORSMiddleware
 
 from src.colecao.router import router as colecao_router
 from src.colecao.seed import seed_colecao
-from src.db.session import Base, engine, get_db
+from src.config import settings
+from src.db.migrations import rodar_migracoes
+from src.db.session import engine, get_db
+from src.grupos.router import router as grupos_router
 from src.palpites.router import router as palpites_router
+from src.palpites.worker import apuracao_worker
+from src.partidas.client import async_client as async_thesportsdb_client
+from src.partidas.client import client as thesportsdb_client
+from src.partidas.inicios import inicio_partidas
+from src.partidas.live import live_poller
 from src.partidas.router import router as partidas_router
+from src.partidas.snapshot import snapshots
 from src.ranking.router import router as ranking_router
+from src.ranking.snapshot import ranking_snapshots
 from src.usuario.router import router as user_router
 
 app = FastAPI()
@@ -24,12 +34,38 @@ app.add_middleware(
 
 @app.on_event("startup")
 def startup():
-    Base.metadata.create_all(bind=engine)
+    # create_all + schema, sob trava entre workers; backfills: python -m src.db.migrations
+    rodar_migracoes(engine)
     db = next(get_db())
     seed_colecao(db)
 
+
+@app.on_event("startup")
+async def iniciar_tarefas_partidas():
+    if settings.PARTIDAS_AO_VIVO_POLLER:
+        live_poller.start()
+    if settings.PARTIDAS_APURACAO_WORKER:
+        apuracao_worker.start()
+    if settings.PARTIDAS_INICIOS_CACHE:
+        inicio_partidas.start()
+    if settings.RANKING_SNAPSHOT:
+        ranking_snapshots.start()
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    await live_poller.stop()
+    await apuracao_worker.stop()
+    await inicio_partidas.stop()
+    await ranking_snapshots.stop()
+    thesportsdb_client.close()
+    await async_thesportsdb_client.aclose()
+    snapshots.close()
+
+
 app.include_router(user_router)
 app.include_router(palpites_router)
 app.include_router(partidas_router)
 app.include_router(ranking_router)
 app.include_router(colecao_router)
+app.include_router(grupos_router)
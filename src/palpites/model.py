@@ -1,9 +1,26 @@
-from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Integer, String
+from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Index, Integer, String
+from sqlalchemy.orm import validates
 from sqlalchemy.sql import func
 
 from src.db.session import Base
 
 
+# -----------------------------
+# PARSE PADRÃO DE PLACAR
+# -----------------------------
+def parse_placar(placar: str) -> tuple[int, int]:
+    """
+    Aceita formatos '2x1', '2X1', '2-1', '2 - 1'
+    """
+    separadores = ["x", "X", "-"]
+    for sep in separadores:
+        if sep in placar:
+            partes = placar.split(sep)
+            if len(partes) == 2:
+                return int(partes[0].strip()), int(partes[1].strip())
+    raise ValueError(f"Formato de placar inválido: {placar}")
+
+
 class Palpite(Base):
     __tablename__ = "palpites"
 
@@ -13,7 +30,119 @@ class Palpite(Base):
     partida_id = Column(String, nullable=False)  # idEvent da API V2
     palpite = Column(String, nullable=False)
 
+    # placar do palpite já convertido (preenchido a partir de `palpite`)
+    gols_casa = Column(Integer, nullable=True)
+    gols_fora = Column(Integer, nullable=True)
+
     acertou = Column(Boolean, nullable=True)  # None = não processado
     processado = Column(Boolean, default=False)
 
     created_at = Column(DateTime, server_default=func.now())
+
+    @validates("palpite")
+    def _preencher_gols(self, _chave, placar):
+        try:
+            self.gols_casa, self.gols_fora = parse_placar(placar)
+        except (TypeError, ValueError):
+            self.gols_casa, self.gols_fora = None, None
+        return placar
+
+
+# Um palpite por usuário e partida — alvo do upsert do POST /palpites.
+Index("uq_palpites_usuario_partida", Palpite.usuario_id, Palpite.partida_id, unique=True)
+
+# Histórico do usuário paginado por (created_at, id).
+Index("ix_palpites_usuario_criacao", Palpite.usuario_id, Palpite.created_at, Palpite.id)
+
+# Palpites de um período (recálculo dos rankings mensal/semanal): faixa
+# em created_at; usuario_id e acertou deixam o índice cobrir o agregado
+# sem voltar à tabela.
+Index("ix_palpites_criacao_usuario", Palpite.created_at, Palpite.usuario_id, Palpite.acertou)
+
+# Palpites pendentes por partida (apuração): índice parcial, só as linhas
+# com processado = false entram — serve tanto o filtro por partida quanto
+# o DISTINCT partida_id das partidas com pendências.
+Index(
+    "ix_palpites_pendentes_partida",
+    Palpite.partida_id,
+    postgresql_where=Palpite.processado.is_(False),
+    sqlite_where=Palpite.processado.is_(False),
+)
+
+
+# -----------------------------
+# APURAÇÃO AGENDADA
+# -----------------------------
+class AgendaPartida(Base):
+    """Início (UTC) de cada partida, vindo do calendário da TheSportsDB."""
+
+    __tablename__ = "agenda_partidas"
+
+    partida_id = Column(String, primary_key=True)  # idEvent
+    liga_id = Column(String, nullable=True)
+    inicio_em = Column(DateTime, nullable=True, index=True)
+    # sem início conhecido (lookup não achou a partida): só consulta de novo depois disto
+    consultar_apos = Column(DateTime, nullable=True)
+
+    atualizado_em = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+
+class EstadoApuracao(Base):
+    """
+    Linha única com a última execução do worker de apuração. Não guarda
+    cursor: depois de um restart a seleção recomeça das partidas com
+    palpites pendentes (`processado`) e do início gravado na agenda.
+    """
+
+    __tablename__ = "apuracao_estado"
+
+    id = Column(Integer, primary_key=True)
+    ultima_execucao = Column(DateTime, nullable=True)
+
+
+# -----------------------------
+# DISTRIBUIÇÃO DOS PALPITES POR PARTIDA
+# -----------------------------
+class DistribuicaoPalpite(Base):
+    """
+    Quantos palpites cada placar recebeu em cada partida. Mantida de forma
+    incremental na mesma transação que grava/edita o palpite, para que a
+    leitura custe O(placares distintos) e não O(palpites).
+    """
+
+    __tablename__ = "palpites_distribuicao"
+
+    partida_id = Column(String, primary_key=True)
+    gols_casa = Column(Integer, primary_key=True)
+    gols_fora = Column(Integer, primary_key=True)
+
+    total = Column(Integer, nullable=False, default=0)
+
+
+# -----------------------------
+# EXECUÇÕES DE APURAÇÃO (PROGRESSO)
+# -----------------------------
+class ExecucaoApuracao(Base):
+    """
+    Uma execução de apuração de partida. Os contadores são atualizados na
+    mesma transação de cada lote, então refletem exatamente o que já foi
+    gravado, mesmo que o processo morra no meio.
+    """
+
+    __tablename__ = "apuracao_execucoes"
+
+    id = Column(Integer, primary_key=True, index=True)
+    partida_id = Column(String, nullable=False, index=True)
+    placar = Column(String, nullable=False)
+
+    # em_andamento | concluida | falhou
+    status = Column(String, nullable=False, default="em_andamento")
+    lotes = Column(Integer, nullable=False, default=0)
+    processados = Column(Integer, nullable=False, default=0)
+    acertos = Column(Integer, nullable=False, default=0)
+    moedas_creditadas = Column(Integer, nullable=False, default=0)
+    erro = Column(String, nullable=True)
+
+    iniciada_em = Column(DateTime, server_default=func.now())
+    atualizada_em = Column(DateTime, server_default=func.now(), onupdate=func.now())
+    finalizada_em = Column(DateTime, nullable=True)
@@ -1,7 +1,15 @@
+from collections import Counter
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import and_, case, func, or_, select, tuple_, update
 from sqlalchemy.orm import Session
 
-from src.palpites.model import Palpite
+from src.db.upsert import insert_on_conflict
+from src.palpites.model import AgendaPartida, DistribuicaoPalpite, EstadoApuracao, ExecucaoApuracao, Palpite
 from src.palpites.schema import PalpiteCreate, PalpiteUpdate
+from src.ranking.repository import registrar_acertos, registrar_palpites
+from src.usuario.models.user import User
 
 
 def create_palpite(db: Session, palpite_data: PalpiteCreate):
@@ -12,6 +20,151 @@ def create_palpite(db: Session, palpite_data: PalpiteCreate):
     return palpite
 
 
+def _valores(usuario_id: int, placares: list[tuple[str, int, int]]) -> list[dict]:
+    return [
+        {
+            "usuario_id": usuario_id,
+            "partida_id": str(partida_id),
+            "palpite": f"{gols_casa}x{gols_fora}",
+            "gols_casa": gols_casa,
+            "gols_fora": gols_fora,
+            "processado": False,
+        }
+        for partida_id, gols_casa, gols_fora in placares
+    ]
+
+
+def inserir_palpites_novos(db: Session, usuario_id: int, placares: list[tuple[str, int, int]]) -> list[Palpite]:
+    """
+    INSERT ... ON CONFLICT DO NOTHING RETURNING *: os palpites criados por
+    este statement, já completos. Dois envios simultâneos do primeiro
+    palpite não são ambos "novos": no PG o segundo espera o primeiro e cai
+    no conflito. Não faz commit.
+    """
+    stmt = (
+        insert_on_conflict(db)(Palpite)
+        .values(_valores(usuario_id, placares))
+        .on_conflict_do_nothing(index_elements=[Palpite.usuario_id, Palpite.partida_id])
+        .returning(Palpite)
+    )
+    return db.scalars(stmt, execution_options={"populate_existing": True}).all()
+
+
+def upsert_palpites(db: Session, usuario_id: int, placares: list[tuple[str, int, int]]) -> list[Palpite]:
+    """
+    Cria ou atualiza vários palpites do usuário em um único statement
+    (INSERT ... VALUES (...), (...) ON CONFLICT (usuario_id, partida_id)
+    DO UPDATE WHERE processado = false RETURNING *).
+
+    `placares` é uma lista de (partida_id, gols_casa, gols_fora). Partidas
+    cujo palpite já foi processado não voltam no retorno. Não faz commit:
+    o chamador monta a resposta e fecha a transação.
+    """
+    stmt = insert_on_conflict(db)(Palpite).values(_valores(usuario_id, placares))
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Palpite.usuario_id, Palpite.partida_id],
+        set_={
+            "palpite": stmt.excluded.palpite,
+            "gols_casa": stmt.excluded.gols_casa,
+            "gols_fora": stmt.excluded.gols_fora,
+        },
+        where=Palpite.processado.is_(False),
+    ).returning(Palpite)
+
+    return db.scalars(stmt, execution_options={"populate_existing": True}).all()
+
+
+def get_placares_do_usuario(
+    db: Session, usuario_id: int, partida_ids: list[str]
+) -> dict[str, tuple[Optional[int], Optional[int]]]:
+    """Placar atual dos palpites do usuário nas partidas (trava as linhas no PG)."""
+    if not partida_ids:
+        return {}
+    rows = (
+        db.query(Palpite.partida_id, Palpite.gols_casa, Palpite.gols_fora)
+        .filter(Palpite.usuario_id == usuario_id, Palpite.partida_id.in_([str(p) for p in partida_ids]))
+        .with_for_update()
+        .all()
+    )
+    return {r[0]: (r[1], r[2]) for r in rows}
+
+
+def salvar_placares(
+    db: Session, usuario_id: int, placares: list[tuple[str, int, int]]
+) -> tuple[list[Palpite], dict[str, tuple[Optional[int], Optional[int]]]]:
+    """
+    Upsert dos palpites + ajuste incremental da distribuição por placar e
+    da contagem de palpites no ranking.
+
+    Primeiro insere só os palpites que não existem: o RETURNING desse
+    INSERT já é a resposta dos novos, que não passam por mais nada. Só os
+    que já existiam são travados (para ler o placar anterior) e
+    atualizados pelo upsert, então envios concorrentes não contam o mesmo
+    palpite duas vezes nem deixam de descontar o placar antigo.
+
+    Retorna (palpites gravados, na ordem de `placares`; placares
+    anteriores por partida). Não faz commit.
+    """
+    criados = inserir_palpites_novos(db, usuario_id, placares)
+    novos = {p.partida_id for p in criados}
+
+    existentes = [p for p in placares if str(p[0]) not in novos]
+    anteriores = get_placares_do_usuario(db, usuario_id, [p[0] for p in existentes])
+    atualizados = upsert_palpites(db, usuario_id, existentes) if existentes else []
+
+    ordem = {str(p[0]): i for i, p in enumerate(placares)}
+    salvos = sorted([*criados, *atualizados], key=lambda p: ordem[p.partida_id])
+
+    deltas: Counter = Counter()
+    for palpite in salvos:
+        anterior = anteriores.get(palpite.partida_id)
+        atual = (palpite.gols_casa, palpite.gols_fora)
+        if anterior == atual:
+            continue
+        if anterior is not None and None not in anterior:
+            deltas[(palpite.partida_id, *anterior)] -= 1
+        deltas[(palpite.partida_id, *atual)] += 1
+
+    aplicar_distribuicao(db, deltas)
+    registrar_palpites(db, [(p.usuario_id, p.created_at) for p in criados])
+    return salvos, anteriores
+
+
+# ==============================
+# DISTRIBUIÇÃO POR PLACAR
+# ==============================
+
+
+def aplicar_distribuicao(db: Session, deltas: dict[tuple[str, int, int], int]):
+    """
+    Soma `delta` ao contador de cada (partida_id, gols_casa, gols_fora) em
+    um único INSERT ... ON CONFLICT DO UPDATE SET total = total + delta.
+    """
+    valores = [
+        {"partida_id": partida_id, "gols_casa": gols_casa, "gols_fora": gols_fora, "total": delta}
+        for (partida_id, gols_casa, gols_fora), delta in deltas.items()
+        if delta
+    ]
+    if not valores:
+        return
+
+    stmt = insert_on_conflict(db)(DistribuicaoPalpite).values(valores)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[DistribuicaoPalpite.partida_id, DistribuicaoPalpite.gols_casa, DistribuicaoPalpite.gols_fora],
+        set_={"total": DistribuicaoPalpite.total + stmt.excluded.total},
+    )
+    db.execute(stmt)
+
+
+def get_distribuicao_da_partida(db: Session, partida_id: str) -> list[DistribuicaoPalpite]:
+    return (
+        db.query(DistribuicaoPalpite)
+        .filter(DistribuicaoPalpite.partida_id == str(partida_id), DistribuicaoPalpite.total > 0)
+        .order_by(DistribuicaoPalpite.total.desc(), DistribuicaoPalpite.gols_casa, DistribuicaoPalpite.gols_fora)
+        .all()
+    )
+
+
 def get_palpite(db: Session, palpite_id: int):
     return db.query(Palpite).filter(Palpite.id == palpite_id).first()
 
@@ -20,6 +173,50 @@ def get_all_palpites(db: Session):
     return db.query(Palpite).all()
 
 
+# ==============================
+# HISTÓRICO PAGINADO (KEYSET)
+# ==============================
+
+FILTROS_STATUS = {
+    "pendentes": lambda: Palpite.processado.is_(False),
+    "apurados": lambda: Palpite.processado.is_(True),
+    "acertos": lambda: Palpite.acertou.is_(True),
+}
+
+
+def listar_palpites_paginados(
+    db: Session,
+    usuario_id: int,
+    limite: int,
+    apos: Optional[tuple[datetime, int]] = None,
+    status: Optional[str] = None,
+    partida_id: Optional[str] = None,
+) -> list[Palpite]:
+    """
+    Palpites do usuário do mais novo para o mais antigo, paginados por
+    (created_at, id) — usa o índice (usuario_id, created_at, id), então o
+    custo não cresce com o tamanho do histórico. `apos` é a última chave
+    da página anterior.
+    """
+    query = db.query(Palpite).filter(Palpite.usuario_id == usuario_id)
+
+    if status:
+        query = query.filter(FILTROS_STATUS[status]())
+    if partida_id is not None:
+        query = query.filter(Palpite.partida_id == str(partida_id))
+
+    if apos is not None:
+        criado_em, palpite_id = apos
+        # created_at da própria linha do cursor, como está gravado (evita
+        # diferença de formato/precisão entre o valor do token e o banco);
+        # o valor do token só vale se a linha tiver sido apagada
+        gravado = select(Palpite.created_at).where(Palpite.id == palpite_id).scalar_subquery()
+        chave = tuple_(func.coalesce(gravado, criado_em), palpite_id)
+        query = query.filter(tuple_(Palpite.created_at, Palpite.id) < chave)
+
+    return query.order_by(Palpite.created_at.desc(), Palpite.id.desc()).limit(limite).all()
+
+
 # ==============================
 # PALPITES PENDENTES
 # ==============================
@@ -51,6 +248,232 @@ def get_partidas_com_palpites_pendentes(db: Session) -> list[str]:
     return [r[0] for r in rows]
 
 
+# ==============================
+# APURAÇÃO EM MASSA (SET-BASED)
+# ==============================
+
+
+def _com_gols():
+    return and_(Palpite.gols_casa.is_not(None), Palpite.gols_fora.is_not(None))
+
+
+def _liquidar_lote(
+    db: Session,
+    partida_id: str,
+    acerto,
+    moedas_por_acerto: int,
+    tamanho_lote: int,
+) -> tuple[int, int]:
+    """
+    Reivindica até `tamanho_lote` palpites pendentes da partida e apura
+    só esses, sem carregar as linhas no ORM. Palpites legados ainda sem
+    gols_casa/gols_fora (carga `palpites_gols_carga` não rodou) ficam de
+    fora e continuam pendentes, em vez de virarem erro para sempre:
+
+    1. SELECT ... FOR UPDATE SKIP LOCKED (no PostgreSQL) trava o lote e
+       pula linhas já reivindicadas por outro worker;
+    2. um UPDATE ... FROM em `users` credita as moedas de quem acertou
+       dentro do lote (agrupado por usuário), e a classificação do ranking
+       recebe os acertos;
+    3. um UPDATE em `palpites` grava `acertou` e `processado`.
+
+    Não faz commit. Retorna (processados, acertos) do lote.
+    """
+    ids = db.scalars(
+        select(Palpite.id)
+        .where(Palpite.partida_id == partida_id, Palpite.processado.is_(False), _com_gols())
+        .order_by(Palpite.id)
+        .limit(tamanho_lote)
+        .with_for_update(skip_locked=True)
+    ).all()
+    if not ids:
+        return 0, 0
+
+    no_lote = and_(Palpite.id.in_(ids), Palpite.processado.is_(False))
+
+    acertos_do_lote = db.execute(select(Palpite.usuario_id, Palpite.created_at).where(no_lote, acerto)).all()
+    acertos = len(acertos_do_lote)
+
+    if acertos:
+        vencedores = (
+            select(Palpite.usuario_id, func.count().label("acertos"))
+            .where(no_lote, acerto)
+            .group_by(Palpite.usuario_id)
+            .subquery()
+        )
+        db.execute(
+            update(User)
+            .where(User.id == vencedores.c.usuario_id)
+            .values(coins=func.coalesce(User.coins, 0) + vencedores.c.acertos * moedas_por_acerto)
+            .execution_options(synchronize_session=False)
+        )
+        registrar_acertos(db, acertos_do_lote)
+
+    processados = db.execute(
+        update(Palpite)
+        .where(no_lote)
+        .values(acertou=case((acerto, True), else_=False), processado=True)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+    return processados, acertos
+
+
+def liquidar_palpites_da_partida(
+    db: Session,
+    partida_id: str,
+    gols_casa: int,
+    gols_fora: int,
+    moedas_por_acerto: int,
+    tamanho_lote: int = 1000,
+) -> dict:
+    """
+    Apura os palpites pendentes da partida em lotes de `tamanho_lote`,
+    cada um na sua transação. Como só linhas com `processado = false`
+    entram num lote, repetir a apuração é seguro: um crash refaz apenas
+    o lote que não chegou a ser commitado, e vários workers podem apurar
+    a mesma partida em paralelo (no PostgreSQL, via SKIP LOCKED).
+
+    O progresso fica em `apuracao_execucoes`, atualizado no mesmo commit
+    de cada lote. Retorna os totais desta execução.
+    """
+    partida_id = str(partida_id)
+    acerto = and_(Palpite.gols_casa == gols_casa, Palpite.gols_fora == gols_fora)
+
+    execucao = ExecucaoApuracao(partida_id=partida_id, placar=f"{gols_casa}x{gols_fora}")
+    db.add(execucao)
+    db.commit()
+
+    try:
+        while True:
+            processados, acertos = _liquidar_lote(db, partida_id, acerto, moedas_por_acerto, tamanho_lote)
+            if not processados:
+                break
+
+            execucao.lotes += 1
+            execucao.processados += processados
+            execucao.acertos += acertos
+            execucao.moedas_creditadas += acertos * moedas_por_acerto
+            db.commit()
+
+        execucao.status = "concluida"
+        execucao.finalizada_em = datetime.utcnow()
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        execucao.status = "falhou"
+        execucao.erro = str(e)[:500]
+        execucao.finalizada_em = datetime.utcnow()
+        db.commit()
+        raise
+
+    return {
+        "execucao_id": execucao.id,
+        "partida_id": partida_id,
+        "lotes": execucao.lotes,
+        "processados": execucao.processados,
+        "acertos": execucao.acertos,
+        "moedas_creditadas": execucao.moedas_creditadas,
+    }
+
+
+def get_execucoes_apuracao(
+    db: Session,
+    partida_id: Optional[str] = None,
+    status: Optional[str] = None,
+    limite: int = 20,
+) -> list[ExecucaoApuracao]:
+    query = db.query(ExecucaoApuracao)
+    if partida_id is not None:
+        query = query.filter(ExecucaoApuracao.partida_id == str(partida_id))
+    if status is not None:
+        query = query.filter(ExecucaoApuracao.status == status)
+    return query.order_by(ExecucaoApuracao.id.desc()).limit(limite).all()
+
+
+def get_execucao_apuracao(db: Session, execucao_id: int) -> Optional[ExecucaoApuracao]:
+    return db.get(ExecucaoApuracao, execucao_id)
+
+
+# ==============================
+# AGENDA / WATERMARK DA APURAÇÃO
+# ==============================
+
+
+def salvar_agenda(
+    db: Session,
+    partidas: list[tuple[str, Optional[str], Optional[datetime]]],
+    consultar_apos: Optional[datetime] = None,
+):
+    """
+    Grava (partida_id, liga_id, inicio_em); reagendamentos sobrescrevem.
+    Partidas sem início ficam com `consultar_apos` (novo lookup só depois).
+    """
+    for partida_id, liga_id, inicio_em in partidas:
+        db.merge(
+            AgendaPartida(
+                partida_id=str(partida_id),
+                liga_id=liga_id,
+                inicio_em=inicio_em,
+                consultar_apos=consultar_apos if inicio_em is None else None,
+            )
+        )
+    db.commit()
+
+
+def _partidas_pendentes():
+    # DISTINCT partida_id dos palpites pendentes (índice parcial ix_palpites_pendentes_partida);
+    # os sem gols esperam a carga, como em _liquidar_lote
+    return select(Palpite.partida_id).where(Palpite.processado.is_(False), _com_gols()).distinct().subquery()
+
+
+def get_partidas_para_lookup(db: Session, agora: datetime) -> list[str]:
+    """
+    Partidas com palpites pendentes e sem início conhecido: fora da agenda,
+    ou com lookup negativo cuja espera (`consultar_apos`) já passou.
+    """
+    pendentes = _partidas_pendentes()
+    rows = db.execute(
+        select(pendentes.c.partida_id)
+        .outerjoin(AgendaPartida, AgendaPartida.partida_id == pendentes.c.partida_id)
+        .where(
+            or_(
+                AgendaPartida.partida_id.is_(None),
+                and_(
+                    AgendaPartida.inicio_em.is_(None),
+                    or_(AgendaPartida.consultar_apos.is_(None), AgendaPartida.consultar_apos <= agora),
+                ),
+            )
+        )
+    ).all()
+    return [r[0] for r in rows]
+
+
+def get_partidas_pendentes_iniciadas(db: Session, ate: datetime) -> list[tuple[str, datetime]]:
+    """
+    Partidas com palpites pendentes e início até `ate`, por início. Parte
+    das partidas pendentes (não de uma faixa da agenda): uma partida que
+    começou há muito tempo e ganhou palpite/agenda depois também entra.
+    """
+    pendentes = _partidas_pendentes()
+    rows = db.execute(
+        select(AgendaPartida.partida_id, AgendaPartida.inicio_em)
+        .join(pendentes, pendentes.c.partida_id == AgendaPartida.partida_id)
+        .where(AgendaPartida.inicio_em <= ate)
+        .order_by(AgendaPartida.inicio_em)
+    ).all()
+    return [(r[0], r[1]) for r in rows]
+
+
+def get_estado_apuracao(db: Session) -> EstadoApuracao:
+    estado = db.get(EstadoApuracao, 1)
+    if estado is None:
+        estado = EstadoApuracao(id=1)
+        db.add(estado)
+        db.flush()
+    return estado
+
+
 def update_palpite(db: Session, palpite_id: int, dados: PalpiteUpdate, usuario_id: int):
     palpite = (
         db.query(Palpite)
@@ -69,16 +492,23 @@ def update_palpite(db: Session, palpite_id: int, dados: PalpiteUpdate, usuario_i
     g_casa = (
         dados.palpite_gols_casa
         if dados.palpite_gols_casa is not None
-        else int(palpite.palpite.split("x")[0])
+        else palpite.gols_casa
     )
     g_fora = (
         dados.palpite_gols_visitante
         if dados.palpite_gols_visitante is not None
-        else int(palpite.palpite.split("x")[1])
+        else palpite.gols_fora
     )
 
+    anterior = (palpite.gols_casa, palpite.gols_fora)
     palpite.palpite = f"{g_casa}x{g_fora}"
 
+    if anterior != (g_casa, g_fora):
+        deltas = Counter({(palpite.partida_id, g_casa, g_fora): 1})
+        if None not in anterior:
+            deltas[(palpite.partida_id, *anterior)] -= 1
+        aplicar_distribuicao(db, deltas)
+
     db.commit()
     db.refresh(palpite)
     return palpite
@@ -1,18 +1,33 @@
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 
 from src.db.session import get_db
-from src.palpites.schema import PalpiteCreate, PalpiteResponse, PalpiteUpdate
+from src.palpites.repository import get_execucao_apuracao, get_execucoes_apuracao
+from src.palpites.schema import (
+    AvaliacaoResponse,
+    DistribuicaoResponse,
+    ExecucaoApuracaoResponse,
+    PalpiteCreate,
+    PalpiteResponse,
+    PalpitesLoteCreate,
+    PalpitesLoteResponse,
+    PalpitesPaginados,
+    PalpiteUpdate,
+)
 from src.palpites.service import (
+    PalpitesEncerradosError,
     avaliar_palpites_da_partida,
     avaliar_palpites_da_partida_teste,
-    criar_palpite,
     editar_palpite,
-    listar_palpites,
-    processar_palpites_automaticamente,
+    listar_palpites_pagina,
+    obter_distribuicao,
+    salvar_palpite,
+    salvar_palpites_em_lote,
 )
+from src.palpites.worker import apuracao_worker
 from src.usuario.auth import get_current_user
-from src.palpites.model import Palpite
 
 router = APIRouter(prefix="/palpites", tags=["Palpites"])
 
@@ -26,37 +41,55 @@ def criar_ou_editar_palpite_endpoint(
     db: Session = Depends(get_db),
     usuario=Depends(get_current_user)
 ):
-    # Verifica se já existe palpite desta partida para o usuário
-    palpite_existente = (
-        db.query(Palpite)
-        .filter(
-            Palpite.usuario_id == usuario.id,
-            Palpite.partida_id == str(palpite.partida_id)
-        )
-        .first()
-    )
+    # Upsert atômico em (usuario_id, partida_id): sem SELECT prévio e sem
+    # duplicar o palpite em toques simultâneos
+    try:
+        salvo = salvar_palpite(db, palpite, usuario.id)
+    except PalpitesEncerradosError as e:
+        raise HTTPException(409, str(e))
+    if salvo is None:
+        raise HTTPException(409, "Palpite já processado")
+    return salvo
 
-    # Se já existir → atualizar
-    if palpite_existente:
-        dados = PalpiteUpdate(
-            palpite_gols_casa=palpite.palpite_gols_casa,
-            palpite_gols_visitante=palpite.palpite_gols_visitante,
-        )
-        return editar_palpite(db, palpite_existente.id, dados, usuario.id)
 
-    # Se não existir → criar
-    return criar_palpite(db, palpite, usuario.id)
+# -------------------------------------------------------------------------
+# PALPITES DA RODADA INTEIRA EM UMA REQUISIÇÃO
+# -------------------------------------------------------------------------
+@router.post("/lote", response_model=PalpitesLoteResponse)
+def salvar_palpites_em_lote_endpoint(
+    lote: PalpitesLoteCreate, db: Session = Depends(get_db), usuario=Depends(get_current_user)
+):
+    return salvar_palpites_em_lote(db, lote, usuario.id)
 
 
 # -------------------------------------------------------------------------
 # LISTAR TODOS OS PALPITES DO USUÁRIO
 # -------------------------------------------------------------------------
-@router.get("/", response_model=list[PalpiteResponse])
+@router.get("/", response_model=PalpitesPaginados)
 def listar_palpites_endpoint(
+    status: Optional[Literal["pendentes", "apurados", "acertos"]] = None,
+    partida_id: Optional[int] = None,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db),
     usuario=Depends(get_current_user)
 ):
-    return listar_palpites(db, usuario.id)
+    # Paginação por cursor (created_at, id): passe `proximo_cursor` da
+    # resposta anterior em `cursor` para buscar a página seguinte
+    try:
+        return listar_palpites_pagina(db, usuario.id, limit, cursor, status, partida_id)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+
+
+# -------------------------------------------------------------------------
+# O QUE OS OUTROS TORCEDORES PALPITARAM NA PARTIDA
+# -------------------------------------------------------------------------
+@router.get("/distribuicao/{partida_id}", response_model=DistribuicaoResponse)
+def distribuicao_endpoint(
+    partida_id: int, top: int = Query(5, ge=1, le=50), db: Session = Depends(get_db), usuario=Depends(get_current_user)
+):
+    return obter_distribuicao(db, str(partida_id), top)
 
 
 # -------------------------------------------------------------------------
@@ -69,7 +102,10 @@ def editar_palpite_endpoint(
     db: Session = Depends(get_db),
     usuario=Depends(get_current_user),
 ):
-    palpite = editar_palpite(db, palpite_id, dados, usuario.id)
+    try:
+        palpite = editar_palpite(db, palpite_id, dados, usuario.id)
+    except PalpitesEncerradosError as e:
+        raise HTTPException(409, str(e))
     if not palpite:
         raise HTTPException(404, "Palpite não encontrado ou já processado")
     return palpite
@@ -78,7 +114,7 @@ def editar_palpite_endpoint(
 # -------------------------------------------------------------------------
 # AVALIAR UMA PARTIDA REAL (usando API real)
 # -------------------------------------------------------------------------
-@router.post("/avaliar/{partida_id}", response_model=list[PalpiteResponse])
+@router.post("/avaliar/{partida_id}", response_model=AvaliacaoResponse)
 def avaliar_endpoint(
     partida_id: str,
     db: Session = Depends(get_db),
@@ -108,10 +144,41 @@ def processar_teste(
 
 # -------------------------------------------------------------------------
 # PROCESSAMENTO AUTOMÁTICO (PARTIDAS FINALIZADAS)
+# A apuração roda no worker em background; o endpoint só dispara uma execução.
 # -------------------------------------------------------------------------
-@router.post("/processar-automatico")
-def processar_auto(
+@router.post("/processar-automatico", status_code=202)
+async def processar_auto(usuario=Depends(get_current_user)):
+    disparado = apuracao_worker.disparar()
+    return {"disparado": disparado, **apuracao_worker.stats()}
+
+
+# -------------------------------------------------------------------------
+# PROGRESSO DAS APURAÇÕES (ADMIN)
+# Contadores gravados no mesmo commit de cada lote da apuração.
+# -------------------------------------------------------------------------
+@router.get("/apuracoes", response_model=list[ExecucaoApuracaoResponse])
+def listar_apuracoes_endpoint(
+    partida_id: Optional[str] = None,
+    status: Optional[Literal["em_andamento", "concluida", "falhou"]] = None,
+    limit: int = Query(20, ge=1, le=100),
     db: Session = Depends(get_db),
-    usuario=Depends(get_current_user)
+    usuario=Depends(get_current_user),
 ):
-    return processar_palpites_automaticamente(db)
+    if not usuario.is_admin:
+        raise HTTPException(status_code=403, detail="Apenas admins podem consultar apurações.")
+    return get_execucoes_apuracao(db, partida_id, status, limit)
+
+
+@router.get("/apuracoes/{execucao_id}", response_model=ExecucaoApuracaoResponse)
+def detalhar_apuracao_endpoint(
+    execucao_id: int,
+    db: Session = Depends(get_db),
+    usuario=Depends(get_current_user),
+):
+    if not usuario.is_admin:
+        raise HTTPException(status_code=403, detail="Apenas admins podem consultar apurações.")
+
+    execucao = get_execucao_apuracao(db, execucao_id)
+    if not execucao:
+        raise HTTPException(404, "Apuração não encontrada")
+    return execucao
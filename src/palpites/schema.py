@@ -1,18 +1,21 @@
 from datetime import datetime
-from typing import Optional
+from typing import Annotated, Literal, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, model_validator
+
+# placar não pode ser negativo (vale para o POST avulso, o lote e a edição)
+Gols = Annotated[int, Field(ge=0)]
 
 
 class PalpiteCreate(BaseModel):
     partida_id: int
-    palpite_gols_casa: int
-    palpite_gols_visitante: int
+    palpite_gols_casa: Gols
+    palpite_gols_visitante: Gols
 
 
 class PalpiteUpdate(BaseModel):
-    palpite_gols_casa: Optional[int] = None
-    palpite_gols_visitante: Optional[int] = None
+    palpite_gols_casa: Optional[Gols] = None
+    palpite_gols_visitante: Optional[Gols] = None
 
 
 class PalpiteResponse(BaseModel):
@@ -28,13 +31,82 @@ class PalpiteResponse(BaseModel):
 
     @staticmethod
     def from_model(model):
-        gols = model.palpite.replace("-", "x").lower().split("x")
         return PalpiteResponse(
             id=model.id,
             usuario_id=model.usuario_id,
             partida_id=int(model.partida_id),
-            palpite_gols_casa=int(gols[0]),
-            palpite_gols_visitante=int(gols[1]),
+            palpite_gols_casa=model.gols_casa,
+            palpite_gols_visitante=model.gols_fora,
             acertou=model.acertou,
             created_at=model.created_at,
         )
+
+
+class PalpitesLoteCreate(BaseModel):
+    palpites: list[PalpiteCreate] = Field(min_length=1, max_length=50)
+
+    @model_validator(mode="after")
+    def _partidas_unicas(self):
+        partidas = [p.partida_id for p in self.palpites]
+        if len(partidas) != len(set(partidas)):
+            raise ValueError("Cada partida só pode aparecer uma vez no lote")
+        return self
+
+
+class ResultadoLoteItem(BaseModel):
+    partida_id: int
+    status: Literal["criado", "atualizado", "ja_processado", "encerrado"]
+    palpite: Optional[PalpiteResponse] = None
+
+
+class PalpitesLoteResponse(BaseModel):
+    criados: int
+    atualizados: int
+    ja_processados: int
+    encerrados: int = 0
+    itens: list[ResultadoLoteItem]
+
+
+class PalpitesPaginados(BaseModel):
+    itens: list[PalpiteResponse]
+    proximo_cursor: Optional[str] = None
+
+
+class AvaliacaoResponse(BaseModel):
+    execucao_id: int
+    partida_id: str
+    lotes: int
+    processados: int
+    acertos: int
+    moedas_creditadas: int
+
+
+class ExecucaoApuracaoResponse(BaseModel):
+    id: int
+    partida_id: str
+    placar: str
+    status: Literal["em_andamento", "concluida", "falhou"]
+    lotes: int
+    processados: int
+    acertos: int
+    moedas_creditadas: int
+    erro: Optional[str] = None
+    iniciada_em: Optional[datetime] = None
+    atualizada_em: Optional[datetime] = None
+    finalizada_em: Optional[datetime] = None
+
+    model_config = {"from_attributes": True}
+
+
+class PlacarDistribuicao(BaseModel):
+    gols_casa: int
+    gols_fora: int
+    total: int
+    percentual: float
+
+
+class DistribuicaoResponse(BaseModel):
+    partida_id: int
+    total: int
+    resultado: dict[str, float]  # casa / empate / fora, em %
+    placares: list[PlacarDistribuicao]
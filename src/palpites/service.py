@@ -1,32 +1,43 @@
+import base64
+import json
+from datetime import datetime
+from typing import Optional
+
 from sqlalchemy.orm import Session
 
-from src.palpites.model import Palpite
+from src.config import settings
+from src.palpites.model import Palpite, parse_placar
 from src.palpites.repository import (
-    get_palpites_pendentes_da_partida,
+    aplicar_distribuicao,
+    get_distribuicao_da_partida,
+    get_palpite,
     get_partidas_com_palpites_pendentes,
+    liquidar_palpites_da_partida,
+    listar_palpites_paginados,
+    salvar_placares,
     update_palpite,
 )
-from src.palpites.schema import PalpiteCreate, PalpiteResponse
-from src.partidas.service import get_partida_por_id
-from src.usuario.models.user import User
+from src.palpites.schema import (
+    DistribuicaoResponse,
+    PalpiteCreate,
+    PalpiteResponse,
+    PalpitesLoteCreate,
+    PalpitesLoteResponse,
+    PalpitesPaginados,
+    PlacarDistribuicao,
+    ResultadoLoteItem,
+)
+from src.partidas.inicios import inicio_partidas
+from src.partidas.schema import PartidaResultado
+from src.partidas.service import get_partida_por_id, resolver_resultados
+from src.ranking.repository import registrar_palpites
+from src.ranking.snapshot import ranking_snapshots
 
 MOEDAS_POR_ACERTO = 100
 
 
-# -----------------------------
-# PARSE PADRÃO DE PLACAR
-# -----------------------------
-def parse_placar(placar: str) -> tuple[int, int]:
-    """
-    Aceita formatos '2x1', '2X1', '2-1', '2 - 1'
-    """
-    separadores = ["x", "X", "-"]
-    for sep in separadores:
-        if sep in placar:
-            partes = placar.split(sep)
-            if len(partes) == 2:
-                return int(partes[0].strip()), int(partes[1].strip())
-    raise ValueError(f"Formato de placar inválido: {placar}")
+class PalpitesEncerradosError(Exception):
+    """A partida já começou (ou passou do horário de fechamento)."""
 
 
 # -----------------------------
@@ -42,17 +53,155 @@ def criar_palpite(db: Session, palpite_data: PalpiteCreate, usuario_id: int):
     )
 
     db.add(novo)
+    db.flush()
+    aplicar_distribuicao(db, {(novo.partida_id, novo.gols_casa, novo.gols_fora): 1})
+    registrar_palpites(db, [(novo.usuario_id, novo.created_at)])
     db.commit()
     db.refresh(novo)
     return PalpiteResponse.from_model(novo)
 
 
+def salvar_palpite(db: Session, palpite_data: PalpiteCreate, usuario_id: int) -> Optional[PalpiteResponse]:
+    """
+    Cria ou edita (upsert atômico). None = palpite já processado.
+    O fechamento é checado no cache de horários, sem chamar a API.
+    """
+    if not inicio_partidas.aceita_palpite(palpite_data.partida_id):
+        raise PalpitesEncerradosError("Palpites encerrados para esta partida")
+
+    salvos, _ = salvar_placares(
+        db,
+        usuario_id,
+        [(str(palpite_data.partida_id), palpite_data.palpite_gols_casa, palpite_data.palpite_gols_visitante)],
+    )
+
+    # a resposta sai das colunas do RETURNING, antes do commit expirar o objeto
+    resposta = PalpiteResponse.from_model(salvos[0]) if salvos else None
+    db.commit()
+    return resposta
+
+
+def salvar_palpites_em_lote(db: Session, lote: PalpitesLoteCreate, usuario_id: int) -> PalpitesLoteResponse:
+    """
+    Upsert de uma rodada inteira: um INSERT multi-linha cria os palpites
+    novos (ON CONFLICT DO NOTHING) e só os que já existiam passam pelo
+    SELECT do placar anterior e pelo upsert, com o ajuste da distribuição,
+    na mesma transação. Partidas que já começaram ficam de fora
+    (`encerrado`).
+    """
+    partida_ids = [str(p.partida_id) for p in lote.palpites]
+    encerradas = {pid for pid in partida_ids if not inicio_partidas.aceita_palpite(pid)}
+
+    abertos = [p for p in lote.palpites if str(p.partida_id) not in encerradas]
+    salvos, existentes = (
+        salvar_placares(
+            db,
+            usuario_id,
+            [(str(p.partida_id), p.palpite_gols_casa, p.palpite_gols_visitante) for p in abertos],
+        )
+        if abertos
+        else ([], {})
+    )
+    por_partida = {p.partida_id: PalpiteResponse.from_model(p) for p in salvos}
+    db.commit()
+
+    itens = []
+    for partida_id in partida_ids:
+        salvo = por_partida.get(partida_id)
+        if partida_id in encerradas:
+            status = "encerrado"
+        elif salvo is None:
+            status = "ja_processado"
+        elif partida_id in existentes:
+            status = "atualizado"
+        else:
+            status = "criado"
+        itens.append(ResultadoLoteItem(partida_id=int(partida_id), status=status, palpite=salvo))
+
+    return PalpitesLoteResponse(
+        criados=sum(i.status == "criado" for i in itens),
+        atualizados=sum(i.status == "atualizado" for i in itens),
+        ja_processados=sum(i.status == "ja_processado" for i in itens),
+        encerrados=sum(i.status == "encerrado" for i in itens),
+        itens=itens,
+    )
+
+
 def listar_palpites(db: Session, usuario_id: int):
     palpites = db.query(Palpite).filter(Palpite.usuario_id == usuario_id).all()
     return [PalpiteResponse.from_model(p) for p in palpites]
 
 
+def obter_distribuicao(db: Session, partida_id: str, top: int = 5) -> DistribuicaoResponse:
+    """Percentuais de vitória/empate/derrota e placares mais palpitados."""
+    linhas = get_distribuicao_da_partida(db, partida_id)
+    total = sum(linha.total for linha in linhas)
+
+    def percentual(n: int) -> float:
+        return round(100 * n / total, 1) if total else 0.0
+
+    casa = sum(linha.total for linha in linhas if linha.gols_casa > linha.gols_fora)
+    empate = sum(linha.total for linha in linhas if linha.gols_casa == linha.gols_fora)
+
+    return DistribuicaoResponse(
+        partida_id=int(partida_id),
+        total=total,
+        resultado={
+            "casa": percentual(casa),
+            "empate": percentual(empate),
+            "fora": percentual(total - casa - empate),
+        },
+        placares=[
+            PlacarDistribuicao(
+                gols_casa=linha.gols_casa,
+                gols_fora=linha.gols_fora,
+                total=linha.total,
+                percentual=percentual(linha.total),
+            )
+            for linha in linhas[:top]
+        ],
+    )
+
+
+def _codificar_cursor(palpite: Palpite) -> str:
+    chave = json.dumps([palpite.created_at.isoformat(), palpite.id])
+    return base64.urlsafe_b64encode(chave.encode()).decode().rstrip("=")
+
+
+def _decodificar_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        bruto = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        criado_em, palpite_id = json.loads(bruto)
+        return datetime.fromisoformat(criado_em), int(palpite_id)
+    except (ValueError, TypeError) as e:
+        raise ValueError("Cursor inválido") from e
+
+
+def listar_palpites_pagina(
+    db: Session,
+    usuario_id: int,
+    limite: int = 20,
+    cursor: Optional[str] = None,
+    status: Optional[str] = None,
+    partida_id: Optional[int] = None,
+) -> PalpitesPaginados:
+    apos = _decodificar_cursor(cursor) if cursor else None
+
+    # um a mais para saber se existe próxima página
+    palpites = listar_palpites_paginados(db, usuario_id, limite + 1, apos, status, partida_id)
+    pagina = palpites[:limite]
+
+    return PalpitesPaginados(
+        itens=[PalpiteResponse.from_model(p) for p in pagina],
+        proximo_cursor=_codificar_cursor(pagina[-1]) if len(palpites) > limite else None,
+    )
+
+
 def editar_palpite(db, palpite_id, dados, usuario_id):
+    atual = get_palpite(db, palpite_id)
+    if atual is not None and atual.usuario_id == usuario_id and not inicio_partidas.aceita_palpite(atual.partida_id):
+        raise PalpitesEncerradosError("Palpites encerrados para esta partida")
+
     palpite = update_palpite(db, palpite_id, dados, usuario_id)
     if palpite:
         return PalpiteResponse.from_model(palpite)
@@ -61,12 +210,32 @@ def editar_palpite(db, palpite_id, dados, usuario_id):
 # -----------------------------
 # AVALIAÇÃO VIA PLACAR REAL
 # -----------------------------
-def avaliar_palpites_da_partida(db: Session, partida_id: str):
+def _liquidar(db: Session, partida_id: str, gols_casa: int, gols_fora: int) -> dict:
+    apuracao = liquidar_palpites_da_partida(
+        db, partida_id, gols_casa, gols_fora, MOEDAS_POR_ACERTO, settings.PARTIDAS_APURACAO_LOTE
+    )
+    if apuracao["processados"]:
+        # pontuação mudou: os retratos do ranking são refeitos em seguida
+        ranking_snapshots.marcar_alteracao()
+    return apuracao
+
+
+def avaliar_palpites_da_partida(
+    db: Session,
+    partida_id: str,
+    resultado: Optional[PartidaResultado] = None,
+):
     """
-    Busca o resultado REAL da partida usando get_partida_por_id.
+    Busca o resultado REAL da partida usando get_partida_por_id
+    (a não ser que o resultado já venha resolvido em lote).
     Se a partida ainda não tiver placar (não finalizada), retorna None.
+
+    A apuração é feita em massa no banco, em lotes commitados um a um;
+    o retorno são os totais da execução (processados, acertos, moedas
+    creditadas), também consultáveis em GET /palpites/apuracoes.
     """
-    resultado = get_partida_por_id(partida_id)
+    if resultado is None:
+        resultado = get_partida_por_id(partida_id)
 
     if (
         resultado is None
@@ -76,30 +245,7 @@ def avaliar_palpites_da_partida(db: Session, partida_id: str):
         # partida ainda não finalizada ou não encontrada
         return None
 
-    palpites = get_palpites_pendentes_da_partida(db, partida_id)
-
-    for palpite in palpites:
-        try:
-            g_casa, g_fora = parse_placar(palpite.palpite)
-        except ValueError:
-            palpite.acertou = False
-            palpite.processado = True
-            continue
-
-        if g_casa == resultado.placar_casa and g_fora == resultado.placar_fora:
-            palpite.acertou = True
-
-            # adicionar moedas
-            user = db.query(User).filter(User.id == palpite.usuario_id).first()
-            if user:
-                user.coins = (user.coins or 0) + MOEDAS_POR_ACERTO
-        else:
-            palpite.acertou = False
-
-        palpite.processado = True
-
-    db.commit()
-    return palpites
+    return _liquidar(db, partida_id, resultado.placar_casa, resultado.placar_fora)
 
 
 # -----------------------------
@@ -111,34 +257,19 @@ def avaliar_palpites_da_partida_teste(
     placar_real: str,
 ):
     g_casa, g_fora = parse_placar(placar_real)
-    palpites = get_palpites_pendentes_da_partida(db, partida_id)
-
-    for palpite in palpites:
-        try:
-            gc, gf = parse_placar(palpite.palpite)
-        except ValueError:
-            palpite.acertou = False
-            palpite.processado = True
-            continue
+    apuracao = _liquidar(db, partida_id, g_casa, g_fora)
 
-        palpite.acertou = gc == g_casa and gf == g_fora
-        palpite.processado = True
-
-        if palpite.acertou:
-            user = db.query(User).filter(User.id == palpite.usuario_id).first()
-            if user:
-                user.coins = (user.coins or 0) + MOEDAS_POR_ACERTO
-
-    db.commit()
-    return {"mensagem": "OK", "processados": len(palpites)}
+    return {"mensagem": "OK", "processados": apuracao["processados"]}
 
 
 # -----------------------------
 # PROCESSAMENTO AUTOMÁTICO
 # -----------------------------
-def processar_palpites_automaticamente(db: Session):
+def processar_palpites_automaticamente(db: Session, partidas: Optional[list[str]] = None):
     """
-    Processa automaticamente TODOS os palpites pendentes.
+    Processa automaticamente TODOS os palpites pendentes (ou só os das
+    `partidas` informadas — o worker de apuração passa apenas as que já
+    começaram).
 
     Em vez de depender da lista de partidas ao vivo (que pode não
     conter mais as partidas que já terminaram), buscamos no banco
@@ -148,17 +279,28 @@ def processar_palpites_automaticamente(db: Session):
 
     Isso resolve o problema de partidas que já acabaram mas ainda
     não tinham sido processadas na hora em que estavam "ao vivo".
+
+    Os placares são resolvidos em lote (`resolver_resultados`): um feed
+    de resultados por liga e lookup individual só para o que faltar.
     """
-    partidas_pendentes = get_partidas_com_palpites_pendentes(db)
+    partidas_pendentes = partidas if partidas is not None else get_partidas_com_palpites_pendentes(db)
     resultados: list[dict] = []
 
+    if not partidas_pendentes:
+        return resultados
+
+    placares = resolver_resultados(partidas_pendentes)
+
     for partida_id in partidas_pendentes:
-        r = avaliar_palpites_da_partida(db, partida_id)
-        if r:
+        if partida_id not in placares:
+            continue
+
+        r = avaliar_palpites_da_partida(db, partida_id, resultado=placares[partida_id])
+        if r and r["processados"]:
             resultados.append(
                 {
                     "partida": partida_id,
-                    "processados": len(r),
+                    "processados": r["processados"],
                 }
             )
 
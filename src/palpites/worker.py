@@ -0,0 +1,213 @@
+import asyncio
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+
+from sqlalchemy.orm import Session
+
+from src.config import settings
+from src.db.session import SessionLocal
+from src.palpites.repository import (
+    get_estado_apuracao,
+    get_partidas_para_lookup,
+    get_partidas_pendentes_iniciadas,
+    salvar_agenda,
+)
+from src.palpites.service import processar_palpites_automaticamente
+from src.partidas.service import (
+    buscar_partidas,
+    get_proximas_partidas_league,
+    get_ultimos_resultados,
+    inicio_da_partida,
+    ligas_monitoradas,
+)
+
+logger = logging.getLogger(__name__)
+
+
+# ---------------------------------------------------
+# WORKER DE APURAÇÃO (BACKGROUND)
+# ---------------------------------------------------
+
+
+class ApuracaoWorker:
+    """
+    Apura palpites em intervalo fixo, consultando a TheSportsDB só para
+    partidas que já começaram (início + `atraso`) e ainda têm pendências.
+
+    - o início de cada partida vem do calendário das ligas monitoradas
+      (próximas + últimas), gravado em `agenda_partidas`; partidas com
+      palpite fora desse calendário ganham um lookup para descobrir o
+      horário, e um lookup que não acha a partida também é gravado (sem
+      início), para só ser repetido depois de `espera_lookup`;
+    - cada execução parte das partidas com palpites pendentes (índice
+      parcial) e apura as que começaram até agora - atraso, por mais
+      antigas que sejam. Não há cursor persistido: depois de um restart a
+      retomada vem de `processado` e de `agenda_partidas`, e uma partida
+      sem resultado segue na seleção até ser apurada.
+
+    POST /palpites/processar-automatico apenas dispara uma execução.
+    """
+
+    def __init__(
+        self,
+        intervalo: float,
+        atraso: timedelta,
+        intervalo_agenda: float,
+        espera_lookup: timedelta = timedelta(hours=1),
+        session_factory: Callable[[], Session] = SessionLocal,
+    ):
+        self.intervalo = intervalo
+        self.atraso = atraso
+        self.intervalo_agenda = intervalo_agenda
+        self.espera_lookup = espera_lookup
+        self._session_factory = session_factory
+
+        self._tarefa: Optional[asyncio.Task] = None
+        self._execucao_avulsa: Optional[asyncio.Task] = None
+        self._disparo: Optional[asyncio.Event] = None
+        self._lock = threading.Lock()
+
+        self.agenda_em: Optional[datetime] = None
+        self.ultima_execucao: Optional[dict] = None
+        self.falhas_seguidas = 0
+
+    # -------------------- uma execução (síncrona) --------------------
+
+    def _atualizar_agenda(self, db: Session, agora: datetime):
+        partidas = []
+        for liga in ligas_monitoradas():
+            try:
+                partidas += get_proximas_partidas_league(liga, limit=100)
+                partidas += get_ultimos_resultados(liga, limit=None)
+            except Exception:
+                logger.warning("Calendário da liga %s indisponível", liga, exc_info=True)
+
+        salvar_agenda(db, [(p.id_partida, p.liga_id, inicio_da_partida(p)) for p in partidas])
+        self.agenda_em = agora
+
+    def _agendar_desconhecidas(self, db: Session, agora: datetime) -> int:
+        """Lookup das partidas pendentes sem início conhecido; devolve quantas ganharam início."""
+        desconhecidas = get_partidas_para_lookup(db, agora)
+        if not desconhecidas:
+            return 0
+
+        encontradas = buscar_partidas(desconhecidas)
+        agenda = []
+        for partida_id in desconhecidas:
+            partida = encontradas.get(partida_id)
+            if partida is None:
+                agenda.append((partida_id, None, None))
+            else:
+                agenda.append((partida_id, partida.liga_id, inicio_da_partida(partida)))
+
+        # sem início: grava mesmo assim, para não consultar de novo a cada passada
+        salvar_agenda(db, agenda, consultar_apos=agora + self.espera_lookup)
+        return sum(1 for _, _, inicio in agenda if inicio is not None)
+
+    def executar(self, agora: Optional[datetime] = None) -> dict:
+        """Uma passada completa; seguro para chamar de qualquer thread."""
+        with self._lock:
+            agora = agora or datetime.utcnow()
+            db = self._session_factory()
+            try:
+                if self.agenda_em is None or (agora - self.agenda_em).total_seconds() >= self.intervalo_agenda:
+                    self._atualizar_agenda(db, agora)
+                descobertas = self._agendar_desconhecidas(db, agora)
+
+                estado = get_estado_apuracao(db)
+                ate = agora - self.atraso
+
+                devidas = [pid for pid, _ in get_partidas_pendentes_iniciadas(db, ate)]
+                apuradas = processar_palpites_automaticamente(db, devidas) if devidas else []
+
+                # partidas que começaram e ainda não têm resultado
+                # (adiada, atrasada, API sem placar...)
+                restantes = get_partidas_pendentes_iniciadas(db, ate)
+                estado.ultima_execucao = agora
+                db.commit()
+
+                self.ultima_execucao = {
+                    "em": agora,
+                    "aguardando_desde": restantes[0][1] if restantes else None,
+                    "consultadas": len(devidas),
+                    "apuradas": apuradas,
+                    "aguardando_resultado": len(restantes),
+                    "agendadas_por_lookup": descobertas,
+                }
+                return self.ultima_execucao
+            finally:
+                db.close()
+
+    # -------------------- background --------------------
+
+    async def _executar_em_thread(self):
+        try:
+            await asyncio.to_thread(self.executar)
+            self.falhas_seguidas = 0
+        except Exception:
+            self.falhas_seguidas += 1
+            logger.exception("Falha na apuração automática de palpites")
+
+    async def _loop(self):
+        while True:
+            self._disparo.clear()
+            await self._executar_em_thread()
+
+            try:
+                await asyncio.wait_for(self._disparo.wait(), timeout=self.intervalo)
+            except asyncio.TimeoutError:
+                pass
+
+    @property
+    def ativo(self) -> bool:
+        return self._tarefa is not None and not self._tarefa.done()
+
+    def start(self):
+        if not self.ativo:
+            self._disparo = asyncio.Event()
+            self._tarefa = asyncio.get_running_loop().create_task(self._loop())
+
+    def disparar(self) -> bool:
+        """
+        Antecipa a próxima execução. Sem o loop rodando, agenda uma
+        execução avulsa. Retorna False se já há uma avulsa em andamento.
+        """
+        if self.ativo:
+            self._disparo.set()
+            return True
+
+        if self._execucao_avulsa is not None and not self._execucao_avulsa.done():
+            return False
+
+        self._execucao_avulsa = asyncio.get_running_loop().create_task(self._executar_em_thread())
+        return True
+
+    async def stop(self):
+        for tarefa in (self._tarefa, self._execucao_avulsa):
+            if tarefa is None:
+                continue
+            tarefa.cancel()
+            try:
+                await tarefa
+            except asyncio.CancelledError:
+                pass
+        self._tarefa = None
+        self._execucao_avulsa = None
+
+    def stats(self) -> dict:
+        return {
+            "ativo": self.ativo,
+            "agenda_em": self.agenda_em,
+            "falhas_seguidas": self.falhas_seguidas,
+            "ultima_execucao": self.ultima_execucao,
+        }
+
+
+apuracao_worker = ApuracaoWorker(
+    intervalo=settings.PARTIDAS_APURACAO_INTERVALO,
+    atraso=timedelta(minutes=settings.PARTIDAS_APURACAO_ATRASO_MIN),
+    intervalo_agenda=settings.PARTIDAS_APURACAO_AGENDA_INTERVALO,
+    espera_lookup=timedelta(seconds=settings.PARTIDAS_APURACAO_LOOKUP_ESPERA),
+)
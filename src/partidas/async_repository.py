@@ -0,0 +1,231 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from src.partidas.breaker import protecao
+from src.partidas.client import async_client
+from src.partidas.hedge import VERSOES, hedge_stats
+from src.partidas.repository import (
+    _cache,
+    _chave_cache,
+    _eventos_ao_vivo,
+    _eventos_lookup,
+    _headers_v2,
+    _para_elenco,
+    _para_liga,
+    _para_partida_proxima,
+    _para_partida_resultado,
+    _para_tabela_time,
+    _ttl_para,
+    _url_v1,
+    _url_v2,
+)
+from src.partidas.schema import ElencoResponse, Liga, PartidaProxima, PartidaResultado, TabelaTime
+from src.partidas.snapshot import snapshots
+
+# ---------------------------------------------------
+# VERSÃO ASSÍNCRONA DO REPOSITÓRIO (httpx)
+# Mesmas funções de `repository.py`, compartilhando cache e conversões.
+# ---------------------------------------------------
+
+
+async def _requisitar(url: str, params: dict, headers: Optional[dict] = None, timeout: Optional[float] = None):
+    return await async_client.get_json(url, params=params, headers=headers, read_timeout=timeout)
+
+
+async def _obter(endpoint: str, url: str, params: dict, headers: Optional[dict] = None, forcar: bool = False):
+    """
+    Cache em memória -> snapshot em disco -> API (com stale se a API falhar).
+    A chamada à API passa pelo circuit breaker da família do endpoint.
+    """
+    chave = _chave_cache(url, params)
+    ttl = _ttl_para(endpoint)
+
+    # forcar=True descarta o que estiver em cache e busca de novo
+    if forcar:
+        _cache.invalidar(chave)
+
+    async def buscar():
+        return await protecao.aexecutar(endpoint, lambda timeout: _requisitar(url, params, headers, timeout))
+
+    return await _cache.aget_or_load(
+        chave,
+        ttl,
+        lambda: snapshots.acarregar(chave, ttl, buscar, forcar=forcar),
+    )
+
+
+async def _get_v2(path: str, params: dict = None, forcar: bool = False):
+    """Chamada genérica da API V2 (requer header X-API-KEY)."""
+    if params is None:
+        params = {}
+
+    return await _obter(path, _url_v2(path), params, _headers_v2(), forcar=forcar)
+
+
+async def _get_v1(endpoint: str, params: dict = None):
+    """Chamada genérica da API V1 (key na URL)."""
+    if params is None:
+        params = {}
+
+    return await _obter(endpoint, _url_v1(endpoint), params)
+
+
+# ---------------------------------------------------
+# LIGAS (V1)
+# ---------------------------------------------------
+
+
+async def get_ligas_por_pais(pais: str) -> List[Liga]:
+    data = await _get_v1("search_all_leagues.php", {"c": pais, "s": "Soccer"})
+
+    leagues = data.get("countries") or []
+
+    return [_para_liga(lg) for lg in leagues]
+
+
+# ---------------------------------------------------
+# CORRIDA V2 x V1 (HEDGE)
+# ---------------------------------------------------
+
+Fonte = Callable[[], Awaitable[list]]
+
+
+async def _tentar(fonte: Fonte) -> list:
+    try:
+        return await fonte()
+    except Exception:
+        return []
+
+
+async def _corrida(recurso: str, league_id: str, fontes: Dict[str, Fonte]) -> list:
+    """
+    Dispara V2 e V1 em paralelo, fica com a primeira resposta não vazia
+    e cancela a outra. Se o histórico da liga mostra que uma versão
+    sempre vence, chama só ela (e cai para a outra se vier vazia).
+    """
+    preferida = hedge_stats.preferida(recurso, league_id)
+
+    if preferida is not None:
+        events = await _tentar(fontes[preferida])
+        if events:
+            hedge_stats.registrar(recurso, league_id, preferida)
+            return events
+
+        outra = next(v for v in VERSOES if v != preferida)
+        events = await _tentar(fontes[outra])
+        hedge_stats.registrar(recurso, league_id, outra if events else None)
+        return events
+
+    tarefas = {asyncio.ensure_future(_tentar(fonte)): versao for versao, fonte in fontes.items()}
+    pendentes = set(tarefas)
+
+    try:
+        while pendentes:
+            prontas, pendentes = await asyncio.wait(pendentes, return_when=asyncio.FIRST_COMPLETED)
+
+            for tarefa in sorted(prontas, key=lambda t: VERSOES.index(tarefas[t])):
+                events = tarefa.result()
+                if events:
+                    hedge_stats.registrar(recurso, league_id, tarefas[tarefa])
+                    return events
+
+        hedge_stats.registrar(recurso, league_id, None)
+        return []
+    finally:
+        for tarefa in pendentes:
+            tarefa.cancel()
+
+
+# ---------------------------------------------------
+# PRÓXIMAS PARTIDAS (V2 x V1)
+# ---------------------------------------------------
+
+
+def _fontes_proximas(league_id: str) -> Dict[str, Fonte]:
+    async def v2():
+        data_v2 = await _get_v2(f"schedule/next/league/{league_id}")
+        return data_v2.get("events") or []
+
+    async def v1():
+        data_v1 = await _get_v1("eventsnextleague.php", {"id": league_id})
+        return data_v1.get("events") or []
+
+    return {"v2": v2, "v1": v1}
+
+
+async def get_proximas_partidas_league(league_id: str) -> List[PartidaProxima]:
+    events = await _corrida("proximas", league_id, _fontes_proximas(league_id))
+
+    return [_para_partida_proxima(ev) for ev in events]
+
+
+# ---------------------------------------------------
+# ÚLTIMOS RESULTADOS (V2 x V1)
+# ---------------------------------------------------
+
+
+def _fontes_resultados(league_id: str) -> Dict[str, Fonte]:
+    async def v2():
+        data_v2 = await _get_v2(f"schedule/previous/league/{league_id}")
+        return data_v2.get("events") or []
+
+    async def v1():
+        data_v1 = await _get_v1("eventslast.php", {"id": league_id})
+        return data_v1.get("results") or data_v1.get("events") or []
+
+    return {"v2": v2, "v1": v1}
+
+
+async def get_ultimos_resultados(league_id: str, limit: int = 10) -> List[PartidaResultado]:
+    events = await _corrida("resultados", league_id, _fontes_resultados(league_id))
+
+    return [_para_partida_resultado(ev) for ev in events[:limit]]
+
+
+# ---------------------------------------------------
+# PARTIDAS AO VIVO (V2)
+# ---------------------------------------------------
+
+
+async def fetch_live_matches(forcar: bool = False):
+    data = await _get_v2("livescore/soccer", forcar=forcar)
+    return _eventos_ao_vivo(data)
+
+
+# ---------------------------------------------------
+# TABELA DO CAMPEONATO (V1)
+# ---------------------------------------------------
+
+
+async def get_tabela(league_id: str, season: Optional[str]) -> List[TabelaTime]:
+    data = await _get_v1("lookuptable.php", {"l": league_id, "s": season})
+    table = data.get("table") or []
+
+    return [_para_tabela_time(row) for row in table]
+
+
+# ---------------------------------------------------
+# ELENCO (V2)
+# ---------------------------------------------------
+
+
+async def get_elenco_time(team_id: str) -> ElencoResponse:
+    data = await _get_v2(f"list/players/{team_id}")
+    players = data.get("players") or []
+
+    return _para_elenco(team_id, players)
+
+
+# ---------------------------------------------------
+# PARTIDA POR ID (V2)
+# ---------------------------------------------------
+
+
+async def get_partida_por_id(event_id: str) -> Optional[PartidaResultado]:
+    data = await _get_v2(f"lookup/event/{event_id}")
+    events = _eventos_lookup(data)
+
+    if not events:
+        return None
+
+    return _para_partida_resultado(events[0])
@@ -0,0 +1,271 @@
+import threading
+import time
+from collections import deque
+from typing import Awaitable, Callable, Dict, List, Optional, TypeVar
+
+from src.config import settings
+
+T = TypeVar("T")
+
+# ---------------------------------------------------
+# CIRCUIT BREAKER + TIMEOUT ADAPTATIVO (POR FAMÍLIA DE ENDPOINT)
+# ---------------------------------------------------
+
+# prefixo do endpoint -> família; o primeiro que casar vence
+FAMILIAS = [
+    ("schedule/", "schedule"),
+    ("eventsnextleague.php", "schedule"),
+    ("eventslast.php", "schedule"),
+    ("lookup/", "lookup"),
+    ("livescore/", "livescore"),
+    ("lookuptable.php", "lookuptable"),
+    ("list/players/", "list/players"),
+]
+FAMILIA_PADRAO = "outros"
+
+# limites superiores (ms) dos baldes do histograma de latência
+BALDES_MS = [50, 100, 250, 500, 1000, 2000, 5000, 10000, 15000]
+
+
+def familia_do_endpoint(endpoint: str) -> str:
+    endpoint = endpoint.lstrip("/")
+    for prefixo, familia in FAMILIAS:
+        if endpoint.startswith(prefixo):
+            return familia
+    return FAMILIA_PADRAO
+
+
+class CircuitoAbertoError(Exception):
+    """A família de endpoints está com o circuito aberto (falha rápida)."""
+
+
+def _conta_como_falha(erro: Exception) -> bool:
+    # 4xx (exceto 429) é resposta válida da API, não indisponibilidade
+    resposta = getattr(erro, "response", None)
+    status = getattr(resposta, "status_code", None)
+    if status is not None and status < 500 and status != 429:
+        return False
+    return True
+
+
+class CircuitBreaker:
+    """
+    FECHADO -> (N falhas seguidas) -> ABERTO -> (tempo_aberto) -> MEIO_ABERTO.
+    Em MEIO_ABERTO só uma requisição de teste passa: se der certo o
+    circuito fecha, se falhar volta a abrir.
+    """
+
+    FECHADO = "fechado"
+    ABERTO = "aberto"
+    MEIO_ABERTO = "meio_aberto"
+
+    def __init__(self, limite_falhas: int, tempo_aberto: float):
+        self.limite_falhas = limite_falhas
+        self.tempo_aberto = tempo_aberto
+
+        self.estado = self.FECHADO
+        self.falhas_seguidas = 0
+        self.aberto_em: Optional[float] = None
+        self.rejeitadas = 0
+
+        self._teste_em_andamento = False
+        self._lock = threading.Lock()
+
+    def permitir(self) -> bool:
+        with self._lock:
+            if self.estado == self.ABERTO and time.monotonic() - self.aberto_em >= self.tempo_aberto:
+                self.estado = self.MEIO_ABERTO
+                self._teste_em_andamento = False
+
+            if self.estado == self.FECHADO:
+                return True
+
+            if self.estado == self.MEIO_ABERTO and not self._teste_em_andamento:
+                self._teste_em_andamento = True
+                return True
+
+            self.rejeitadas += 1
+            return False
+
+    def sucesso(self):
+        with self._lock:
+            self.estado = self.FECHADO
+            self.falhas_seguidas = 0
+            self._teste_em_andamento = False
+
+    def falha(self):
+        with self._lock:
+            self.falhas_seguidas += 1
+            self._teste_em_andamento = False
+
+            if self.estado == self.MEIO_ABERTO or self.falhas_seguidas >= self.limite_falhas:
+                self.estado = self.ABERTO
+                self.aberto_em = time.monotonic()
+
+    def liberar(self):
+        """Requisição de teste terminou sem veredito (ex.: cancelada)."""
+        with self._lock:
+            self._teste_em_andamento = False
+
+
+class LatencyTracker:
+    """Histograma cumulativo + janela recente de amostras para percentis."""
+
+    def __init__(self, janela: int = 200):
+        self.baldes = [0] * (len(BALDES_MS) + 1)
+        self.amostras: deque = deque(maxlen=janela)
+        self._lock = threading.Lock()
+
+    def registrar(self, segundos: float):
+        ms = segundos * 1000
+        with self._lock:
+            self.amostras.append(segundos)
+            for i, limite in enumerate(BALDES_MS):
+                if ms <= limite:
+                    self.baldes[i] += 1
+                    break
+            else:
+                self.baldes[-1] += 1
+
+    def percentil(self, p: float) -> Optional[float]:
+        with self._lock:
+            if not self.amostras:
+                return None
+            ordenadas = sorted(self.amostras)
+
+        indice = min(len(ordenadas) - 1, int(round(p / 100 * (len(ordenadas) - 1))))
+        return ordenadas[indice]
+
+    def histograma(self) -> Dict[str, int]:
+        with self._lock:
+            rotulos = [f"<={limite}ms" for limite in BALDES_MS] + [f">{BALDES_MS[-1]}ms"]
+            return dict(zip(rotulos, self.baldes))
+
+
+class Familia:
+    """Breaker + latência + timeout adaptativo de uma família de endpoints."""
+
+    def __init__(self, nome: str, breaker: CircuitBreaker, timeout_min: float, timeout_max: float, fator: float):
+        self.nome = nome
+        self.breaker = breaker
+        self.latencia = LatencyTracker()
+
+        self.timeout_min = timeout_min
+        self.timeout_max = timeout_max
+        self.fator = fator
+
+    def timeout_leitura(self) -> float:
+        """
+        p99 observado x fator, limitado a [timeout_min, timeout_max]. A
+        requisição de teste do meio-aberto usa timeout_max: se o upstream
+        só ficou mais lento, ela passa e o circuito fecha.
+        """
+        if len(self.latencia.amostras) < 20 or self.breaker.estado == CircuitBreaker.MEIO_ABERTO:
+            return self.timeout_max
+
+        p99 = self.latencia.percentil(99)
+        return max(self.timeout_min, min(self.timeout_max, p99 * self.fator))
+
+    def stats(self) -> dict:
+        return {
+            "estado": self.breaker.estado,
+            "falhas_seguidas": self.breaker.falhas_seguidas,
+            "rejeitadas": self.breaker.rejeitadas,
+            "timeout_leitura": round(self.timeout_leitura(), 3),
+            "latencia": {
+                "p50": self.latencia.percentil(50),
+                "p95": self.latencia.percentil(95),
+                "p99": self.latencia.percentil(99),
+                "histograma": self.latencia.histograma(),
+            },
+        }
+
+
+class ProtecaoUpstream:
+    """Registro das famílias e execução protegida das chamadas HTTP."""
+
+    def __init__(self, limite_falhas: int, tempo_aberto: float, timeout_min: float, timeout_max: float, fator: float):
+        self.limite_falhas = limite_falhas
+        self.tempo_aberto = tempo_aberto
+        self.timeout_min = timeout_min
+        self.timeout_max = timeout_max
+        self.fator = fator
+
+        self._familias: Dict[str, Familia] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls) -> "ProtecaoUpstream":
+        return cls(
+            limite_falhas=settings.PARTIDAS_BREAKER_LIMITE_FALHAS,
+            tempo_aberto=settings.PARTIDAS_BREAKER_TEMPO_ABERTO,
+            timeout_min=settings.PARTIDAS_TIMEOUT_MIN,
+            timeout_max=settings.THESPORTSDB_READ_TIMEOUT,
+            fator=settings.PARTIDAS_TIMEOUT_FATOR_P99,
+        )
+
+    def familia(self, endpoint: str) -> Familia:
+        nome = familia_do_endpoint(endpoint)
+        with self._lock:
+            if nome not in self._familias:
+                self._familias[nome] = Familia(
+                    nome,
+                    CircuitBreaker(self.limite_falhas, self.tempo_aberto),
+                    self.timeout_min,
+                    self.timeout_max,
+                    self.fator,
+                )
+            return self._familias[nome]
+
+    def _antes(self, familia: Familia):
+        if not familia.breaker.permitir():
+            raise CircuitoAbertoError(f"Circuito aberto para '{familia.nome}'")
+
+    def _depois(self, familia: Familia, inicio: float, erro: Optional[BaseException]):
+        if erro is None:
+            familia.latencia.registrar(time.perf_counter() - inicio)
+            familia.breaker.sucesso()
+        elif isinstance(erro, Exception) and _conta_como_falha(erro):
+            # falha/timeout também entra na latência (com o tempo gasto):
+            # senão, depois de uma piora, só sucessos rápidos antigos ficam
+            # na janela e o timeout nunca volta a crescer
+            familia.latencia.registrar(time.perf_counter() - inicio)
+            familia.breaker.falha()
+        elif isinstance(erro, Exception):
+            familia.breaker.sucesso()
+        else:
+            familia.breaker.liberar()
+
+    def executar(self, endpoint: str, chamada: Callable[[float], T]) -> T:
+        familia = self.familia(endpoint)
+        self._antes(familia)
+
+        inicio = time.perf_counter()
+        try:
+            resultado = chamada(familia.timeout_leitura())
+        except BaseException as e:
+            self._depois(familia, inicio, e)
+            raise
+        self._depois(familia, inicio, None)
+        return resultado
+
+    async def aexecutar(self, endpoint: str, chamada: Callable[[float], Awaitable[T]]) -> T:
+        familia = self.familia(endpoint)
+        self._antes(familia)
+
+        inicio = time.perf_counter()
+        try:
+            resultado = await chamada(familia.timeout_leitura())
+        except BaseException as e:
+            self._depois(familia, inicio, e)
+            raise
+        self._depois(familia, inicio, None)
+        return resultado
+
+    def stats(self) -> Dict[str, dict]:
+        with self._lock:
+            familias: List[Familia] = list(self._familias.values())
+        return {f.nome: f.stats() for f in familias}
+
+
+protecao = ProtecaoUpstream.from_settings()
@@ -0,0 +1,184 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable, NamedTuple, Optional
+
+# ---------------------------------------------------
+# CACHE EM MEMÓRIA (TTL + LRU + SINGLE-FLIGHT)
+# ---------------------------------------------------
+
+
+class ValorComTTL(NamedTuple):
+    """Retorno opcional do loader para sobrescrever o TTL daquela entrada."""
+
+    valor: Any
+    ttl: float
+
+
+def _desembrulhar(resultado: Any, ttl: float):
+    if isinstance(resultado, ValorComTTL):
+        return resultado.valor, resultado.ttl
+    return resultado, ttl
+
+
+class _Chamada:
+    """Chamada em andamento para uma chave (compartilhada entre threads)."""
+
+    def __init__(self):
+        self.evento = threading.Event()
+        self.resultado: Any = None
+        self.erro: Optional[BaseException] = None
+
+
+class _Carga:
+    """Carga assíncrona em andamento e quantos chamadores a aguardam."""
+
+    def __init__(self, tarefa: "asyncio.Task"):
+        self.tarefa = tarefa
+        self.aguardando = 0
+
+
+class TTLCache:
+    """
+    Cache LRU limitado, com TTL por entrada e coalescência de chamadas.
+
+    Se N threads pedirem a mesma chave ao mesmo tempo e ela não estiver
+    no cache, somente a primeira executa o `loader`; as demais aguardam
+    e recebem o mesmo resultado (ou a mesma exceção).
+    Exceções nunca são armazenadas.
+
+    `aget_or_load` é a versão assíncrona: a carga roda em uma task
+    própria, então o cancelamento de um chamador não derruba os demais;
+    só quando todos desistem a requisição é cancelada.
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._dados: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._em_andamento: dict = {}
+        self._tarefas: dict = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, chave: Hashable):
+        """Retorna o valor se existir e não estiver expirado, senão None."""
+        with self._lock:
+            return self._get_locked(chave)
+
+    def set(self, chave: Hashable, valor: Any, ttl: float):
+        with self._lock:
+            self._set_locked(chave, valor, ttl)
+
+    def get_or_load(self, chave: Hashable, ttl: float, loader: Callable[[], Any]):
+        with self._lock:
+            valor = self._get_locked(chave)
+            if valor is not None:
+                self.hits += 1
+                return valor
+
+            self.misses += 1
+            chamada = self._em_andamento.get(chave)
+            lider = chamada is None
+            if lider:
+                chamada = _Chamada()
+                self._em_andamento[chave] = chamada
+
+        if not lider:
+            chamada.evento.wait()
+            if chamada.erro is not None:
+                raise chamada.erro
+            return chamada.resultado
+
+        try:
+            chamada.resultado, ttl = _desembrulhar(loader(), ttl)
+            if ttl > 0:
+                self.set(chave, chamada.resultado, ttl)
+            return chamada.resultado
+        except BaseException as e:
+            chamada.erro = e
+            raise
+        finally:
+            with self._lock:
+                self._em_andamento.pop(chave, None)
+            chamada.evento.set()
+
+    async def aget_or_load(self, chave: Hashable, ttl: float, loader: Callable[[], Awaitable[Any]]):
+        loop = asyncio.get_running_loop()
+
+        with self._lock:
+            valor = self._get_locked(chave)
+            if valor is not None:
+                self.hits += 1
+                return valor
+
+            self.misses += 1
+            carga = self._tarefas.get(chave)
+            if carga is None or carga.tarefa.get_loop() is not loop:
+                carga = _Carga(loop.create_task(self._carregar(chave, ttl, loader)))
+                self._tarefas[chave] = carga
+            carga.aguardando += 1
+
+        try:
+            return await asyncio.shield(carga.tarefa)
+        finally:
+            with self._lock:
+                carga.aguardando -= 1
+                abandonada = carga.aguardando == 0 and not carga.tarefa.done()
+            if abandonada:
+                carga.tarefa.cancel()
+
+    async def _carregar(self, chave: Hashable, ttl: float, loader: Callable[[], Awaitable[Any]]):
+        try:
+            valor, ttl = _desembrulhar(await loader(), ttl)
+            if ttl > 0:
+                self.set(chave, valor, ttl)
+            return valor
+        finally:
+            with self._lock:
+                carga = self._tarefas.get(chave)
+                if carga is not None and carga.tarefa is asyncio.current_task():
+                    del self._tarefas[chave]
+
+    def invalidar(self, chave: Hashable):
+        with self._lock:
+            self._dados.pop(chave, None)
+
+    def clear(self):
+        with self._lock:
+            self._dados.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entradas": len(self._dados),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+    # -------------------- internos (com lock) --------------------
+
+    def _get_locked(self, chave: Hashable):
+        item = self._dados.get(chave)
+        if item is None:
+            return None
+
+        expira_em, valor = item
+        if expira_em <= time.monotonic():
+            del self._dados[chave]
+            return None
+
+        self._dados.move_to_end(chave)
+        return valor
+
+    def _set_locked(self, chave: Hashable, valor: Any, ttl: float):
+        self._dados[chave] = (time.monotonic() + ttl, valor)
+        self._dados.move_to_end(chave)
+
+        while len(self._dados) > self.maxsize:
+            self._dados.popitem(last=False)
@@ -0,0 +1,134 @@
+import threading
+from typing import Optional
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+from src.config import settings
+
+# ---------------------------------------------------
+# CLIENTE HTTP DA THESPORTSDB (POOL + KEEP-ALIVE)
+# ---------------------------------------------------
+
+
+class TheSportsDBClient:
+    """
+    Cliente HTTP compartilhado por todas as chamadas à TheSportsDB.
+
+    Mantém uma única `requests.Session` com pool de conexões keep-alive,
+    reaproveitada entre as threads do threadpool do FastAPI — evita um
+    handshake TCP+TLS novo a cada chamada.
+    """
+
+    def __init__(
+        self,
+        pool_connections: int,
+        pool_maxsize: int,
+        connect_timeout: float,
+        read_timeout: float,
+    ):
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.timeout = (connect_timeout, read_timeout)
+
+        self._session: Optional[requests.Session] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls) -> "TheSportsDBClient":
+        return cls(
+            pool_connections=settings.THESPORTSDB_POOL_CONNECTIONS,
+            pool_maxsize=settings.THESPORTSDB_POOL_MAXSIZE,
+            connect_timeout=settings.THESPORTSDB_CONNECT_TIMEOUT,
+            read_timeout=settings.THESPORTSDB_READ_TIMEOUT,
+        )
+
+    @property
+    def session(self) -> requests.Session:
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    self._session = self._criar_session()
+        return self._session
+
+    def _criar_session(self) -> requests.Session:
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def get_json(self, url: str, params: dict = None, headers: dict = None, read_timeout: Optional[float] = None):
+        timeout = self.timeout if read_timeout is None else (self.timeout[0], read_timeout)
+        resp = self.session.get(url, params=params, headers=headers, timeout=timeout)
+        resp.raise_for_status()
+        return resp.json()
+
+    def close(self):
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+
+class AsyncTheSportsDBClient:
+    """
+    Versão assíncrona (httpx) do cliente, usada pelas rotas `async def`.
+
+    Cada chamada pendente custa uma coroutine, e não uma thread do pool.
+    """
+
+    def __init__(
+        self,
+        pool_connections: int,
+        pool_maxsize: int,
+        connect_timeout: float,
+        read_timeout: float,
+    ):
+        self.limits = httpx.Limits(
+            max_connections=pool_connections * pool_maxsize,
+            max_keepalive_connections=pool_maxsize,
+        )
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @classmethod
+    def from_settings(cls) -> "AsyncTheSportsDBClient":
+        return cls(
+            pool_connections=settings.THESPORTSDB_POOL_CONNECTIONS,
+            pool_maxsize=settings.THESPORTSDB_POOL_MAXSIZE,
+            connect_timeout=settings.THESPORTSDB_CONNECT_TIMEOUT,
+            read_timeout=settings.THESPORTSDB_READ_TIMEOUT,
+        )
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(limits=self.limits, timeout=self.timeout)
+        return self._client
+
+    async def get_json(
+        self,
+        url: str,
+        params: dict = None,
+        headers: dict = None,
+        read_timeout: Optional[float] = None,
+    ):
+        timeout = self.timeout if read_timeout is None else httpx.Timeout(read_timeout, connect=self.timeout.connect)
+        resp = await self.client.get(url, params=params, headers=headers, timeout=timeout)
+        resp.raise_for_status()
+        return resp.json()
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+client = TheSportsDBClient.from_settings()
+async_client = AsyncTheSportsDBClient.from_settings()
@@ -0,0 +1,109 @@
+import threading
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+from src.config import settings
+
+# ---------------------------------------------------
+# HEDGE V2 x V1 — APRENDIZADO POR LIGA
+# ---------------------------------------------------
+
+VERSOES = ("v2", "v1")
+
+
+class EstatisticasHedge:
+    """
+    Guarda, por (recurso, liga), qual versão da API respondeu com dados
+    nas últimas `janela` chamadas.
+
+    Quando uma versão vence com folga (`limiar`) e há amostras suficientes,
+    ela passa a ser chamada sozinha. A cada `explorar_a_cada` chamadas
+    a corrida completa é refeita, para o aprendizado poder mudar de lado.
+    """
+
+    def __init__(self, janela: int = 20, min_amostras: int = 5, limiar: float = 0.8, explorar_a_cada: int = 20):
+        self.janela = janela
+        self.min_amostras = min_amostras
+        self.limiar = limiar
+        self.explorar_a_cada = explorar_a_cada
+
+        self._resultados: Dict[Tuple[str, str], deque] = {}
+        self._chamadas: Dict[Tuple[str, str], int] = {}
+        self._vitorias: Dict[Tuple[str, str], Dict[str, int]] = {}
+        self._evitadas: Dict[Tuple[str, str], int] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls) -> "EstatisticasHedge":
+        return cls(
+            janela=settings.PARTIDAS_HEDGE_JANELA,
+            min_amostras=settings.PARTIDAS_HEDGE_MIN_AMOSTRAS,
+            limiar=settings.PARTIDAS_HEDGE_LIMIAR,
+        )
+
+    def preferida(self, recurso: str, league_id: str) -> Optional[str]:
+        """Versão que deve ser chamada sozinha, ou None para correr as duas."""
+        chave = (recurso, str(league_id))
+
+        with self._lock:
+            n = self._chamadas.get(chave, 0) + 1
+            self._chamadas[chave] = n
+
+            if n % self.explorar_a_cada == 0:
+                return None
+
+            versao = self._preferida_atual(chave)
+            if versao is not None:
+                self._evitadas[chave] = self._evitadas.get(chave, 0) + 1
+            return versao
+
+    def ordem(self, recurso: str, league_id: str) -> List[str]:
+        """Ordem de tentativa para o caminho sequencial (síncrono)."""
+        with self._lock:
+            versao = self._preferida_atual((recurso, str(league_id)))
+        if versao == "v1":
+            return ["v1", "v2"]
+        return ["v2", "v1"]
+
+    def registrar(self, recurso: str, league_id: str, vencedora: Optional[str]):
+        """Registra quem respondeu com dados (None = nenhuma das duas)."""
+        chave = (recurso, str(league_id))
+
+        with self._lock:
+            self._resultados.setdefault(chave, deque(maxlen=self.janela)).append(vencedora)
+
+            vitorias = self._vitorias.setdefault(chave, {"v2": 0, "v1": 0, "vazio": 0})
+            vitorias[vencedora or "vazio"] += 1
+
+    def stats(self) -> list:
+        with self._lock:
+            chaves = sorted(set(self._vitorias) | set(self._chamadas))
+            return [
+                {
+                    "recurso": recurso,
+                    "liga_id": liga,
+                    "vitorias": dict(self._vitorias.get((recurso, liga), {"v2": 0, "v1": 0, "vazio": 0})),
+                    "chamadas_evitadas": self._evitadas.get((recurso, liga), 0),
+                    "preferida": self._preferida_atual((recurso, liga)),
+                }
+                for recurso, liga in chaves
+            ]
+
+    def reset(self):
+        with self._lock:
+            self._resultados.clear()
+            self._chamadas.clear()
+            self._vitorias.clear()
+            self._evitadas.clear()
+
+    def _preferida_atual(self, chave) -> Optional[str]:
+        resultados = self._resultados.get(chave)
+        if not resultados or len(resultados) < self.min_amostras:
+            return None
+        for versao in VERSOES:
+            if resultados.count(versao) / len(resultados) >= self.limiar:
+                return versao
+        return None
+
+
+hedge_stats = EstatisticasHedge.from_settings()
@@ -0,0 +1,222 @@
+import asyncio
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, Optional, Set, Tuple
+
+from sqlalchemy.orm import Session
+
+from src.config import settings
+from src.db.session import SessionLocal
+from src.palpites.model import AgendaPartida
+from src.partidas.service import (
+    get_proximas_partidas_league,
+    inicio_da_partida,
+    ligas_monitoradas,
+    obter_resultado_partida_por_id,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _buscar_inicio(partida_id: str) -> Optional[datetime]:
+    """Início de uma partida pelo lookup por id; None se ela não existe."""
+    partida = obter_resultado_partida_por_id(partida_id)
+    return inicio_da_partida(partida) if partida is not None else None
+
+
+# ---------------------------------------------------
+# HORÁRIOS DE INÍCIO DAS PARTIDAS (CACHE EM MEMÓRIA)
+# ---------------------------------------------------
+
+
+class InicioPartidas:
+    """
+    Índice partida_id -> início (UTC), alimentado em background pelo
+    calendário das ligas monitoradas (`dateEvent` + `strTime`).
+
+    Serve para fechar palpites no início da partida sem nenhuma chamada à
+    TheSportsDB no caminho de escrita. Partidas que saem do calendário
+    (já começaram) continuam no índice por `retencao`, e no primeiro
+    carregamento a agenda persistida pelo worker de apuração cobre o que
+    começou antes do restart.
+
+    Partida fora do índice não é aceita: o id entra numa fila e o loop em
+    background o consulta por id (`buscar`) a cada `intervalo_pendentes`
+    segundos. Achado o início, a partida entra no índice; se não existe
+    ou não tem data, a resposta negativa vale por `espera_desconhecida`.
+    Falha do upstream deixa o id na fila para a próxima volta.
+    """
+
+    def __init__(
+        self,
+        intervalo: float,
+        fechamento: timedelta,
+        retencao: timedelta = timedelta(days=3),
+        espera_desconhecida: timedelta = timedelta(minutes=10),
+        intervalo_pendentes: float = 5.0,
+        session_factory: Callable[[], Session] = SessionLocal,
+        buscar: Callable[[str], Optional[datetime]] = _buscar_inicio,
+    ):
+        self.intervalo = intervalo
+        self.fechamento = fechamento
+        self.retencao = retencao
+        self.espera_desconhecida = espera_desconhecida
+        self.intervalo_pendentes = intervalo_pendentes
+        self._session_factory = session_factory
+        self._buscar = buscar
+
+        self._inicios: Dict[str, datetime] = {}
+        # partida_id -> até quando a resposta "não existe" vale
+        self._desconhecidas: Dict[str, datetime] = {}
+        # ids pedidos no caminho de escrita, à espera do lookup em background
+        self._pendentes: Set[str] = set()
+        self._lock = threading.Lock()
+        self._tarefa: Optional[asyncio.Task] = None
+
+        self.atualizado_em: Optional[datetime] = None
+        self.falhas_seguidas = 0
+
+    # -------------------- leitura (caminho de escrita dos palpites) --------------------
+
+    def inicio(self, partida_id) -> Optional[datetime]:
+        return self._inicios.get(str(partida_id))
+
+    def aceita_palpite(self, partida_id, agora: Optional[datetime] = None) -> bool:
+        """
+        False se a partida já passou do horário de fechamento ou se o
+        início dela ainda não é conhecido: na dúvida, fecha. Só lê memória;
+        a partida desconhecida vai para a fila do lookup em background.
+        """
+        agora = agora or datetime.utcnow()
+        inicio = self.inicio(partida_id)
+        if inicio is None:
+            self._enfileirar(str(partida_id), agora)
+            return False
+        return agora < inicio - self.fechamento
+
+    def _enfileirar(self, partida_id: str, agora: datetime):
+        if self._desconhecidas.get(partida_id, agora) > agora:
+            return
+        with self._lock:
+            self._pendentes.add(partida_id)
+
+    def resolver_pendentes(self, agora: Optional[datetime] = None) -> int:
+        """Lookup por id das partidas enfileiradas; devolve quantas entraram no índice."""
+        with self._lock:
+            pendentes, self._pendentes = self._pendentes, set()
+
+        encontradas = 0
+        for partida_id in pendentes:
+            try:
+                inicio = self._buscar(partida_id)
+            except Exception:
+                # falha do upstream não é "não existe": volta para a fila
+                logger.exception("Falha ao buscar o início da partida %s", partida_id)
+                with self._lock:
+                    self._pendentes.add(partida_id)
+                continue
+
+            with self._lock:
+                if inicio is None:
+                    self._desconhecidas[partida_id] = (agora or datetime.utcnow()) + self.espera_desconhecida
+                else:
+                    self._desconhecidas.pop(partida_id, None)
+                    self._inicios = {**self._inicios, partida_id: inicio}
+                    encontradas += 1
+        return encontradas
+
+    # -------------------- atualização --------------------
+
+    def registrar(self, inicios: Iterable[Tuple[str, Optional[datetime]]], agora: Optional[datetime] = None):
+        agora = agora or datetime.utcnow()
+        limite = agora - self.retencao
+
+        with self._lock:
+            novos = {pid: inicio for pid, inicio in self._inicios.items() if inicio >= limite}
+            self._desconhecidas = {pid: ate for pid, ate in self._desconhecidas.items() if ate > agora}
+            for partida_id, inicio in inicios:
+                if inicio is not None:
+                    novos[str(partida_id)] = inicio
+            # troca o índice inteiro de uma vez — leitores nunca veem meio estado
+            self._inicios = novos
+
+    def carregar_agenda(self):
+        """Carga inicial a partir de `agenda_partidas` (gravada pelo worker de apuração)."""
+        db = self._session_factory()
+        try:
+            desde = datetime.utcnow() - self.retencao
+            rows = (
+                db.query(AgendaPartida.partida_id, AgendaPartida.inicio_em)
+                .filter(AgendaPartida.inicio_em >= desde)
+                .all()
+            )
+        finally:
+            db.close()
+        self.registrar(rows)
+
+    def atualizar(self):
+        partidas = []
+        for liga in ligas_monitoradas():
+            partidas += get_proximas_partidas_league(liga, limit=100)
+
+        self.registrar((p.id_partida, inicio_da_partida(p)) for p in partidas)
+        self.atualizado_em = datetime.utcnow()
+
+    # -------------------- background --------------------
+
+    async def _loop(self):
+        try:
+            await asyncio.to_thread(self.carregar_agenda)
+        except Exception:
+            logger.exception("Falha ao carregar a agenda persistida")
+
+        proxima_atualizacao = 0.0
+        while True:
+            if time.monotonic() >= proxima_atualizacao:
+                try:
+                    await asyncio.to_thread(self.atualizar)
+                    self.falhas_seguidas = 0
+                except Exception:
+                    self.falhas_seguidas += 1
+                    logger.exception("Falha ao atualizar os horários das partidas")
+                proxima_atualizacao = time.monotonic() + self.intervalo
+
+            if self._pendentes:
+                await asyncio.to_thread(self.resolver_pendentes)
+
+            await asyncio.sleep(self.intervalo_pendentes)
+
+    def start(self):
+        if self._tarefa is None or self._tarefa.done():
+            self._tarefa = asyncio.get_running_loop().create_task(self._loop())
+
+    async def stop(self):
+        if self._tarefa is None:
+            return
+
+        self._tarefa.cancel()
+        try:
+            await self._tarefa
+        except asyncio.CancelledError:
+            pass
+        self._tarefa = None
+
+    def stats(self) -> dict:
+        return {
+            "ativo": self._tarefa is not None and not self._tarefa.done(),
+            "atualizado_em": self.atualizado_em,
+            "partidas": len(self._inicios),
+            "desconhecidas": len(self._desconhecidas),
+            "pendentes": len(self._pendentes),
+            "falhas_seguidas": self.falhas_seguidas,
+        }
+
+
+inicio_partidas = InicioPartidas(
+    intervalo=settings.PARTIDAS_INICIOS_INTERVALO,
+    fechamento=timedelta(minutes=settings.PALPITES_FECHAMENTO_MIN),
+    espera_desconhecida=timedelta(seconds=settings.PARTIDAS_INICIOS_DESCONHECIDA_ESPERA),
+    intervalo_pendentes=settings.PARTIDAS_INICIOS_PENDENTES_INTERVALO,
+)
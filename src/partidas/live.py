@@ -0,0 +1,162 @@
+import asyncio
+import json
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional, Set
+
+from src.config import settings
+from src.partidas import async_repository
+from src.partidas.repository import _para_ao_vivo
+
+logger = logging.getLogger(__name__)
+
+TAMANHO_FILA_ASSINANTE = 100
+
+
+def formatar_sse(evento: str, dados) -> str:
+    return f"event: {evento}\ndata: {json.dumps(dados, default=str)}\n\n"
+
+
+def calcular_diff(anteriores: List[dict], atuais: List[dict]) -> List[dict]:
+    """
+    Compara dois retratos da mesma liga (por idEvent) e devolve só o que
+    mudou: jogo novo, placar/status alterado ou jogo que saiu do feed.
+    """
+    antes = {p["idEvent"]: p for p in anteriores}
+    depois = {p["idEvent"]: p for p in atuais}
+
+    diff = []
+    for id_evento, partida in depois.items():
+        anterior = antes.get(id_evento)
+        if anterior is None:
+            diff.append({"tipo": "novo", "partida": partida})
+        elif anterior["placar"] != partida["placar"] or anterior["status"] != partida["status"]:
+            diff.append({"tipo": "atualizado", "partida": partida})
+
+    for id_evento, partida in antes.items():
+        if id_evento not in depois:
+            diff.append({"tipo": "encerrado", "partida": partida})
+
+    return diff
+
+
+# ---------------------------------------------------
+# POLLER DO LIVESCORE (BACKGROUND)
+# ---------------------------------------------------
+
+
+class LivePoller:
+    """
+    Busca o feed global `livescore/soccer` em intervalo fixo e mantém
+    os jogos indexados por `idLeague` em memória.
+
+    A carga na TheSportsDB fica constante (uma chamada por intervalo),
+    independente de quantos torcedores consultam /partidas/ao-vivo.
+
+    A cada atualização o diff de cada liga é calculado uma única vez e
+    a mesma mensagem SSE é entregue a todos os assinantes da liga.
+    """
+
+    def __init__(self, intervalo: float):
+        self.intervalo = intervalo
+
+        self._por_liga: Dict[str, List[dict]] = {}
+        self._tarefa: Optional[asyncio.Task] = None
+        self._assinantes: Dict[str, Set[asyncio.Queue]] = {}
+
+        self.atualizado_em: Optional[datetime] = None
+        self.falhas_seguidas = 0
+
+    @property
+    def pronto(self) -> bool:
+        return self.atualizado_em is not None
+
+    def partidas(self, league_id) -> List[dict]:
+        return self._por_liga.get(str(league_id), [])
+
+    async def atualizar(self):
+        eventos = await async_repository.fetch_live_matches(forcar=True)
+
+        por_liga: Dict[str, List[dict]] = {}
+        for ev in eventos:
+            por_liga.setdefault(str(ev.get("idLeague")), []).append(_para_ao_vivo(ev))
+
+        # troca o índice inteiro de uma vez — leitores nunca veem meio estado
+        anterior = self._por_liga
+        self._por_liga = por_liga
+        self.atualizado_em = datetime.utcnow()
+
+        self._publicar_diffs(anterior, por_liga)
+
+    # -------------------- assinaturas (SSE) --------------------
+
+    def assinar(self, league_id) -> asyncio.Queue:
+        fila: asyncio.Queue = asyncio.Queue(maxsize=TAMANHO_FILA_ASSINANTE)
+        self._assinantes.setdefault(str(league_id), set()).add(fila)
+        return fila
+
+    def cancelar(self, league_id, fila: asyncio.Queue):
+        filas = self._assinantes.get(str(league_id))
+        if filas is None:
+            return
+        filas.discard(fila)
+        if not filas:
+            del self._assinantes[str(league_id)]
+
+    def _publicar_diffs(self, anterior: Dict[str, List[dict]], atual: Dict[str, List[dict]]):
+        for liga, filas in self._assinantes.items():
+            diff = calcular_diff(anterior.get(liga, []), atual.get(liga, []))
+            if not diff:
+                continue
+
+            mensagem = formatar_sse("diff", diff)
+            for fila in filas:
+                self._entregar(fila, liga, mensagem)
+
+    def _entregar(self, fila: asyncio.Queue, liga: str, mensagem: str):
+        try:
+            fila.put_nowait(mensagem)
+        except asyncio.QueueFull:
+            # assinante lento: descarta o acumulado e manda um retrato completo
+            while not fila.empty():
+                fila.get_nowait()
+            fila.put_nowait(formatar_sse("snapshot", self.partidas(liga)))
+
+    async def _loop(self):
+        while True:
+            try:
+                await self.atualizar()
+                self.falhas_seguidas = 0
+            except Exception:
+                self.falhas_seguidas += 1
+                logger.exception("Falha ao atualizar o livescore")
+
+            await asyncio.sleep(self.intervalo)
+
+    def start(self):
+        if self._tarefa is None or self._tarefa.done():
+            self._tarefa = asyncio.get_running_loop().create_task(self._loop())
+
+    async def stop(self):
+        if self._tarefa is None:
+            return
+
+        self._tarefa.cancel()
+        try:
+            await self._tarefa
+        except asyncio.CancelledError:
+            pass
+        self._tarefa = None
+
+    def stats(self) -> dict:
+        return {
+            "ativo": self._tarefa is not None and not self._tarefa.done(),
+            "atualizado_em": self.atualizado_em,
+            "ligas": len(self._por_liga),
+            "eventos": sum(len(v) for v in self._por_liga.values()),
+            "falhas_seguidas": self.falhas_seguidas,
+            "assinantes": sum(len(v) for v in self._assinantes.values()),
+        }
+
+
+live_poller = LivePoller(intervalo=settings.PARTIDAS_AO_VIVO_INTERVALO)
@@ -1,7 +1,11 @@
 from typing import List, Optional
-import requests
 
 from src.config import settings
+from src.partidas.breaker import protecao
+from src.partidas.cache import TTLCache
+from src.partidas.client import client
+from src.partidas.hedge import hedge_stats
+from src.partidas.snapshot import snapshots
 from src.partidas.schema import (
     ElencoResponse,
     Jogador,
@@ -16,27 +20,87 @@ from src.partidas.schema import (
 # CONFIGURAÇÃO DE BASES
 # ---------------------------------------------------
 
-V1_BASE_URL = "https://www.thesportsdb.com/api/v1/json"
-V2_BASE_URL = "https://www.thesportsdb.com/api/v2/json"
+# THESPORTSDB_BASE_URL permite apontar para um servidor local (ex.: fake de testes de carga);
+# a base V2 já vem resolvida e validada pelas settings
+V1_BASE_URL = settings.THESPORTSDB_BASE_URL
+V2_BASE_URL = settings.THESPORTSDB_V2_BASE_URL
 
 API_KEY = settings.THESPORTSDB_API_KEY
 
 
+# ---------------------------------------------------
+# CACHE DAS RESPOSTAS
+# ---------------------------------------------------
+
+# TTL (segundos) por prefixo de endpoint — o primeiro prefixo que casar vence
+CACHE_TTLS = [
+    ("livescore/", 15),
+    ("lookup/event/", 60),
+    ("schedule/", 300),
+    ("eventsnextleague.php", 300),
+    ("eventslast.php", 300),
+    ("lookuptable.php", 3600),
+    ("list/players/", 6 * 3600),
+    ("search_all_leagues.php", 24 * 3600),
+]
+CACHE_TTL_PADRAO = 60
+
+_cache = TTLCache(maxsize=settings.PARTIDAS_CACHE_MAXSIZE)
+
+
+def _ttl_para(endpoint: str) -> int:
+    endpoint = endpoint.lstrip("/")
+    for prefixo, ttl in CACHE_TTLS:
+        if endpoint.startswith(prefixo):
+            return ttl
+    return CACHE_TTL_PADRAO
+
+
+def _chave_cache(url: str, params: dict):
+    return url, tuple(sorted((k, str(v)) for k, v in params.items()))
+
+
 # ---------------------------------------------------
 # FUNÇÕES GENÉRICAS
 # ---------------------------------------------------
 
+
+def _requisitar(url: str, params: dict, headers: Optional[dict] = None, timeout: Optional[float] = None):
+    return client.get_json(url, params=params, headers=headers, read_timeout=timeout)
+
+
+def _url_v2(path: str) -> str:
+    return f"{V2_BASE_URL}/{path.lstrip('/')}"
+
+
+def _url_v1(endpoint: str) -> str:
+    return f"{V1_BASE_URL}/{API_KEY}/{endpoint}"
+
+
+def _headers_v2() -> dict:
+    return {"X-API-KEY": API_KEY}
+
+
+def _obter(endpoint: str, url: str, params: dict, headers: Optional[dict] = None):
+    """
+    Cache em memória -> snapshot em disco -> API (com stale se a API falhar).
+    A chamada à API passa pelo circuit breaker da família do endpoint.
+    """
+    chave = _chave_cache(url, params)
+    ttl = _ttl_para(endpoint)
+
+    def buscar():
+        return protecao.executar(endpoint, lambda timeout: _requisitar(url, params, headers, timeout))
+
+    return _cache.get_or_load(chave, ttl, lambda: snapshots.carregar(chave, ttl, buscar))
+
+
 def _get_v2(path: str, params: dict = None):
     """Chamada genérica da API V2 (requer header X-API-KEY)."""
     if params is None:
         params = {}
 
-    url = f"{V2_BASE_URL}/{path.lstrip('/')}"
-    headers = {"X-API-KEY": API_KEY}
-
-    resp = requests.get(url, params=params, headers=headers, timeout=15)
-    resp.raise_for_status()
-    return resp.json()
+    return _obter(path, _url_v2(path), params, _headers_v2())
 
 
 def _get_v1(endpoint: str, params: dict = None):
@@ -44,161 +108,217 @@ def _get_v1(endpoint: str, params: dict = None):
     if params is None:
         params = {}
 
-    url = f"{V1_BASE_URL}/{API_KEY}/{endpoint}"
-    resp = requests.get(url, params=params, timeout=15)
-    resp.raise_for_status()
-    return resp.json()
+    return _obter(endpoint, _url_v1(endpoint), params)
+
+
+# ---------------------------------------------------
+# CONVERSÕES (JSON da API -> schemas)
+# Compartilhadas com o repositório assíncrono.
+# ---------------------------------------------------
+
+def _placar(valor) -> Optional[int]:
+    return int(valor) if valor not in [None, ""] else None
+
+
+def _time_casa(ev: dict) -> TimeInfo:
+    return TimeInfo(
+        id=str(ev.get("idHomeTeam")),
+        nome=ev.get("strHomeTeam"),
+        escudo=ev.get("strHomeTeamBadge"),
+    )
+
+
+def _time_fora(ev: dict) -> TimeInfo:
+    return TimeInfo(
+        id=str(ev.get("idAwayTeam")),
+        nome=ev.get("strAwayTeam"),
+        escudo=ev.get("strAwayTeamBadge"),
+    )
+
+
+def _para_liga(lg: dict) -> Liga:
+    return Liga(
+        id=str(lg.get("idLeague")),
+        nome=lg.get("strLeague"),
+        pais=lg.get("strCountry"),
+        tipo=lg.get("strSport"),
+        logo=lg.get("strBadge"),
+    )
+
+
+def _para_partida_proxima(ev: dict) -> PartidaProxima:
+    return PartidaProxima(
+        id_partida=str(ev.get("idEvent")),
+        liga_id=str(ev.get("idLeague")),
+        liga_nome=ev.get("strLeague"),
+        rodada=ev.get("intRound"),
+        data=ev.get("dateEvent"),
+        horario=ev.get("strTime"),
+        estadio=ev.get("strVenue"),
+        status=ev.get("strStatus"),
+        time_casa=_time_casa(ev),
+        time_fora=_time_fora(ev),
+    )
+
+
+def _para_partida_resultado(ev: dict) -> PartidaResultado:
+    return PartidaResultado(
+        id_partida=str(ev.get("idEvent")),
+        liga_id=str(ev.get("idLeague")),
+        liga_nome=ev.get("strLeague"),
+        rodada=ev.get("intRound"),
+        data=ev.get("dateEvent"),
+        horario=ev.get("strTime"),
+        estadio=ev.get("strVenue"),
+        status=ev.get("strStatus"),
+        time_casa=_time_casa(ev),
+        time_fora=_time_fora(ev),
+        placar_casa=_placar(ev.get("intHomeScore")),
+        placar_fora=_placar(ev.get("intAwayScore")),
+    )
+
+
+def _para_tabela_time(row: dict) -> TabelaTime:
+    return TabelaTime(
+        posicao=int(row.get("intRank") or 0),
+        time_id=str(row.get("idTeam")),
+        time_nome=row.get("strTeam"),
+        escudo=row.get("strTeamBadge"),
+        pontos=int(row.get("intPoints") or 0),
+        jogos=int(row.get("intPlayed") or 0),
+        vitorias=int(row.get("intWin") or 0),
+        empates=int(row.get("intDraw") or 0),
+        derrotas=int(row.get("intLoss") or 0),
+        gols_pro=int(row.get("intGoalsFor") or 0),
+        gols_contra=int(row.get("intGoalsAgainst") or 0),
+        saldo=int(row.get("intGoalDifference") or 0),
+    )
+
+
+def _para_elenco(team_id: str, players: list) -> ElencoResponse:
+    time_info = TimeInfo(
+        id=team_id,
+        nome=players[0].get("strTeam") if players else "",
+        escudo=players[0].get("strTeamBadge") if players else None,
+    )
+
+    return ElencoResponse(
+        time=time_info,
+        jogadores=[
+            Jogador(
+                id=str(p.get("idPlayer")),
+                nome=p.get("strPlayer"),
+                posicao=p.get("strPosition"),
+                numero=int(p["strNumber"]) if p.get("strNumber") and str(p["strNumber"]).isdigit() else None,
+                nacionalidade=p.get("strNationality"),
+                foto=p.get("strCutout") or p.get("strThumb"),
+            )
+            for p in players
+        ],
+    )
+
+
+def _para_ao_vivo(ev: dict) -> dict:
+    return {
+        "idEvent": ev.get("idEvent"),
+        "liga": ev.get("strLeague"),
+        "time_casa": ev.get("strHomeTeam"),
+        "time_fora": ev.get("strAwayTeam"),
+        "placar": f"{ev.get('intHomeScore')} - {ev.get('intAwayScore')}",
+        "status": ev.get("strStatus"),
+        "escudo_casa": ev.get("strHomeTeamBadge"),
+        "escudo_fora": ev.get("strAwayTeamBadge"),
+    }
+
+
+def _eventos_ao_vivo(data: dict) -> list:
+    return data.get("events") or data.get("livescore") or []
+
+
+def _eventos_lookup(data: dict) -> list:
+    return data.get("lookup") or data.get("events") or []
 
 
 # ---------------------------------------------------
 # LIGAS (V1)
 # ---------------------------------------------------
 
-def get_ligas_por_pais(pais: str) -> List[Liga]:
-    url = f"https://www.thesportsdb.com/api/v1/json/{API_KEY}/search_all_leagues.php"
 
-    resp = requests.get(url, params={"c": pais, "s": "Soccer"}, timeout=15)
-    resp.raise_for_status()
+def get_ligas_por_pais(pais: str) -> List[Liga]:
+    data = _get_v1("search_all_leagues.php", {"c": pais, "s": "Soccer"})
 
-    leagues = resp.json().get("countries") or []
+    leagues = data.get("countries") or []
 
-    return [
-        Liga(
-            id=str(lg.get("idLeague")),
-            nome=lg.get("strLeague"),
-            pais=lg.get("strCountry"),
-            tipo=lg.get("strSport"),
-            logo=lg.get("strBadge"),
-        )
-        for lg in leagues
-    ]
+    return [_para_liga(lg) for lg in leagues]
 
 
 # ---------------------------------------------------
 # PRÓXIMAS PARTIDAS (V2 + fallback V1)
 # ---------------------------------------------------
 
-def get_proximas_partidas_league(league_id: str) -> List[PartidaProxima]:
-    # 1 — tenta API V2
-    try:
-        data_v2 = _get_v2(f"schedule/next/league/{league_id}")
-        events = data_v2.get("events") or []
-    except Exception:
-        events = []
-
-    # 2 — fallback V1
-    if not events:
+
+def _primeira_com_eventos(recurso: str, league_id: str, fontes: dict) -> list:
+    """
+    Caminho sequencial: tenta as versões na ordem aprendida pelo hedge
+    (V2 primeiro por padrão) e para na primeira que devolver eventos.
+    """
+    for versao in hedge_stats.ordem(recurso, league_id):
         try:
-            data_v1 = _get_v1("eventsnextleague.php", {"id": league_id})
-            events = data_v1.get("events") or []
+            events = fontes[versao]()
         except Exception:
             events = []
 
-    return [
-        PartidaProxima(
-            id_partida=str(ev.get("idEvent")),
-            liga_id=str(ev.get("idLeague")),
-            liga_nome=ev.get("strLeague"),
-            rodada=ev.get("intRound"),
-            data=ev.get("dateEvent"),
-            horario=ev.get("strTime"),
-            estadio=ev.get("strVenue"),
-            status=ev.get("strStatus"),
-            time_casa=TimeInfo(
-                id=str(ev.get("idHomeTeam")),
-                nome=ev.get("strHomeTeam"),
-                escudo=ev.get("strHomeTeamBadge"),
-            ),
-            time_fora=TimeInfo(
-                id=str(ev.get("idAwayTeam")),
-                nome=ev.get("strAwayTeam"),
-                escudo=ev.get("strAwayTeamBadge"),
-            ),
-        )
-        for ev in events
-    ]
+        if events:
+            return events
+
+    return []
+
+
+def _fontes_proximas(league_id: str) -> dict:
+    return {
+        "v2": lambda: _get_v2(f"schedule/next/league/{league_id}").get("events") or [],
+        "v1": lambda: _get_v1("eventsnextleague.php", {"id": league_id}).get("events") or [],
+    }
+
+
+def _fontes_resultados(league_id: str) -> dict:
+    def v1():
+        data_v1 = _get_v1("eventslast.php", {"id": league_id})
+        # eventslast.php — ESSENCIAL PARA O BRASILEIRÃO
+        return data_v1.get("results") or data_v1.get("events") or []
+
+    return {
+        "v2": lambda: _get_v2(f"schedule/previous/league/{league_id}").get("events") or [],
+        "v1": v1,
+    }
+
+
+def get_proximas_partidas_league(league_id: str) -> List[PartidaProxima]:
+    events = _primeira_com_eventos("proximas", league_id, _fontes_proximas(league_id))
+
+    return [_para_partida_proxima(ev) for ev in events]
 
 
 # ---------------------------------------------------
 # ÚLTIMOS RESULTADOS (V2 + Fallback V1)
 # ---------------------------------------------------
 
-def get_ultimos_resultados(league_id: str, limit: int = 10) -> List[PartidaResultado]:
-    events = []
-
-    # ------------------------------------
-    # 1 — Tenta API V2 (schedule/previous)
-    # ------------------------------------
-    try:
-        data_v2 = _get_v2(f"schedule/previous/league/{league_id}")
-        events = data_v2.get("events") or []
-    except Exception:
-        events = []
-
-    # ------------------------------------------------------------------
-    # 2 — Fallback V1 (eventslast.php) — ESSENCIAL PARA O BRASILEIRÃO
-    # ------------------------------------------------------------------
-    if not events:
-        try:
-            data_v1 = _get_v1("eventslast.php", {"id": league_id})
-            events = (
-                data_v1.get("results")
-                or data_v1.get("events")
-                or []
-            )
-        except Exception:
-            events = []
 
-    # Limita quantidade
-    events = events[:limit]
-
-    resultados = []
-
-    # Conversão para PartidaResultado
-    for ev in events:
-        resultados.append(
-            PartidaResultado(
-                id_partida=str(ev.get("idEvent")),
-                liga_id=str(ev.get("idLeague")),
-                liga_nome=ev.get("strLeague"),
-                rodada=ev.get("intRound"),
-                data=ev.get("dateEvent"),
-                horario=ev.get("strTime"),
-                estadio=ev.get("strVenue"),
-                status=ev.get("strStatus"),
-
-                time_casa=TimeInfo(
-                    id=str(ev.get("idHomeTeam")),
-                    nome=ev.get("strHomeTeam"),
-                    escudo=ev.get("strHomeTeamBadge"),
-                ),
-
-                time_fora=TimeInfo(
-                    id=str(ev.get("idAwayTeam")),
-                    nome=ev.get("strAwayTeam"),
-                    escudo=ev.get("strAwayTeamBadge"),
-                ),
-
-                placar_casa=int(ev.get("intHomeScore"))
-                if ev.get("intHomeScore") not in [None, ""]
-                else None,
-
-                placar_fora=int(ev.get("intAwayScore"))
-                if ev.get("intAwayScore") not in [None, ""]
-                else None,
-            )
-        )
+def get_ultimos_resultados(league_id: str, limit: Optional[int] = 10) -> List[PartidaResultado]:
+    events = _primeira_com_eventos("resultados", league_id, _fontes_resultados(league_id))
 
-    return resultados
+    # Limita quantidade e converte para PartidaResultado
+    return [_para_partida_resultado(ev) for ev in events[:limit]]
 
 
 # ---------------------------------------------------
 # PARTIDAS AO VIVO (V2)
 # ---------------------------------------------------
 
+
 def fetch_live_matches():
     data = _get_v2("livescore/soccer")
-    return data.get("events") or data.get("livescore") or []
+    return _eventos_ao_vivo(data)
 
 
 def get_partidas_ao_vivo():
@@ -209,58 +329,25 @@ def get_partidas_ao_vivo():
 # TABELA DO CAMPEONATO (V1)
 # ---------------------------------------------------
 
+
 def get_tabela(league_id: str, season: Optional[str]):
     params = {"l": league_id, "s": season}
     data = _get_v1("lookuptable.php", params)
     table = data.get("table") or []
 
-    return [
-        TabelaTime(
-            posicao=int(row.get("intRank") or 0),
-            time_id=str(row.get("idTeam")),
-            time_nome=row.get("strTeam"),
-            escudo=row.get("strTeamBadge"),
-            pontos=int(row.get("intPoints") or 0),
-            jogos=int(row.get("intPlayed") or 0),
-            vitorias=int(row.get("intWin") or 0),
-            empates=int(row.get("intDraw") or 0),
-            derrotas=int(row.get("intLoss") or 0),
-            gols_pro=int(row.get("intGoalsFor") or 0),
-            gols_contra=int(row.get("intGoalsAgainst") or 0),
-            saldo=int(row.get("intGoalDifference") or 0),
-        )
-        for row in table
-    ]
+    return [_para_tabela_time(row) for row in table]
 
 
 # ---------------------------------------------------
 # ELENCO (V2)
 # ---------------------------------------------------
 
+
 def get_elenco_time(team_id: str) -> ElencoResponse:
     data = _get_v2(f"list/players/{team_id}")
     players = data.get("players") or []
 
-    time_info = TimeInfo(
-        id=team_id,
-        nome=players[0].get("strTeam") if players else "",
-        escudo=players[0].get("strTeamBadge") if players else None,
-    )
-
-    return ElencoResponse(
-        time=time_info,
-        jogadores=[
-            Jogador(
-                id=str(p.get("idPlayer")),
-                nome=p.get("strPlayer"),
-                posicao=p.get("strPosition"),
-                numero=int(p["strNumber"]) if p.get("strNumber") and str(p["strNumber"]).isdigit() else None,
-                nacionalidade=p.get("strNationality"),
-                foto=p.get("strCutout") or p.get("strThumb"),
-            )
-            for p in players
-        ],
-    )
+    return _para_elenco(team_id, players)
 
 
 # ---------------------------------------------------
@@ -269,32 +356,9 @@ def get_elenco_time(team_id: str) -> ElencoResponse:
 
 def get_partida_por_id(event_id: str):
     data = _get_v2(f"lookup/event/{event_id}")
-    events = data.get("lookup") or data.get("events") or []
+    events = _eventos_lookup(data)
 
     if not events:
         return None
 
-    ev = events[0]
-
-    return PartidaResultado(
-        id_partida=str(ev.get("idEvent")),
-        liga_id=str(ev.get("idLeague")),
-        liga_nome=ev.get("strLeague"),
-        rodada=ev.get("intRound"),
-        data=ev.get("dateEvent"),
-        horario=ev.get("strTime"),
-        estadio=ev.get("strVenue"),
-        status=ev.get("strStatus"),
-        time_casa=TimeInfo(
-            id=str(ev.get("idHomeTeam")),
-            nome=ev.get("strHomeTeam"),
-            escudo=ev.get("strHomeTeamBadge"),
-        ),
-        time_fora=TimeInfo(
-            id=str(ev.get("idAwayTeam")),
-            nome=ev.get("strAwayTeam"),
-            escudo=ev.get("strAwayTeamBadge"),
-        ),
-        placar_casa=int(ev.get("intHomeScore")) if ev.get("intHomeScore") not in [None, ""] else None,
-        placar_fora=int(ev.get("intAwayScore")) if ev.get("intAwayScore") not in [None, ""] else None,
-    )
+    return _para_partida_resultado(events[0])
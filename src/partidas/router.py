@@ -1,6 +1,7 @@
 from typing import List, Optional
 
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, Query, Request
+from fastapi.responses import StreamingResponse
 
 from src.partidas import service
 from src.partidas.schema import (
@@ -16,41 +17,57 @@ router = APIRouter(prefix="/partidas", tags=["Partidas"])
 
 # -------------------- LIGAS --------------------
 @router.get("/ligas", response_model=List[Liga])
-def listar_ligas(pais: str = Query(...)):
-    return service.get_ligas_por_pais(pais)
+async def listar_ligas(pais: str = Query(...)):
+    return await service.get_ligas_por_pais_async(pais)
 
 
 # -------------------- PRÓXIMAS PARTIDAS --------------------
 @router.get("/proximas", response_model=List[PartidaProxima])
-def proximas_partidas(league_id: Optional[str] = None, limit: int = 10):
-    return service.get_proximas_partidas_league(league_id)
+async def proximas_partidas(league_id: Optional[str] = None, limit: int = 10):
+    return await service.get_proximas_partidas_league_async(league_id)
 
 
 # -------------------- ÚLTIMOS RESULTADOS --------------------
 @router.get("/ultimos-resultados", response_model=List[PartidaResultado])
-def ultimos_resultados(league_id: Optional[str] = None, limit: int = 10):
-    return service.get_ultimos_resultados(league_id, limit)
+async def ultimos_resultados(league_id: Optional[str] = None, limit: int = 10):
+    return await service.get_ultimos_resultados_async(league_id, limit)
 
 
 # -------------------- TABELA --------------------
 @router.get("/tabela", response_model=List[TabelaTime])
-def tabela(league_id: Optional[str] = None, season: Optional[str] = None):
-    return service.get_tabela(league_id, season)
+async def tabela(league_id: Optional[str] = None, season: Optional[str] = None):
+    return await service.get_tabela_async(league_id, season)
 
 
 # -------------------- ELENCO --------------------
 @router.get("/elenco/{team_id}", response_model=ElencoResponse)
-def elenco(team_id: str):
-    return service.get_elenco_time(team_id)
+async def elenco(team_id: str):
+    return await service.get_elenco_time_async(team_id)
 
 
 # -------------------- AO VIVO --------------------
 @router.get("/ao-vivo")
-def ao_vivo():
-    return service.get_partidas_ao_vivo()
+async def ao_vivo(league_id: Optional[str] = None):
+    return await service.get_partidas_ao_vivo_async(league_id)
+
+
+@router.get("/ao-vivo/stream")
+async def ao_vivo_stream(request: Request, league_id: Optional[str] = None):
+    """Server-Sent Events: snapshot inicial + diffs de placar/status."""
+    return StreamingResponse(
+        service.stream_ao_vivo(league_id, request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 # -------------------- PARTIDA POR ID --------------------
 @router.get("/resultado/{event_id}", response_model=Optional[PartidaResultado])
-def resultado_partida(event_id: str):
-    return service.get_partida_por_id(event_id)
+async def resultado_partida(event_id: str):
+    return await service.obter_resultado_partida_por_id_async(event_id)
+
+
+# -------------------- MÉTRICAS --------------------
+@router.get("/metricas")
+def metricas():
+    return service.obter_metricas()
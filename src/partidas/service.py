@@ -1,8 +1,14 @@
-from typing import List, Optional
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional
 
 from src.config import settings
-from src.partidas import repository
-from src.partidas.repository import fetch_live_matches, get_partida_por_id
+from src.partidas import async_repository, repository
+from src.partidas.breaker import protecao
+from src.partidas.hedge import hedge_stats
+from src.partidas.live import formatar_sse, live_poller
+from src.partidas.repository import _para_ao_vivo, fetch_live_matches, get_partida_por_id
 from src.partidas.schema import (
     ElencoResponse,
     Liga,
@@ -10,6 +16,7 @@ from src.partidas.schema import (
     PartidaResultado,
     TabelaTime,
 )
+from src.partidas.snapshot import snapshots
 
 DEFAULT_LEAGUE_ID = settings.THESPORTSDB_DEFAULT_LEAGUE_ID
 DEFAULT_SEASON = settings.THESPORTSDB_DEFAULT_SEASON
@@ -82,40 +89,220 @@ def get_elenco_time(team_id: str) -> ElencoResponse:
 # ---------------------------------------------------
 
 
+def _filtrar_ao_vivo(eventos: list, league_id: Optional[str]) -> list:
+    lid = str(league_id or DEFAULT_LEAGUE_ID)
+
+    # Filtrar pela liga correta
+    return [_para_ao_vivo(ev) for ev in eventos if str(ev.get("idLeague")) == lid]
+
+
 def get_partidas_ao_vivo(league_id: Optional[str] = None):
     """
     Retorna somente jogos ao vivo da liga desejada.
     """
-    lid = str(league_id or DEFAULT_LEAGUE_ID)
+    return _filtrar_ao_vivo(fetch_live_matches(), league_id)
+
+
+# ---------------------------------------------------
+# PARTIDA POR ID
+# ---------------------------------------------------
+
+
+def obter_resultado_partida_por_id(event_id: str) -> Optional[PartidaResultado]:
+    return get_partida_por_id(event_id)
+
+
+# ---------------------------------------------------
+# RESULTADOS EM LOTE (APURAÇÃO DE PALPITES)
+# ---------------------------------------------------
+
+
+def ligas_monitoradas() -> List[str]:
+    ligas = [lg.strip() for lg in settings.PARTIDAS_RESOLVER_LIGAS.split(",") if lg.strip()]
+    return ligas or [str(DEFAULT_LEAGUE_ID)]
+
 
-    eventos = fetch_live_matches()
-    partidas = []
+def inicio_da_partida(partida) -> Optional[datetime]:
+    """dateEvent + strTime (UTC na TheSportsDB) -> datetime sem tz, em UTC."""
+    if not partida.data:
+        return None
 
-    for ev in eventos:
-        # Filtrar pela liga correta
-        if str(ev.get("idLeague")) != lid:
+    horario = (partida.horario or "00:00:00")[:8]
+    for formato in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M"):
+        try:
+            return datetime.strptime(f"{partida.data} {horario}", formato)
+        except ValueError:
             continue
 
-        partidas.append(
-            {
-                "idEvent": ev.get("idEvent"),
-                "liga": ev.get("strLeague"),
-                "time_casa": ev.get("strHomeTeam"),
-                "time_fora": ev.get("strAwayTeam"),
-                "placar": f"{ev.get('intHomeScore')} - {ev.get('intAwayScore')}",
-                "status": ev.get("strStatus"),
-                "escudo_casa": ev.get("strHomeTeamBadge"),
-                "escudo_fora": ev.get("strAwayTeamBadge"),
-            }
-        )
+    try:
+        return datetime.strptime(partida.data, "%Y-%m-%d")
+    except ValueError:
+        return None
 
-    return partidas
+
+def _finalizada(resultado: Optional[PartidaResultado]) -> bool:
+    return resultado is not None and resultado.placar_casa is not None and resultado.placar_fora is not None
+
+
+def _buscar_resultado(event_id: str) -> Optional[PartidaResultado]:
+    try:
+        return get_partida_por_id(event_id)
+    except Exception:
+        return None
+
+
+def resolver_resultados(
+    event_ids: Iterable[str],
+    ligas: Optional[List[str]] = None,
+    concorrencia: Optional[int] = None,
+) -> Dict[str, PartidaResultado]:
+    """
+    Resolve o placar final de vários eventos de uma vez.
+
+    1. busca os últimos resultados de cada liga (uma chamada por liga) e
+       indexa por idEvent;
+    2. só os eventos que não apareceram em nenhum feed vão para o lookup
+       individual, com no máximo `concorrencia` chamadas simultâneas.
+
+    Retorna apenas as partidas finalizadas (com placar), por idEvent.
+    """
+    pendentes = {str(e) for e in event_ids}
+    if not pendentes:
+        return {}
+
+    resolvidos: Dict[str, PartidaResultado] = {}
+    vistos = set()
+
+    for liga in ligas or ligas_monitoradas():
+        for resultado in repository.get_ultimos_resultados(liga, limit=None):
+            if resultado.id_partida not in pendentes:
+                continue
+            vistos.add(resultado.id_partida)
+            if _finalizada(resultado):
+                resolvidos[resultado.id_partida] = resultado
+
+    faltantes = sorted(pendentes - vistos)
+    for event_id, resultado in buscar_partidas(faltantes, concorrencia).items():
+        if _finalizada(resultado):
+            resolvidos[event_id] = resultado
+
+    return resolvidos
+
+
+def buscar_partidas(event_ids: List[str], concorrencia: Optional[int] = None) -> Dict[str, PartidaResultado]:
+    """
+    Lookup individual de vários eventos com no máximo `concorrencia`
+    chamadas simultâneas. Eventos não encontrados (ou com erro) ficam
+    de fora do retorno.
+    """
+    if not event_ids:
+        return {}
+
+    encontrados: Dict[str, PartidaResultado] = {}
+    workers = min(concorrencia or settings.PARTIDAS_RESOLVER_CONCORRENCIA, len(event_ids))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for event_id, resultado in zip(event_ids, pool.map(_buscar_resultado, event_ids)):
+            if resultado is not None:
+                encontrados[event_id] = resultado
+
+    return encontrados
 
 
 # ---------------------------------------------------
-# PARTIDA POR ID
+# MÉTRICAS DA INTEGRAÇÃO COM A THESPORTSDB
 # ---------------------------------------------------
 
 
-def obter_resultado_partida_por_id(event_id: str) -> Optional[PartidaResultado]:
-    return get_partida_por_id(event_id)
+def obter_metricas() -> dict:
+    return {
+        "cache": repository._cache.stats(),
+        "hedge": hedge_stats.stats(),
+        "ao_vivo": live_poller.stats(),
+        "snapshots": snapshots.stats(),
+        "upstream": protecao.stats(),
+    }
+
+
+# ---------------------------------------------------
+# VERSÕES ASSÍNCRONAS (usadas pelas rotas async def)
+# ---------------------------------------------------
+
+
+async def get_ligas_por_pais_async(pais: str) -> List[Liga]:
+    return await async_repository.get_ligas_por_pais(pais)
+
+
+async def get_proximas_partidas_league_async(
+    league_id: Optional[str] = None,
+    limit: int = 10,
+) -> List[PartidaProxima]:
+    lid = league_id or DEFAULT_LEAGUE_ID
+    partidas = await async_repository.get_proximas_partidas_league(lid)
+    return partidas[:limit]
+
+
+async def get_ultimos_resultados_async(
+    league_id: Optional[str] = None,
+    limit: int = 10,
+) -> List[PartidaResultado]:
+    lid = league_id or DEFAULT_LEAGUE_ID
+    return await async_repository.get_ultimos_resultados(lid, limit)
+
+
+async def get_tabela_async(
+    league_id: Optional[str] = None,
+    season: Optional[str] = None,
+) -> List[TabelaTime]:
+    lid = league_id or DEFAULT_LEAGUE_ID
+    temporada = season or DEFAULT_SEASON
+    return await async_repository.get_tabela(lid, temporada)
+
+
+async def get_elenco_time_async(team_id: str) -> ElencoResponse:
+    return await async_repository.get_elenco_time(team_id)
+
+
+async def get_partidas_ao_vivo_async(league_id: Optional[str] = None):
+    """
+    Lê do índice em memória mantido pelo poller (leitura O(1) por liga).
+    Enquanto o poller não tiver a primeira leitura, busca direto na API.
+    """
+    if live_poller.pronto:
+        return live_poller.partidas(league_id or DEFAULT_LEAGUE_ID)
+
+    eventos = await async_repository.fetch_live_matches()
+    return _filtrar_ao_vivo(eventos, league_id)
+
+
+async def stream_ao_vivo(
+    league_id: Optional[str],
+    desconectado: Callable[[], Awaitable[bool]],
+    keep_alive: float = 15.0,
+) -> AsyncIterator[str]:
+    """
+    Stream SSE de uma liga: um `snapshot` inicial e depois só os diffs
+    publicados pelo poller a cada mudança de placar/status.
+    """
+    lid = str(league_id or DEFAULT_LEAGUE_ID)
+    fila = live_poller.assinar(lid)
+
+    try:
+        if live_poller.pronto:
+            atuais = live_poller.partidas(lid)
+        else:
+            atuais = await get_partidas_ao_vivo_async(lid)
+        yield formatar_sse("snapshot", atuais)
+
+        while True:
+            try:
+                yield await asyncio.wait_for(fila.get(), timeout=keep_alive)
+            except asyncio.TimeoutError:
+                if await desconectado():
+                    break
+                yield ": keep-alive\n\n"
+    finally:
+        live_poller.cancelar(lid, fila)
+
+
+async def obter_resultado_partida_por_id_async(event_id: str) -> Optional[PartidaResultado]:
+    return await async_repository.get_partida_por_id(event_id)
@@ -0,0 +1,179 @@
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Hashable, NamedTuple, Optional
+
+from src.config import settings
+from src.partidas.cache import ValorComTTL
+
+RAIZ_DO_PROJETO = Path(__file__).resolve().parents[2]
+
+# ---------------------------------------------------
+# SNAPSHOTS EM DISCO DAS RESPOSTAS DA THESPORTSDB
+# ---------------------------------------------------
+
+
+class Snapshot(NamedTuple):
+    salvo_em: float
+    payload: Any
+
+    @property
+    def idade(self) -> float:
+        return time.time() - self.salvo_em
+
+
+class SnapshotStore:
+    """
+    Tabela SQLite local (um arquivo, fora do banco da aplicação) com a
+    última resposta bem-sucedida de cada endpoint+params.
+
+    - toda busca bem-sucedida é gravada (write-through);
+    - um worker recém-iniciado usa o snapshot se ainda estiver no TTL,
+      sem ir à API;
+    - se a API falhar ou estourar o timeout, o snapshot vencido é servido
+      (até `max_idade`) em vez de lista vazia ou erro 500.
+
+    O arquivo usa WAL, então vários processos podem compartilhá-lo.
+    """
+
+    def __init__(self, caminho: str, max_idade: float, ttl_stale: float):
+        self.caminho = caminho
+        self.max_idade = max_idade
+        self.ttl_stale = ttl_stale
+
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+        self.servidos_do_disco = 0
+        self.servidos_stale = 0
+
+    @classmethod
+    def from_settings(cls) -> "SnapshotStore":
+        caminho = settings.PARTIDAS_SNAPSHOT_PATH
+        if caminho and not Path(caminho).is_absolute():
+            # o mesmo arquivo para todos os workers, de onde quer que o processo suba
+            caminho = str(RAIZ_DO_PROJETO / caminho)
+        return cls(
+            caminho=caminho,
+            max_idade=settings.PARTIDAS_SNAPSHOT_MAX_IDADE,
+            ttl_stale=settings.PARTIDAS_SNAPSHOT_TTL_STALE,
+        )
+
+    @property
+    def ativo(self) -> bool:
+        return bool(self.caminho)
+
+    def _conexao(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.caminho, check_same_thread=False, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS snapshots ("
+                " chave TEXT PRIMARY KEY,"
+                " salvo_em REAL NOT NULL,"
+                " payload TEXT NOT NULL)"
+            )
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def _serializar_chave(chave: Hashable) -> str:
+        return json.dumps(chave, sort_keys=True)
+
+    def get(self, chave: Hashable) -> Optional[Snapshot]:
+        if not self.ativo:
+            return None
+
+        with self._lock:
+            row = (
+                self._conexao()
+                .execute("SELECT salvo_em, payload FROM snapshots WHERE chave = ?", (self._serializar_chave(chave),))
+                .fetchone()
+            )
+
+        if row is None:
+            return None
+        return Snapshot(salvo_em=row[0], payload=json.loads(row[1]))
+
+    def put(self, chave: Hashable, payload: Any):
+        if not self.ativo:
+            return
+
+        with self._lock:
+            conn = self._conexao()
+            conn.execute(
+                "INSERT OR REPLACE INTO snapshots (chave, salvo_em, payload) VALUES (?, ?, ?)",
+                (self._serializar_chave(chave), time.time(), json.dumps(payload)),
+            )
+            conn.commit()
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    # -------------------- política de leitura --------------------
+
+    def _fresco(self, snap: Optional[Snapshot], ttl: float) -> Optional[ValorComTTL]:
+        if snap is not None and snap.idade < ttl:
+            self.servidos_do_disco += 1
+            return ValorComTTL(snap.payload, ttl - snap.idade)
+        return None
+
+    def _stale(self, snap: Optional[Snapshot]) -> Optional[ValorComTTL]:
+        if snap is not None and snap.idade < self.max_idade:
+            self.servidos_stale += 1
+            return ValorComTTL(snap.payload, self.ttl_stale)
+        return None
+
+    def carregar(self, chave: Hashable, ttl: float, buscar: Callable[[], Any], forcar: bool = False):
+        """Loader para `TTLCache.get_or_load` (caminho síncrono)."""
+        snap = self.get(chave)
+
+        fresco = None if forcar else self._fresco(snap, ttl)
+        if fresco is not None:
+            return fresco
+
+        try:
+            payload = buscar()
+        except Exception:
+            stale = self._stale(snap)
+            if stale is None:
+                raise
+            return stale
+
+        self.put(chave, payload)
+        return payload
+
+    async def acarregar(self, chave: Hashable, ttl: float, buscar: Callable[[], Awaitable[Any]], forcar: bool = False):
+        """Loader para `TTLCache.aget_or_load`; o SQLite roda fora do event loop."""
+        snap = await asyncio.to_thread(self.get, chave)
+
+        fresco = None if forcar else self._fresco(snap, ttl)
+        if fresco is not None:
+            return fresco
+
+        try:
+            payload = await buscar()
+        except Exception:
+            stale = self._stale(snap)
+            if stale is None:
+                raise
+            return stale
+
+        await asyncio.to_thread(self.put, chave, payload)
+        return payload
+
+    def stats(self) -> dict:
+        return {
+            "ativo": self.ativo,
+            "servidos_do_disco": self.servidos_do_disco,
+            "servidos_stale": self.servidos_stale,
+        }
+
+
+snapshots = SnapshotStore.from_settings()
@@ -1,19 +1,78 @@
-from sqlalchemy import Boolean, Column, DateTime, Integer, String
-from sqlalchemy.sql import func
+from sqlalchemy import Column, Date, Index, Integer, String
 
 from src.db.session import Base
 
 
-class Palpite(Base):
-    __tablename__ = "palpites"
+# -----------------------------
+# CLASSIFICAÇÃO MATERIALIZADA
+# -----------------------------
+class ClassificacaoRanking(Base):
+    """
+    Uma linha por (período, usuário) com os totais do ranking, mantida de
+    forma incremental: criação de palpite soma em `palpites`, apuração soma
+    em `acertos` e toda mudança de moedas ressincroniza `pontos`.
 
-    id = Column(Integer, primary_key=True, index=True)
-    usuario_id = Column(Integer, nullable=False)
-    partida_id = Column(String, nullable=False)
-    palpite = Column(String, nullable=False)
+    `tipo` é geral | mensal | semanal e `inicio` o primeiro dia do período
+    (fixo em 1970-01-01 no geral). Ler um ranking vira uma varredura do
+    índice (tipo, inicio, pontos).
+    """
 
-    acertou = Column(Boolean, nullable=True)
-    processado = Column(Boolean, default=False)
+    __tablename__ = "ranking_classificacao"
 
-    # NECESSÁRIO PARA O RANKING
-    created_at = Column(DateTime, server_default=func.now())
+    tipo = Column(String, primary_key=True)
+    inicio = Column(Date, primary_key=True)
+    usuario_id = Column(Integer, primary_key=True)
+
+    pontos = Column(Integer, nullable=False, default=0)
+    acertos = Column(Integer, nullable=False, default=0)
+    palpites = Column(Integer, nullable=False, default=0)
+
+
+# Top-N de um período: ORDER BY pontos DESC, usuario_id sai direto do índice.
+Index(
+    "ix_ranking_classificacao_pontos",
+    ClassificacaoRanking.tipo,
+    ClassificacaoRanking.inicio,
+    ClassificacaoRanking.pontos.desc(),
+    ClassificacaoRanking.usuario_id,
+)
+
+# Ressincronização de pontos quando as moedas do usuário mudam.
+Index("ix_ranking_classificacao_usuario", ClassificacaoRanking.usuario_id)
+
+
+# -----------------------------
+# CLASSIFICAÇÃO POR ESCOPO
+# -----------------------------
+class ClassificacaoEscopo(Base):
+    """
+    As mesmas linhas de ClassificacaoRanking, replicadas por escopo: a
+    torcida de um time (`time:<time_do_coracao>`) ou um grupo privado
+    (`grupo:<id>`). Mantida junto com a global, então o ranking de um
+    escopo lê só as linhas dele, sem passar pelos demais usuários.
+    """
+
+    __tablename__ = "ranking_classificacao_escopo"
+
+    escopo = Column(String, primary_key=True)
+    tipo = Column(String, primary_key=True)
+    inicio = Column(Date, primary_key=True)
+    usuario_id = Column(Integer, primary_key=True)
+
+    pontos = Column(Integer, nullable=False, default=0)
+    acertos = Column(Integer, nullable=False, default=0)
+    palpites = Column(Integer, nullable=False, default=0)
+
+
+# Top-N de um escopo num período, direto do índice.
+Index(
+    "ix_ranking_escopo_pontos",
+    ClassificacaoEscopo.escopo,
+    ClassificacaoEscopo.tipo,
+    ClassificacaoEscopo.inicio,
+    ClassificacaoEscopo.pontos.desc(),
+    ClassificacaoEscopo.usuario_id,
+)
+
+# Ressincronização de pontos e saída de um escopo.
+Index("ix_ranking_escopo_usuario", ClassificacaoEscopo.usuario_id)
@@ -0,0 +1,67 @@
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Optional
+from zoneinfo import ZoneInfo
+
+from src.config import settings
+
+# ---------------------------------------------------
+# PERÍODOS DO RANKING
+# ---------------------------------------------------
+
+GERAL = "geral"
+MENSAL = "mensal"
+SEMANAL = "semanal"
+
+# o ranking geral é um período único que começa aqui
+INICIO_GERAL = date(1970, 1, 1)
+
+
+def _fuso() -> ZoneInfo:
+    return ZoneInfo(settings.RANKING_FUSO)
+
+
+def _para_local(momento: datetime) -> datetime:
+    # created_at é gravado sem tz, em UTC
+    if momento.tzinfo is None:
+        momento = momento.replace(tzinfo=timezone.utc)
+    return momento.astimezone(_fuso())
+
+
+def inicio_do_periodo(tipo: str, momento: datetime) -> date:
+    """Primeiro dia (no fuso do ranking) do período `tipo` que contém `momento`."""
+    dia = _para_local(momento).date()
+    if tipo == MENSAL:
+        return dia.replace(day=1)
+    if tipo == SEMANAL:
+        return dia - timedelta(days=(dia.weekday() - settings.RANKING_INICIO_SEMANA) % 7)
+    return INICIO_GERAL
+
+
+def fim_do_periodo(tipo: str, inicio: date) -> Optional[date]:
+    """Primeiro dia do período seguinte (exclusivo); None no geral."""
+    if tipo == MENSAL:
+        return (inicio.replace(day=28) + timedelta(days=4)).replace(day=1)
+    if tipo == SEMANAL:
+        return inicio + timedelta(days=7)
+    return None
+
+
+def _meia_noite_utc(dia: date) -> datetime:
+    local = datetime.combine(dia, time.min, tzinfo=_fuso())
+    return local.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def intervalo_utc(tipo: str, inicio: date) -> tuple[Optional[datetime], Optional[datetime]]:
+    """
+    [desde, ate) em UTC sem tz, no formato de `palpites.created_at`: um
+    filtro por faixa que usa índice, em vez de extrair mês/semana da data.
+    """
+    fim = fim_do_periodo(tipo, inicio)
+    if fim is None:
+        return None, None
+    return _meia_noite_utc(inicio), _meia_noite_utc(fim)
+
+
+def periodos_de(momento: datetime) -> list[tuple[str, date]]:
+    """(tipo, início) de todos os rankings em que um palpite feito em `momento` conta."""
+    return [(tipo, inicio_do_periodo(tipo, momento)) for tipo in (GERAL, MENSAL, SEMANAL)]
@@ -0,0 +1,375 @@
+from collections import Counter, defaultdict
+from datetime import date, datetime
+from typing import Iterable, NamedTuple, Optional
+
+from sqlalchemy import and_, case, cast, delete, func, literal, or_, select, true, union_all, update
+from sqlalchemy.orm import Session
+from sqlalchemy.types import Date, Integer, String
+
+from src.db.upsert import insert_on_conflict
+from src.grupos.model import MembroGrupo
+from src.palpites.model import Palpite
+from src.ranking.model import ClassificacaoEscopo, ClassificacaoRanking
+from src.ranking.periodos import GERAL, INICIO_GERAL, intervalo_utc, periodos_de
+from src.usuario.models.user import User
+
+PONTOS_POR_ACERTO = 10
+
+PREFIXO_TIME = "time:"
+PREFIXO_GRUPO = "grupo:"
+
+COLUNAS_ESCOPO = ["escopo", "tipo", "inicio", "usuario_id", "pontos", "acertos", "palpites"]
+
+
+def escopo_do_time(time_do_coracao: str) -> str:
+    return PREFIXO_TIME + time_do_coracao
+
+
+def escopo_do_grupo(grupo_id: int) -> str:
+    return PREFIXO_GRUPO + str(grupo_id)
+
+
+def _pontos(modelo=ClassificacaoRanking):
+    # mesma regra do ranking: as moedas do usuário; sem moedas, acertos x 10
+    moedas = select(User.coins).where(User.id == modelo.usuario_id).scalar_subquery()
+    return func.coalesce(moedas, modelo.acertos * PONTOS_POR_ACERTO)
+
+
+def _chaves(eventos: Iterable[tuple[int, Optional[datetime]]]) -> Counter:
+    """(usuario_id, momento) -> contagem por (tipo, inicio, usuario_id)."""
+    chaves: Counter = Counter()
+    for usuario_id, momento in eventos:
+        periodos = periodos_de(momento) if momento is not None else [(GERAL, INICIO_GERAL)]
+        for tipo, inicio in periodos:
+            chaves[(tipo, inicio, usuario_id)] += 1
+    return chaves
+
+
+def _somar(db: Session, campo: str, deltas: Counter, modelo=ClassificacaoRanking):
+    """
+    INSERT ... ON CONFLICT DO UPDATE SET <campo> = <campo> + delta, em um
+    statement. As chaves de `deltas` seguem a chave primária de `modelo`.
+    """
+    chave = [coluna.name for coluna in modelo.__table__.primary_key.columns]
+    valores = [{**dict(zip(chave, k)), "pontos": 0, "acertos": 0, "palpites": 0, campo: n} for k, n in deltas.items()]
+    if not valores:
+        return
+
+    stmt = insert_on_conflict(db)(modelo).values(valores)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=chave,
+        set_={campo: getattr(modelo, campo) + getattr(stmt.excluded, campo)},
+    )
+    db.execute(stmt)
+
+
+# ==============================
+# ESCOPOS (TORCIDA DO TIME, GRUPOS PRIVADOS)
+# ==============================
+
+
+def escopos_dos_usuarios(usuario_ids: Optional[Iterable[int]] = None):
+    """
+    SELECT (escopo, usuario_id) de cada usuário: a torcida do time do
+    coração e cada grupo em que ele está. Sem `usuario_ids`, de todos.
+    """
+    times = select((literal(PREFIXO_TIME) + User.time_do_coracao).label("escopo"), User.id.label("usuario_id")).where(
+        User.time_do_coracao.is_not(None)
+    )
+    grupos = select(
+        (literal(PREFIXO_GRUPO) + cast(MembroGrupo.grupo_id, String)).label("escopo"),
+        MembroGrupo.usuario_id.label("usuario_id"),
+    )
+
+    if usuario_ids is not None:
+        usuario_ids = list(usuario_ids)
+        times = times.where(User.id.in_(usuario_ids))
+        grupos = grupos.where(MembroGrupo.usuario_id.in_(usuario_ids))
+
+    return union_all(times, grupos)
+
+
+def _somar_nos_escopos(db: Session, campo: str, deltas: Counter):
+    """Replica os deltas de (tipo, inicio, usuario_id) em cada escopo do usuário."""
+    if not deltas:
+        return
+
+    escopos = defaultdict(list)
+    for escopo, usuario_id in db.execute(escopos_dos_usuarios({usuario_id for _, _, usuario_id in deltas})):
+        escopos[usuario_id].append(escopo)
+
+    por_escopo: Counter = Counter()
+    for (tipo, inicio, usuario_id), n in deltas.items():
+        for escopo in escopos[usuario_id]:
+            por_escopo[(escopo, tipo, inicio, usuario_id)] += n
+
+    _somar(db, campo, por_escopo, ClassificacaoEscopo)
+
+
+def replicar_nos_escopos(db, *filtros):
+    """
+    INSERT ... SELECT das linhas globais (filtradas) para cada escopo dos
+    usuários. Aceita Session ou Connection (migração). Não faz commit.
+    """
+    escopos = escopos_dos_usuarios().subquery()
+    origem = (
+        select(
+            escopos.c.escopo,
+            ClassificacaoRanking.tipo,
+            ClassificacaoRanking.inicio,
+            ClassificacaoRanking.usuario_id,
+            ClassificacaoRanking.pontos,
+            ClassificacaoRanking.acertos,
+            ClassificacaoRanking.palpites,
+        ).join(escopos, escopos.c.usuario_id == ClassificacaoRanking.usuario_id)
+        # WHERE sempre presente: o SQLite exige no INSERT ... SELECT ... ON CONFLICT
+        .where(true(), *filtros)
+    )
+    db.execute(insert_on_conflict(db)(ClassificacaoEscopo).from_select(COLUNAS_ESCOPO, origem).on_conflict_do_nothing())
+
+
+def entrar_no_escopo(db: Session, escopo: str, usuario_id: int):
+    """Copia as linhas do usuário (todos os períodos) para o escopo. Não faz commit."""
+    sair_do_escopo(db, escopo, usuario_id)
+    origem = select(
+        literal(escopo, String),
+        ClassificacaoRanking.tipo,
+        ClassificacaoRanking.inicio,
+        ClassificacaoRanking.usuario_id,
+        ClassificacaoRanking.pontos,
+        ClassificacaoRanking.acertos,
+        ClassificacaoRanking.palpites,
+    ).where(ClassificacaoRanking.usuario_id == usuario_id)
+    db.execute(ClassificacaoEscopo.__table__.insert().from_select(COLUNAS_ESCOPO, origem))
+
+
+def sair_do_escopo(db: Session, escopo: str, usuario_id: int):
+    db.execute(
+        delete(ClassificacaoEscopo).where(
+            ClassificacaoEscopo.usuario_id == usuario_id, ClassificacaoEscopo.escopo == escopo
+        )
+    )
+
+
+# ==============================
+# ATUALIZAÇÃO INCREMENTAL
+# ==============================
+
+
+def sincronizar_pontos(db: Session, usuario_ids: Iterable[int]):
+    """Recalcula `pontos` das linhas dos usuários a partir das moedas atuais."""
+    usuario_ids = set(usuario_ids)
+    if not usuario_ids:
+        return
+
+    # moedas alteradas pelo ORM ainda não foram para o banco (autoflush off)
+    db.flush()
+    for modelo in (ClassificacaoRanking, ClassificacaoEscopo):
+        db.execute(
+            update(modelo)
+            .where(modelo.usuario_id.in_(usuario_ids))
+            .values(pontos=_pontos(modelo))
+            .execution_options(synchronize_session=False)
+        )
+
+
+def registrar_palpites(db: Session, palpites: Iterable[tuple[int, Optional[datetime]]]):
+    """Palpites novos, como (usuario_id, created_at). Não faz commit."""
+    deltas = _chaves(palpites)
+    _somar(db, "palpites", deltas)
+    _somar_nos_escopos(db, "palpites", deltas)
+    sincronizar_pontos(db, {usuario_id for _, _, usuario_id in deltas})
+
+
+def registrar_acertos(db: Session, acertos: Iterable[tuple[int, Optional[datetime]]]):
+    """Palpites apurados como acerto, como (usuario_id, created_at). Não faz commit."""
+    deltas = _chaves(acertos)
+    _somar(db, "acertos", deltas)
+    _somar_nos_escopos(db, "acertos", deltas)
+    sincronizar_pontos(db, {usuario_id for _, _, usuario_id in deltas})
+
+
+def incluir_no_ranking_geral(db: Session, usuario_id: int):
+    """Todo usuário aparece no ranking geral (e no geral da torcida do time), mesmo sem palpites."""
+    stmt = insert_on_conflict(db)(ClassificacaoRanking).values(
+        tipo=GERAL, inicio=INICIO_GERAL, usuario_id=usuario_id, pontos=0, acertos=0, palpites=0
+    )
+    db.execute(stmt.on_conflict_do_nothing())
+    _somar_nos_escopos(db, "palpites", Counter({(GERAL, INICIO_GERAL, usuario_id): 0}))
+    sincronizar_pontos(db, [usuario_id])
+
+
+def filtro_do_periodo(tipo: str, inicio: date):
+    """created_at >= desde AND created_at < ate — sargável, usa o índice por created_at."""
+    desde, ate = intervalo_utc(tipo, inicio)
+    return and_(Palpite.created_at >= desde, Palpite.created_at < ate)
+
+
+def recalcular_periodo(db: Session, tipo: str, inicio: date) -> int:
+    """
+    Refaz as linhas de um período mensal/semanal direto de `palpites`
+    (ex.: depois de mudar RANKING_FUSO/RANKING_INICIO_SEMANA). Um
+    INSERT ... SELECT agrupado por usuário sobre a faixa de created_at,
+    replicado em seguida nos escopos. Não faz commit; retorna quantos
+    usuários ficaram no período.
+    """
+    chave = and_(ClassificacaoRanking.tipo == tipo, ClassificacaoRanking.inicio == inicio)
+
+    agregado = (
+        select(
+            literal(tipo, String),
+            literal(inicio, Date),
+            Palpite.usuario_id,
+            literal(0, Integer),
+            func.sum(case((Palpite.acertou.is_(True), 1), else_=0)),
+            func.count(),
+        )
+        .where(filtro_do_periodo(tipo, inicio))
+        .group_by(Palpite.usuario_id)
+    )
+
+    db.execute(delete(ClassificacaoRanking).where(chave))
+    db.execute(
+        ClassificacaoRanking.__table__.insert().from_select(
+            ["tipo", "inicio", "usuario_id", "pontos", "acertos", "palpites"], agregado
+        )
+    )
+    db.execute(
+        update(ClassificacaoRanking).where(chave).values(pontos=_pontos()).execution_options(synchronize_session=False)
+    )
+
+    db.execute(
+        delete(ClassificacaoEscopo).where(ClassificacaoEscopo.tipo == tipo, ClassificacaoEscopo.inicio == inicio)
+    )
+    replicar_nos_escopos(db, chave)
+    return contar_classificacao(db, tipo, inicio)
+
+
+# ==============================
+# LEITURA
+# ==============================
+
+
+def _classificacao(tipo: str, inicio: date, escopo: Optional[str] = None):
+    """(modelo, filtro) das linhas do período: global ou de um escopo."""
+    if escopo is None:
+        return ClassificacaoRanking, [ClassificacaoRanking.tipo == tipo, ClassificacaoRanking.inicio == inicio]
+    modelo = ClassificacaoEscopo
+    return modelo, [modelo.escopo == escopo, modelo.tipo == tipo, modelo.inicio == inicio]
+
+
+class LinhaClassificacao(NamedTuple):
+    id: int
+    nome: str
+    pontos: int
+    acertos: int
+    total_palpites: int
+    posicao: int
+
+
+def _ordenada(tipo: str, inicio: date, escopo: Optional[str] = None):
+    """
+    (modelo, query) das linhas do período em ordem (pontos DESC,
+    usuario_id), sem função de janela: o LIMIT caminha pelo índice de
+    pontos e só lê a página.
+    """
+    modelo, filtro = _classificacao(tipo, inicio, escopo)
+    query = (
+        select(User.id, User.nome, modelo.pontos, modelo.acertos, modelo.palpites.label("total_palpites"))
+        .join(User, User.id == modelo.usuario_id)
+        .where(*filtro)
+    )
+    return modelo, query
+
+
+def _depois_de(modelo, pontos: int, usuario_id: int):
+    """Linhas depois de (pontos, usuario_id) na ordem da classificação."""
+    return or_(modelo.pontos < pontos, and_(modelo.pontos == pontos, modelo.usuario_id > usuario_id))
+
+
+def _antes_de(modelo, pontos: int, usuario_id: int):
+    return or_(modelo.pontos > pontos, and_(modelo.pontos == pontos, modelo.usuario_id < usuario_id))
+
+
+def _posicionar(db: Session, tipo: str, inicio: date, rows, escopo: Optional[str] = None) -> list:
+    """
+    Calcula `posicao` (empates dividem a posição) de linhas consecutivas
+    da classificação. Um único COUNT a partir da primeira linha: quantas
+    têm mais pontos (a posição dela) e quantas vêm antes dela (a linha
+    dela); dali em diante a posição sai da própria ordem.
+    """
+    if not rows:
+        return []
+
+    modelo, filtro = _classificacao(tipo, inicio, escopo)
+    primeira = rows[0]
+    acima, antes = db.execute(
+        select(
+            func.coalesce(func.sum(case((modelo.pontos > primeira.pontos, 1), else_=0)), 0),
+            func.count(),
+        ).where(*filtro, _antes_de(modelo, primeira.pontos, primeira.id))
+    ).one()
+
+    linhas = []
+    posicao = acima + 1
+    for i, row in enumerate(rows):
+        if i > 0 and row.pontos != rows[i - 1].pontos:
+            posicao = antes + i + 1
+        linhas.append(LinhaClassificacao(row.id, row.nome, row.pontos, row.acertos, row.total_palpites, posicao))
+    return linhas
+
+
+def contar_classificacao(db: Session, tipo: str, inicio: date, escopo: Optional[str] = None) -> int:
+    modelo, filtro = _classificacao(tipo, inicio, escopo)
+    return db.execute(select(func.count()).select_from(modelo).where(*filtro)).scalar_one()
+
+
+def get_pagina_classificacao(
+    db: Session,
+    tipo: str,
+    inicio: date,
+    limite: int,
+    offset: int = 0,
+    apos: Optional[tuple[int, int]] = None,
+    escopo: Optional[str] = None,
+):
+    """
+    Uma página da classificação, já com `posicao`. `apos` = (pontos,
+    usuario_id) da última linha da página anterior (paginação por cursor).
+    """
+    modelo, query = _ordenada(tipo, inicio, escopo)
+    if apos is not None:
+        query = query.where(_depois_de(modelo, *apos))
+
+    rows = db.execute(query.order_by(modelo.pontos.desc(), modelo.usuario_id).limit(limite).offset(offset)).all()
+    return _posicionar(db, tipo, inicio, rows, escopo)
+
+
+def get_classificacao_completa(db: Session, tipo: str, inicio: date):
+    """O período inteiro em ordem (para os retratos em memória)."""
+    modelo, query = _ordenada(tipo, inicio)
+    rows = db.execute(query.order_by(modelo.pontos.desc(), modelo.usuario_id)).all()
+    return _posicionar(db, tipo, inicio, rows)
+
+
+def get_vizinhanca_classificacao(
+    db: Session, tipo: str, inicio: date, usuario_id: int, raio: int, escopo: Optional[str] = None
+):
+    """O usuário e até `raio` linhas acima e abaixo dele; vazio se ele não está no período."""
+    modelo, query = _ordenada(tipo, inicio, escopo)
+    usuario = db.execute(query.where(modelo.usuario_id == usuario_id)).first()
+    if usuario is None:
+        return []
+
+    # busca pelo índice nos dois sentidos a partir de (pontos, usuario_id)
+    acima = db.execute(
+        query.where(_antes_de(modelo, usuario.pontos, usuario_id))
+        .order_by(modelo.pontos.asc(), modelo.usuario_id.desc())
+        .limit(raio)
+    ).all()
+    abaixo = db.execute(
+        query.where(_depois_de(modelo, usuario.pontos, usuario_id))
+        .order_by(modelo.pontos.desc(), modelo.usuario_id)
+        .limit(raio)
+    ).all()
+    return _posicionar(db, tipo, inicio, list(reversed(acima)) + [usuario] + abaixo, escopo)
@@ -1,24 +1,127 @@
-from fastapi import APIRouter, Depends
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
 
 from src.db.session import get_db
 from src.ranking.schema import RankingResponse
-from src.ranking.service import ranking_geral, ranking_mensal, ranking_semanal
+from src.ranking.periodos import GERAL, MENSAL, SEMANAL
+from src.ranking.service import (
+    ranking_do_grupo,
+    ranking_do_time,
+    ranking_geral,
+    ranking_mensal,
+    ranking_semanal,
+    ranking_serializado,
+    recalcular_ranking,
+)
 from src.usuario.auth import get_current_user
 
 router = APIRouter(prefix="/ranking", tags=["Ranking"])
 
 
+def paginacao(
+    limit: int = Query(50, ge=1, le=200),
+    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = None,
+    ao_redor: Optional[int] = Query(None, ge=1, le=50, description="K linhas acima e abaixo do usuário"),
+) -> dict:
+    # limit/offset ou cursor (proximo_cursor da resposta anterior); com
+    # ao_redor a página é a vizinhança do usuário logado
+    return {"limite": limit, "offset": offset, "cursor": cursor, "ao_redor": ao_redor}
+
+
+def _responder(tipo: str, ranking, request: Request, db: Session, usuario, pagina: dict):
+    try:
+        servida = ranking_serializado(tipo, usuario.id, request.headers.get("if-none-match"), **pagina)
+        if servida is None:
+            # sem retrato em memória: consulta no banco, sem ETag
+            return ranking(db, usuario.id, **pagina)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+
+    etag, corpo = servida
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if corpo is None:
+        return Response(status_code=304, headers=headers)
+    return Response(content=corpo, media_type="application/json", headers=headers)
+
+
 @router.get("/geral", response_model=RankingResponse)
-def get_rank_geral(db: Session = Depends(get_db), usuario=Depends(get_current_user)):
-    return ranking_geral(db, usuario.id)
+def get_rank_geral(
+    request: Request,
+    pagina: dict = Depends(paginacao),
+    db: Session = Depends(get_db),
+    usuario=Depends(get_current_user),
+):
+    return _responder(GERAL, ranking_geral, request, db, usuario, pagina)
 
 
 @router.get("/mensal", response_model=RankingResponse)
-def get_rank_mensal(db: Session = Depends(get_db), usuario=Depends(get_current_user)):
-    return ranking_mensal(db, usuario.id)
+def get_rank_mensal(
+    request: Request,
+    pagina: dict = Depends(paginacao),
+    db: Session = Depends(get_db),
+    usuario=Depends(get_current_user),
+):
+    return _responder(MENSAL, ranking_mensal, request, db, usuario, pagina)
 
 
 @router.get("/semanal", response_model=RankingResponse)
-def get_rank_semanal(db: Session = Depends(get_db), usuario=Depends(get_current_user)):
-    return ranking_semanal(db, usuario.id)
+def get_rank_semanal(
+    request: Request,
+    pagina: dict = Depends(paginacao),
+    db: Session = Depends(get_db),
+    usuario=Depends(get_current_user),
+):
+    return _responder(SEMANAL, ranking_semanal, request, db, usuario, pagina)
+
+
+Periodo = Literal["geral", "mensal", "semanal"]
+
+
+# Ranking entre os torcedores do mesmo time do coração
+@router.get("/time/{periodo}", response_model=RankingResponse)
+def get_rank_time(
+    periodo: Periodo,
+    pagina: dict = Depends(paginacao),
+    db: Session = Depends(get_db),
+    usuario=Depends(get_current_user),
+):
+    try:
+        ranking = ranking_do_time(db, usuario, periodo, **pagina)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    if ranking is None:
+        raise HTTPException(404, "Usuário sem time do coração")
+    return ranking
+
+
+# Ranking de um grupo privado (só para membros)
+@router.get("/grupos/{grupo_id}/{periodo}", response_model=RankingResponse)
+def get_rank_grupo(
+    grupo_id: int,
+    periodo: Periodo,
+    pagina: dict = Depends(paginacao),
+    db: Session = Depends(get_db),
+    usuario=Depends(get_current_user),
+):
+    try:
+        ranking = ranking_do_grupo(db, usuario.id, grupo_id, periodo, **pagina)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    if ranking is None:
+        raise HTTPException(404, "Grupo não encontrado")
+    return ranking
+
+
+# Refaz o período atual a partir dos palpites (ex.: após mudar o fuso do ranking)
+@router.post("/recalcular/{periodo}")
+def recalcular(
+    periodo: Literal["mensal", "semanal"],
+    db: Session = Depends(get_db),
+    usuario=Depends(get_current_user),
+):
+    if not usuario.is_admin:
+        raise HTTPException(status_code=403, detail="Apenas admins podem recalcular o ranking.")
+    return recalcular_ranking(db, periodo)
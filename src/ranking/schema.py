@@ -11,12 +11,19 @@ class RankingItem(BaseModel):
     pontos: int
     precisao: float
     palpites: int
-    is_you: bool
 
     class Config:
         orm_mode = True
 
 
-class RankingResponse(BaseModel):
+class PaginaRanking(BaseModel):
+    # igual para todos os usuários: é a parte que fica em cache, serializada
     total: int
     ranking: List[RankingItem]
+    # passe em `cursor` para buscar a página seguinte (None = última página)
+    proximo_cursor: Optional[str] = None
+
+
+class RankingResponse(PaginaRanking):
+    # linha do usuário logado no período (None se ele não está no ranking)
+    voce: Optional[RankingItem] = None
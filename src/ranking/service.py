@@ -1,14 +1,25 @@
+import base64
+import hashlib
+import json
+from datetime import datetime
 from typing import List, Optional
 
-from sqlalchemy import func, text
 from sqlalchemy.orm import Session
-from sqlalchemy.sql import case
 
-from src.palpites.model import Palpite
-from src.ranking.schema import RankingItem, RankingResponse
-from src.usuario.models.user import User
-
-PONTOS_POR_ACERTO = 10
+from src.config import settings
+from src.grupos.repository import get_membro
+from src.partidas.cache import TTLCache
+from src.ranking.periodos import GERAL, MENSAL, SEMANAL, inicio_do_periodo
+from src.ranking.repository import (
+    contar_classificacao,
+    escopo_do_grupo,
+    escopo_do_time,
+    get_pagina_classificacao,
+    get_vizinhanca_classificacao,
+    recalcular_periodo,
+)
+from src.ranking.schema import PaginaRanking, RankingItem, RankingResponse
+from src.ranking.snapshot import ranking_snapshots
 
 
 def montar_avatar(nome: str) -> str:
@@ -21,90 +32,226 @@ def medalha_para_posicao(posicao: int):
     return {1: "ouro", 2: "prata", 3: "bronze"}.get(posicao)
 
 
-def _query_base(db: Session, filtro=None):
-    """Consulta base que une usuários e palpites."""
-
-    acertos_expr = func.sum(case((Palpite.acertou, 1), else_=0)).label("acertos")
+def _codificar_cursor(row) -> str:
+    chave = json.dumps([row.pontos, row.id])
+    return base64.urlsafe_b64encode(chave.encode()).decode().rstrip("=")
+
+
+def _decodificar_cursor(cursor: str) -> tuple[int, int]:
+    try:
+        bruto = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        pontos, usuario_id = json.loads(bruto)
+        return int(pontos), int(usuario_id)
+    except (ValueError, TypeError) as e:
+        raise ValueError("Cursor inválido") from e
+
+
+def _query_classificacao(
+    db: Session,
+    tipo: str,
+    usuario_id: Optional[int],
+    limite: int,
+    offset: int = 0,
+    apos: Optional[tuple[int, int]] = None,
+    ao_redor: Optional[int] = None,
+    escopo: Optional[str] = None,
+):
+    """
+    (total do período, linhas da página) da classificação materializada do
+    período atual de `tipo`, global ou de um `escopo`. Com `ao_redor`, a
+    página é a vizinhança do usuário em vez de limit/offset/cursor.
+    """
+    inicio = inicio_do_periodo(tipo, datetime.utcnow())
+    total = contar_classificacao(db, tipo, inicio, escopo)
+
+    if ao_redor is not None:
+        if usuario_id is None:
+            return total, []
+        return total, get_vizinhanca_classificacao(db, tipo, inicio, usuario_id, ao_redor, escopo)
+
+    return total, get_pagina_classificacao(db, tipo, inicio, limite, offset, apos, escopo)
+
+
+def _linha_do_usuario(db: Session, tipo: str, usuario_id: Optional[int], rows, escopo: Optional[str] = None):
+    """Linha do usuário no período: da própria página, se ele estiver nela; senão, do banco."""
+    if usuario_id is None:
+        return None
+    for row in rows:
+        if row.id == usuario_id:
+            return row
+
+    inicio = inicio_do_periodo(tipo, datetime.utcnow())
+    linhas = get_vizinhanca_classificacao(db, tipo, inicio, usuario_id, 0, escopo)
+    return linhas[0] if linhas else None
+
+
+def _montar_item(row) -> RankingItem:
+    total = row.total_palpites or 0
+    acertos = row.acertos or 0
+    precisao = (acertos / total * 100) if total > 0 else 0
+
+    return RankingItem(
+        posicao=row.posicao,
+        medalha=medalha_para_posicao(row.posicao),
+        avatar=montar_avatar(row.nome),
+        nome=row.nome,
+        pontos=row.pontos,
+        precisao=round(precisao, 2),
+        palpites=total,
+    )
+
+
+def _montar_ranking(rows) -> List[RankingItem]:
+    """Linhas já vêm na ordem do keyset, com `posicao` calculada por `_posicionar` (um COUNT)."""
+    return [_montar_item(row) for row in rows]
+
+
+def _montar_pagina(total: int, rows, limite: int, ao_redor: Optional[int]) -> PaginaRanking:
+    proximo = None
+    if ao_redor is None and len(rows) == limite:
+        proximo = _codificar_cursor(rows[-1])
+
+    return PaginaRanking(total=total, ranking=_montar_ranking(rows), proximo_cursor=proximo)
+
+
+def _fatiar(retrato, usuario_id: Optional[int], limite: int, offset: int, apos, ao_redor: Optional[int]):
+    if ao_redor is not None:
+        return retrato.total, retrato.vizinhanca(usuario_id, ao_redor) if usuario_id is not None else []
+    return retrato.total, retrato.pagina(limite, offset, apos)
+
+
+def _ranking(
+    db: Session,
+    tipo: str,
+    usuario_id: Optional[int],
+    limite: int = 50,
+    offset: int = 0,
+    cursor: Optional[str] = None,
+    ao_redor: Optional[int] = None,
+    escopo: Optional[str] = None,
+) -> RankingResponse:
+    apos = _decodificar_cursor(cursor) if cursor else None
+
+    # retrato em memória do período, se houver; senão, consulta no banco
+    # (escopos — time, grupo — sempre vão ao banco, lendo só as linhas deles)
+    retrato = ranking_snapshots.retrato(tipo) if escopo is None else None
+    if retrato is None:
+        total, rows = _query_classificacao(db, tipo, usuario_id, limite, offset, apos, ao_redor, escopo=escopo)
+        voce = _linha_do_usuario(db, tipo, usuario_id, rows, escopo)
+    else:
+        total, rows = _fatiar(retrato, usuario_id, limite, offset, apos, ao_redor)
+        voce = retrato.linha(usuario_id)
+
+    pagina = _montar_pagina(total, rows, limite, ao_redor)
+    return RankingResponse(
+        total=pagina.total,
+        ranking=pagina.ranking,
+        proximo_cursor=pagina.proximo_cursor,
+        voce=_montar_item(voce) if voce is not None else None,
+    )
+
+
+# ==============================
+# RESPOSTA SERIALIZADA (ETag)
+# ==============================
+
+# páginas compartilhadas, já em JSON; a versão do retrato faz parte da chave
+_paginas = TTLCache(maxsize=settings.RANKING_PAGINAS_CACHE)
+
+
+def _etag(retrato, usuario_id: Optional[int], *pagina) -> str:
+    # `voce` depende do usuário, então ele entra no ETag junto com a página
+    params = hashlib.blake2b(repr((usuario_id, *pagina)).encode(), digest_size=8).hexdigest()
+    return f'"{retrato.versao}-{params}"'
+
+
+def _etag_confere(etag: str, if_none_match: Optional[str]) -> bool:
+    if not if_none_match:
+        return False
+    candidatos = [c.strip().removeprefix("W/") for c in if_none_match.split(",")]
+    return "*" in candidatos or etag in candidatos
+
+
+def ranking_serializado(
+    tipo: str,
+    usuario_id: Optional[int],
+    if_none_match: Optional[str] = None,
+    limite: int = 50,
+    offset: int = 0,
+    cursor: Optional[str] = None,
+    ao_redor: Optional[int] = None,
+) -> Optional[tuple[str, Optional[bytes]]]:
+    """
+    Ranking direto do retrato em memória, como (etag, corpo JSON). O corpo
+    é None quando `if_none_match` já tem esse ETag (304). Sem retrato do
+    período, retorna None e o ranking sai pelo caminho normal.
+
+    A página (igual para todos) é serializada uma vez por versão do retrato;
+    por requisição só se acrescenta `voce`.
+    """
+    retrato = ranking_snapshots.retrato(tipo)
+    if retrato is None:
+        return None
+
+    apos = _decodificar_cursor(cursor) if cursor else None
+    etag = _etag(retrato, usuario_id, limite, offset, cursor, ao_redor)
+    if _etag_confere(etag, if_none_match):
+        return etag, None
+
+    def serializar() -> bytes:
+        total, rows = _fatiar(retrato, usuario_id, limite, offset, apos, ao_redor)
+        return _montar_pagina(total, rows, limite, ao_redor).model_dump_json().encode()
+
+    if ao_redor is None:
+        chave = (tipo, retrato.versao, limite, offset, apos)
+        pagina = _paginas.get_or_load(chave, settings.RANKING_PAGINAS_TTL, serializar)
+    else:
+        # a vizinhança é de um usuário só: não vale guardar
+        pagina = serializar()
 
-    total_expr = func.count(Palpite.id).label("total_palpites")
+    linha = retrato.linha(usuario_id)
+    voce = _montar_item(linha).model_dump_json().encode() if linha is not None else b"null"
+    return etag, pagina[:-1] + b',"voce":' + voce + b"}"
 
-    q = db.query(
-        User.id,
-        User.nome,
-        User.coins,
-        total_expr,
-        acertos_expr,
-    ).outerjoin(Palpite, Palpite.usuario_id == User.id)
 
-    if filtro is not None:
-        q = q.filter(filtro)
+def ranking_geral(db: Session, usuario_id: Optional[int], **pagina):
+    """Ranking total sem filtros."""
+    return _ranking(db, GERAL, usuario_id, **pagina)
 
-    return q.group_by(User.id, User.nome, User.coins).all()
 
+def ranking_mensal(db: Session, usuario_id: Optional[int], **pagina):
+    """Ranking considerando apenas palpites do mês atual."""
+    return _ranking(db, MENSAL, usuario_id, **pagina)
 
-def _montar_ranking(rows, usuario_id: Optional[int]):
-    ranking: List[RankingItem] = []
 
-    for row in rows:
-        total = row.total_palpites or 0
-        acertos = row.acertos or 0
-        # Se o usuário tiver coins, usa como pontuação
-        pontos = row.coins if row.coins is not None else acertos * PONTOS_POR_ACERTO
-
-        precisao = (acertos / total * 100) if total > 0 else 0
-
-        ranking.append(
-            RankingItem(
-                posicao=0,  # será preenchido depois
-                medalha=None,
-                avatar=montar_avatar(row.nome),
-                nome=row.nome,
-                pontos=pontos,
-                precisao=round(precisao, 2),
-                palpites=total,
-                is_you=(row.id == usuario_id),
-            )
-        )
-
-    # Ordenar por pontos
-    ranking.sort(key=lambda x: x.pontos, reverse=True)
-
-    # Atribuir posições e medalhas
-    for i, item in enumerate(ranking, start=1):
-        item.posicao = i
-        item.medalha = medalha_para_posicao(i)
-
-    return ranking
-
-
-def ranking_geral(db: Session, usuario_id: Optional[int]):
-    """Ranking total sem filtros."""
-    rows = _query_base(db)
-    ranking = _montar_ranking(rows, usuario_id)
-    return RankingResponse(total=len(ranking), ranking=ranking)
+def ranking_semanal(db: Session, usuario_id: Optional[int], **pagina):
+    """Ranking considerando apenas palpites da semana atual."""
+    return _ranking(db, SEMANAL, usuario_id, **pagina)
 
 
-def ranking_mensal(db: Session, usuario_id: Optional[int]):
-    """Ranking considerando apenas palpites do mês atual."""
+def ranking_do_time(db: Session, usuario, tipo: str, **pagina) -> Optional[RankingResponse]:
+    """Ranking entre os torcedores do time do coração do usuário; None se ele não tem time."""
+    if not usuario.time_do_coracao:
+        return None
+    return _ranking(db, tipo, usuario.id, escopo=escopo_do_time(usuario.time_do_coracao), **pagina)
 
-    if db.bind.dialect.name == "sqlite":
-        filtro = text("strftime('%m', palpites.created_at) = strftime('%m', CURRENT_TIMESTAMP)")
-    else:
-        filtro = func.date_part("month", Palpite.created_at) == func.date_part("month", func.now())
 
-    rows = _query_base(db, filtro)
-    ranking = _montar_ranking(rows, usuario_id)
-    return RankingResponse(total=len(ranking), ranking=ranking)
+def ranking_do_grupo(db: Session, usuario_id: int, grupo_id: int, tipo: str, **pagina) -> Optional[RankingResponse]:
+    """Ranking de um grupo privado; None se o usuário não é membro dele."""
+    if get_membro(db, grupo_id, usuario_id) is None:
+        return None
+    return _ranking(db, tipo, usuario_id, escopo=escopo_do_grupo(grupo_id), **pagina)
 
 
-def ranking_semanal(db: Session, usuario_id: Optional[int]):
-    """Ranking considerando apenas palpites da semana atual."""
-
-    if db.bind.dialect.name == "sqlite":
-        filtro = text("strftime('%W', palpites.created_at) = strftime('%W', CURRENT_TIMESTAMP)")
-    else:
-        filtro = func.date_part("week", Palpite.created_at) == func.date_part("week", func.now())
+def recalcular_ranking(db: Session, tipo: str) -> dict:
+    """Refaz a classificação do período atual de `tipo` a partir dos palpites."""
+    inicio = inicio_do_periodo(tipo, datetime.utcnow())
+    try:
+        usuarios = recalcular_periodo(db, tipo, inicio)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
 
-    rows = _query_base(db, filtro)
-    ranking = _montar_ranking(rows, usuario_id)
-    return RankingResponse(total=len(ranking), ranking=ranking)
+    ranking_snapshots.marcar_alteracao()
+    return {"periodo": tipo, "inicio": inicio, "usuarios": usuarios}
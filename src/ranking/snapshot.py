@@ -0,0 +1,179 @@
+import asyncio
+import hashlib
+import logging
+import time
+from bisect import bisect_right
+from datetime import date, datetime
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from sqlalchemy.orm import Session
+
+from src.config import settings
+from src.db.session import SessionLocal
+from src.ranking.periodos import GERAL, MENSAL, SEMANAL, inicio_do_periodo
+from src.ranking.repository import get_classificacao_completa
+
+logger = logging.getLogger(__name__)
+
+# de quanto em quanto tempo o loop olha se há alteração pendente
+VERIFICACAO = 1.0
+
+
+class LinhaRanking(NamedTuple):
+    # mesmos nomes das linhas do banco: _montar_ranking aceita as duas
+    id: int
+    nome: str
+    pontos: int
+    acertos: int
+    total_palpites: int
+    posicao: int
+
+
+# ---------------------------------------------------
+# RETRATO DE UM PERÍODO
+# ---------------------------------------------------
+
+
+class RetratoRanking:
+    """Classificação inteira de um período, em ordem, com índice usuário -> linha."""
+
+    def __init__(self, tipo: str, inicio: date, linhas: List[LinhaRanking]):
+        self.tipo = tipo
+        self.inicio = inicio
+        self.linhas = linhas
+        self.gerado_em = datetime.utcnow()
+
+        # (-pontos, usuario_id) é crescente na ordem do ranking: o cursor vira bisect
+        self._chaves = [(-linha.pontos, linha.id) for linha in linhas]
+        self._indice = {linha.id: i for i, linha in enumerate(linhas)}
+
+        # muda quando qualquer linha muda (apuração, palpites, moedas) e é a
+        # mesma em todos os processos para o mesmo conteúdo: vira o ETag
+        conteudo = f"{tipo}:{inicio}:{[tuple(linha) for linha in linhas]!r}"
+        self.versao = hashlib.blake2b(conteudo.encode(), digest_size=8).hexdigest()
+
+    @property
+    def total(self) -> int:
+        return len(self.linhas)
+
+    def pagina(self, limite: int, offset: int = 0, apos: Optional[tuple[int, int]] = None) -> List[LinhaRanking]:
+        inicio = offset
+        if apos is not None:
+            pontos, usuario_id = apos
+            inicio += bisect_right(self._chaves, (-pontos, usuario_id))
+        return self.linhas[inicio : inicio + limite]
+
+    def linha(self, usuario_id: Optional[int]) -> Optional[LinhaRanking]:
+        i = self._indice.get(usuario_id)
+        return self.linhas[i] if i is not None else None
+
+    def vizinhanca(self, usuario_id: int, raio: int) -> List[LinhaRanking]:
+        i = self._indice.get(usuario_id)
+        if i is None:
+            return []
+        return self.linhas[max(0, i - raio) : i + raio + 1]
+
+
+# ---------------------------------------------------
+# RETRATOS EM MEMÓRIA (BACKGROUND)
+# ---------------------------------------------------
+
+
+class SnapshotsRanking:
+    """
+    Um retrato por período (geral, mensal, semanal), refeito em background
+    a cada `intervalo` segundos ou logo depois de uma apuração
+    (`marcar_alteracao`). As requisições só fatiam o retrato atual, sem
+    consultar o banco; o ranking aceita alguns segundos de atraso.
+
+    Cada processo mantém os seus retratos. Enquanto não há retrato (ou o
+    período virou), o ranking cai para a consulta no banco.
+    """
+
+    def __init__(self, intervalo: float, session_factory: Callable[[], Session] = SessionLocal):
+        self.intervalo = intervalo
+        self._session_factory = session_factory
+
+        self._retratos: Dict[str, RetratoRanking] = {}
+        self._pendente = False
+        self._ultima_atualizacao: Optional[float] = None
+        self._tarefa: Optional[asyncio.Task] = None
+
+        self.atualizado_em: Optional[datetime] = None
+        self.falhas_seguidas = 0
+
+    def retrato(self, tipo: str, agora: Optional[datetime] = None) -> Optional[RetratoRanking]:
+        retrato = self._retratos.get(tipo)
+        if retrato is None or retrato.inicio != inicio_do_periodo(tipo, agora or datetime.utcnow()):
+            return None
+        return retrato
+
+    def marcar_alteracao(self):
+        """Pontuação mudou (apuração): refaz os retratos na próxima verificação."""
+        self._pendente = True
+
+    def atualizar(self):
+        agora = datetime.utcnow()
+        db = self._session_factory()
+        try:
+            retratos = {}
+            for tipo in (GERAL, MENSAL, SEMANAL):
+                inicio = inicio_do_periodo(tipo, agora)
+                linhas = [LinhaRanking(**row._asdict()) for row in get_classificacao_completa(db, tipo, inicio)]
+                retratos[tipo] = RetratoRanking(tipo, inicio, linhas)
+        finally:
+            db.close()
+
+        # troca todos de uma vez — leitores nunca veem meio estado
+        self._retratos = retratos
+        self.atualizado_em = agora
+
+    # -------------------- background --------------------
+
+    def _vencido(self) -> bool:
+        if self._pendente or self._ultima_atualizacao is None:
+            return True
+        return time.monotonic() - self._ultima_atualizacao >= self.intervalo
+
+    async def _loop(self):
+        while True:
+            if self._vencido():
+                # alterações durante a reconstrução disparam outra
+                self._pendente = False
+                self._ultima_atualizacao = time.monotonic()
+                try:
+                    await asyncio.to_thread(self.atualizar)
+                    self.falhas_seguidas = 0
+                except Exception:
+                    self.falhas_seguidas += 1
+                    logger.exception("Falha ao atualizar os retratos do ranking")
+
+            await asyncio.sleep(VERIFICACAO)
+
+    def start(self):
+        if self._tarefa is None or self._tarefa.done():
+            self._tarefa = asyncio.get_running_loop().create_task(self._loop())
+
+    async def stop(self):
+        if self._tarefa is None:
+            return
+
+        self._tarefa.cancel()
+        try:
+            await self._tarefa
+        except asyncio.CancelledError:
+            pass
+        self._tarefa = None
+
+    def stats(self) -> dict:
+        return {
+            "ativo": self._tarefa is not None and not self._tarefa.done(),
+            "atualizado_em": self.atualizado_em,
+            "pendente": self._pendente,
+            "linhas": {tipo: r.total for tipo, r in self._retratos.items()},
+            "versoes": {tipo: r.versao for tipo, r in self._retratos.items()},
+            "falhas_seguidas": self.falhas_seguidas,
+        }
+
+
+ranking_snapshots = SnapshotsRanking(intervalo=settings.RANKING_SNAPSHOT_INTERVALO)
@@ -1,3 +1,5 @@
+from datetime import datetime, timedelta
+
 import pytest
 import pytest_asyncio
 from httpx import AsyncClient
@@ -6,6 +8,7 @@ from sqlalchemy.orm import sessionmaker
 
 from src.db.session import Base, get_db
 from src.main import app
+from src.partidas.inicios import inicio_partidas
 from src.usuario.auth import create_access_token, hash_password
 from src.usuario.models.user import User
 
@@ -46,6 +49,19 @@ def override_get_db(db):
     app.dependency_overrides[get_db] = _get_db
 
 
+# =============================================================
+# SNAPSHOTS DA THESPORTSDB EM ARQUIVO TEMPORÁRIO POR TESTE
+# =============================================================
+@pytest.fixture(autouse=True)
+def snapshots_em_tmp(tmp_path, monkeypatch):
+    from src.partidas.snapshot import snapshots
+
+    snapshots.close()
+    monkeypatch.setattr(snapshots, "caminho", str(tmp_path / "snapshots.db"))
+    yield snapshots
+    snapshots.close()
+
+
 # =============================================================
 # Cria usuário padrão (ID=1) APÓS o DB existir
 # =============================================================
@@ -64,6 +80,21 @@ def create_default_user(db):
     db.refresh(user)
 
 
+# =============================================================
+# HORÁRIOS DAS PARTIDAS — sem TheSportsDB: toda partida começa amanhã,
+# salvo as que o teste registra no dict (None = início desconhecido)
+# =============================================================
+@pytest.fixture(autouse=True)
+def calendario_de_teste(monkeypatch):
+    calendario = {}
+    amanha = datetime.utcnow() + timedelta(days=1)
+    monkeypatch.setattr(inicio_partidas, "inicio", lambda partida_id: calendario.get(str(partida_id), amanha))
+    monkeypatch.setattr(inicio_partidas, "_inicios", {})
+    monkeypatch.setattr(inicio_partidas, "_desconhecidas", {})
+    monkeypatch.setattr(inicio_partidas, "_pendentes", set())
+    yield calendario
+
+
 # =============================================================
 # CLIENTE HTTP ASSÍNCRONO
 # =============================================================
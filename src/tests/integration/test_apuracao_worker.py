@@ -0,0 +1,120 @@
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock
+
+from src.palpites.model import EstadoApuracao, Palpite
+from src.palpites.worker import ApuracaoWorker
+
+AGORA = datetime(2025, 6, 1, 22, 0, 0)
+
+
+def _partida(event_id, inicio, placar=(None, None)):
+    return MagicMock(
+        id_partida=event_id,
+        liga_id="4351",
+        data=inicio.strftime("%Y-%m-%d"),
+        horario=inicio.strftime("%H:%M:%S"),
+        placar_casa=placar[0],
+        placar_fora=placar[1],
+    )
+
+
+def _worker(db):
+    return ApuracaoWorker(
+        intervalo=60,
+        atraso=timedelta(minutes=105),
+        intervalo_agenda=3600,
+        session_factory=lambda: db,
+    )
+
+
+def test_worker_so_consulta_partidas_iniciadas_e_retoma_das_pendentes(mocker, db):
+    encerrada = _partida("100", AGORA - timedelta(hours=3), (2, 1))
+    atrasada = _partida("101", AGORA - timedelta(hours=3, minutes=30))
+    futura = _partida("102", AGORA + timedelta(days=1))
+    fora_da_agenda = _partida("200", AGORA - timedelta(hours=5), (0, 0))
+
+    for partida_id, placar in [("100", "2x1"), ("101", "1x1"), ("102", "0x0"), ("200", "0x0")]:
+        db.add(Palpite(usuario_id=1, partida_id=partida_id, palpite=placar))
+    db.commit()
+
+    mocker.patch("src.palpites.worker.ligas_monitoradas", return_value=["4351"])
+    mocker.patch("src.palpites.worker.get_proximas_partidas_league", return_value=[futura])
+    mocker.patch("src.palpites.worker.get_ultimos_resultados", return_value=[encerrada, atrasada])
+    mock_lookup = mocker.patch("src.palpites.worker.buscar_partidas", return_value={"200": fora_da_agenda})
+    mock_resolver = mocker.patch(
+        "src.palpites.service.resolver_resultados",
+        return_value={"100": encerrada, "200": fora_da_agenda},
+    )
+
+    worker = _worker(db)
+    resumo = worker.executar(agora=AGORA)
+
+    # a futura nunca vai para a API
+    assert sorted(mock_resolver.call_args.args[0]) == ["100", "101", "200"]
+    mock_lookup.assert_called_once_with(["200"])
+
+    pendentes = {p.partida_id for p in db.query(Palpite).filter(Palpite.processado.is_(False))}
+    assert pendentes == {"101", "102"}
+
+    # a partida sem resultado continua esperando
+    assert resumo["aguardando_desde"] == AGORA - timedelta(hours=3, minutes=30)
+    assert resumo["aguardando_resultado"] == 1
+    assert db.get(EstadoApuracao, 1).ultima_execucao == AGORA
+
+    # restart: um worker novo retoma das pendentes e da agenda gravada
+    mock_resolver.reset_mock()
+    mock_lookup.return_value = {}
+    _worker(db).executar(agora=AGORA + timedelta(minutes=10))
+
+    assert mock_resolver.call_args.args[0] == ["101"]
+
+
+def test_worker_sem_pendencias_nao_chama_resolver(mocker, db):
+    mocker.patch("src.palpites.worker.ligas_monitoradas", return_value=[])
+    mocker.patch("src.palpites.worker.buscar_partidas", return_value={})
+    mock_resolver = mocker.patch("src.palpites.service.resolver_resultados")
+
+    resumo = _worker(db).executar(agora=AGORA)
+
+    mock_resolver.assert_not_called()
+    assert (resumo["aguardando_desde"], resumo["aguardando_resultado"]) == (None, 0)
+
+
+def test_lookup_sem_resultado_fica_gravado_ate_a_espera(mocker, db):
+    db.add(Palpite(usuario_id=1, partida_id="300", palpite="1x0"))
+    db.commit()
+
+    mocker.patch("src.palpites.worker.ligas_monitoradas", return_value=[])
+    mock_lookup = mocker.patch("src.palpites.worker.buscar_partidas", return_value={})
+    mocker.patch("src.palpites.service.resolver_resultados", return_value={})
+
+    worker = _worker(db)
+    worker.executar(agora=AGORA)
+    worker.executar(agora=AGORA + timedelta(minutes=30))
+    assert mock_lookup.call_count == 1
+
+    # passada a espera, tenta de novo
+    worker.executar(agora=AGORA + timedelta(hours=1))
+    assert mock_lookup.call_count == 2
+    assert mock_lookup.call_args.args[0] == ["300"]
+
+
+def test_palpite_novo_em_partida_antiga_da_agenda_e_apurado(mocker, db):
+    antiga = _partida("400", AGORA - timedelta(days=2), (3, 0))
+
+    mocker.patch("src.palpites.worker.ligas_monitoradas", return_value=["4351"])
+    mocker.patch("src.palpites.worker.get_proximas_partidas_league", return_value=[])
+    mocker.patch("src.palpites.worker.get_ultimos_resultados", return_value=[antiga])
+    mocker.patch("src.palpites.worker.buscar_partidas", return_value={})
+    mock_resolver = mocker.patch("src.palpites.service.resolver_resultados", return_value={"400": antiga})
+
+    worker = _worker(db)
+    assert worker.executar(agora=AGORA)["consultadas"] == 0
+
+    # palpite chega depois: a partida começou há dias e já está na agenda
+    db.add(Palpite(usuario_id=1, partida_id="400", palpite="3x0"))
+    db.commit()
+    worker.executar(agora=AGORA + timedelta(minutes=10))
+
+    assert mock_resolver.call_args.args[0] == ["400"]
+    assert db.query(Palpite).filter(Palpite.partida_id == "400").one().processado is True
@@ -0,0 +1,67 @@
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient
+
+from src.partidas.repository import (
+    _eventos_ao_vivo,
+    _para_ao_vivo,
+    _para_elenco,
+    _para_partida_proxima,
+    _para_partida_resultado,
+    _para_tabela_time,
+)
+from src.tests.mocks import fake_thesportsdb
+from src.tests.mocks.fake_thesportsdb import LIGA_ID
+
+V1 = "/api/v1/json/123"
+V2 = "/api/v2/json"
+
+
+@pytest_asyncio.fixture
+async def fake_client(monkeypatch):
+    monkeypatch.setitem(fake_thesportsdb.config, "latencia_ms", 0)
+    monkeypatch.setitem(fake_thesportsdb.config, "jitter_ms", 0)
+    monkeypatch.setitem(fake_thesportsdb.config, "taxa_erro", 0)
+    monkeypatch.setitem(fake_thesportsdb.config, "taxa_timeout", 0)
+    monkeypatch.setitem(fake_thesportsdb.config, "v2_vazio", [])
+
+    async with AsyncClient(app=fake_thesportsdb.app, base_url="http://fake") as client:
+        yield client
+
+
+@pytest.mark.asyncio
+async def test_fake_schedule_compativel_com_conversores(fake_client):
+    proximos = (await fake_client.get(f"{V2}/schedule/next/league/{LIGA_ID}")).json()["events"]
+    anteriores = (await fake_client.get(f"{V2}/schedule/previous/league/{LIGA_ID}")).json()["events"]
+
+    assert proximos and anteriores
+    assert all(_para_partida_proxima(ev).liga_id == LIGA_ID for ev in proximos)
+    assert all(_para_partida_resultado(ev).placar_casa is not None for ev in anteriores)
+
+
+@pytest.mark.asyncio
+async def test_fake_v1_tabela_e_lookup(fake_client):
+    tabela = (await fake_client.get(f"{V1}/lookuptable.php", params={"l": LIGA_ID})).json()["table"]
+    assert [_para_tabela_time(row).posicao for row in tabela] == list(range(1, len(tabela) + 1))
+
+    ultimo = (await fake_client.get(f"{V1}/eventslast.php", params={"id": LIGA_ID})).json()["results"][0]
+    lookup = (await fake_client.get(f"{V2}/lookup/event/{ultimo['idEvent']}")).json()["lookup"]
+    assert lookup[0]["idEvent"] == ultimo["idEvent"]
+
+
+@pytest.mark.asyncio
+async def test_fake_elenco_e_ao_vivo(fake_client):
+    time_id = (await fake_client.get(f"{V1}/lookup_all_teams.php", params={"id": LIGA_ID})).json()["teams"][0]["idTeam"]
+    players = (await fake_client.get(f"{V2}/list/players/{time_id}")).json()["players"]
+    assert _para_elenco(time_id, players).jogadores
+
+    ao_vivo = (await fake_client.get(f"{V2}/livescore/soccer")).json()
+    assert all("placar" in _para_ao_vivo(ev) for ev in _eventos_ao_vivo(ao_vivo))
+
+
+@pytest.mark.asyncio
+async def test_fake_injeta_erros(fake_client):
+    fake_thesportsdb.config["taxa_erro"] = 1.0
+
+    resp = await fake_client.get(f"{V2}/livescore/soccer")
+    assert resp.status_code == 503
@@ -0,0 +1,58 @@
+import pytest
+
+from src.ranking.repository import incluir_no_ranking_geral
+from src.usuario.auth import create_access_token
+from src.usuario.repository.user_repository import create_user
+
+
+def _headers(usuario_id: int) -> dict:
+    return {"Authorization": f"Bearer {create_access_token({'sub': str(usuario_id)})}"}
+
+
+@pytest.mark.asyncio
+async def test_grupo_privado_com_ranking_proprio(async_client, token, db):
+    incluir_no_ranking_geral(db, 1)
+    bia = create_user(db, "Bia", "bia@example.com", "x", "Santos")
+    create_user(db, "Caio", "caio@example.com", "x", "Santos")
+    db.commit()
+
+    dono = {"Authorization": f"Bearer {token}"}
+    resp = await async_client.post("/grupos/", json={"nome": "Firma"}, headers=dono)
+    assert resp.status_code == 201
+    grupo = resp.json()
+    assert (grupo["nome"], grupo["dono_id"], grupo["membros"]) == ("Firma", 1, 1)
+
+    # palpite antes de entrar também conta: as linhas do usuário são copiadas
+    palpite = {"partida_id": 9, "palpite_gols_casa": 2, "palpite_gols_visitante": 2}
+    await async_client.post("/palpites/", json=palpite, headers=_headers(bia.id))
+
+    convite = {"codigo": grupo["codigo"]}
+    resp = await async_client.post("/grupos/entrar", json=convite, headers=_headers(bia.id))
+    assert resp.json()["membros"] == 2
+    # entrar de novo não duplica
+    resp = await async_client.post("/grupos/entrar", json=convite, headers=_headers(bia.id))
+    assert resp.json()["membros"] == 2
+    assert (await async_client.post("/grupos/entrar", json={"codigo": "nao-existe"}, headers=dono)).status_code == 404
+
+    await async_client.post("/palpites/processar-teste", json={"partida_id": "9", "resultado": "2x2"}, headers=dono)
+
+    url = f"/ranking/grupos/{grupo['id']}/geral"
+    corpo = (await async_client.get(url, headers=dono)).json()
+    assert [(r["nome"], r["pontos"], r["palpites"]) for r in corpo["ranking"]] == [("Bia", 100, 1), ("Teste", 0, 0)]
+    assert corpo["voce"]["nome"] == "Teste"
+
+    corpo = (await async_client.get(f"/ranking/grupos/{grupo['id']}/semanal", headers=dono)).json()
+    assert [r["nome"] for r in corpo["ranking"]] == ["Bia"]
+
+    # quem não é membro não vê o grupo
+    caio = _headers(3)
+    assert (await async_client.get(url, headers=caio)).status_code == 404
+    assert (await async_client.get("/grupos/", headers=caio)).json() == []
+
+    assert [g["membros"] for g in (await async_client.get("/grupos/", headers=dono)).json()] == [2]
+
+    resp = await async_client.delete(f"/grupos/{grupo['id']}/membros/me", headers=_headers(bia.id))
+    assert resp.status_code == 204
+    corpo = (await async_client.get(url, headers=dono)).json()
+    assert [r["nome"] for r in corpo["ranking"]] == ["Teste"]
+    assert (await async_client.delete(f"/grupos/{grupo['id']}/membros/me", headers=_headers(bia.id))).status_code == 404
@@ -0,0 +1,216 @@
+from sqlalchemy import create_engine, inspect, text
+
+from src.db.migrations import rodar_cargas, rodar_migracoes
+
+PALPITES_LEGADO = """
+CREATE TABLE palpites (
+    id INTEGER PRIMARY KEY,
+    usuario_id INTEGER NOT NULL,
+    partida_id VARCHAR NOT NULL,
+    palpite VARCHAR NOT NULL,
+    acertou BOOLEAN,
+    processado BOOLEAN,
+    created_at DATETIME
+)
+"""
+
+
+def test_migracao_preenche_gols_e_cria_indice(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legado.db'}")
+
+    with engine.begin() as conn:
+        conn.execute(text(PALPITES_LEGADO))
+        conn.execute(
+            text(
+                "INSERT INTO palpites (id, usuario_id, partida_id, palpite, processado) VALUES "
+                "(1, 1, '10', '2x1', 0), (2, 2, '10', '0 - 3', 0), (3, 1, '11', 'abc', 1)"
+            )
+        )
+
+    rodar_migracoes(engine)
+    rodar_cargas(engine)
+    # idempotente: rodar de novo não quebra nem duplica nada
+    rodar_migracoes(engine)
+    rodar_cargas(engine)
+
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT id, gols_casa, gols_fora FROM palpites ORDER BY id")).all()
+        plano = conn.execute(
+            text("EXPLAIN QUERY PLAN SELECT id FROM palpites WHERE partida_id = '10' AND processado IS 0")
+        ).all()
+
+    assert [tuple(r) for r in rows] == [(1, 2, 1), (2, 0, 3), (3, None, None)]
+    assert "ix_palpites_pendentes_partida" in {i["name"] for i in inspect(engine).get_indexes("palpites")}
+    assert "ix_palpites_pendentes_partida" in " ".join(str(p[-1]) for p in plano)
+
+
+def test_migracao_remove_duplicados_antes_do_indice_unico(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legado.db'}")
+
+    with engine.begin() as conn:
+        conn.execute(text(PALPITES_LEGADO))
+        conn.execute(
+            text(
+                "INSERT INTO palpites (id, usuario_id, partida_id, palpite, processado) VALUES "
+                "(1, 1, '10', '2x1', 1), (2, 1, '10', '0x0', 0), "
+                "(3, 2, '10', '1x1', 0), (4, 2, '10', '3x1', 0)"
+            )
+        )
+
+    rodar_migracoes(engine)
+    rodar_cargas(engine)
+
+    with engine.connect() as conn:
+        ids = conn.execute(text("SELECT id FROM palpites ORDER BY id")).scalars().all()
+
+    assert ids == [1, 4]
+
+    with engine.connect() as conn:
+        distribuicao = conn.execute(
+            text("SELECT partida_id, gols_casa, gols_fora, total FROM palpites_distribuicao ORDER BY gols_casa")
+        ).all()
+    assert [tuple(r) for r in distribuicao] == [("10", 2, 1, 1), ("10", 3, 1, 1)]
+    unicos = {i["name"]: i["unique"] for i in inspect(engine).get_indexes("palpites")}
+    assert unicos["uq_palpites_usuario_partida"]
+
+
+def test_migracao_carrega_classificacao_do_ranking(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legado.db'}")
+
+    with engine.begin() as conn:
+        conn.execute(text(PALPITES_LEGADO))
+        conn.execute(text("CREATE TABLE users (id INTEGER PRIMARY KEY, nome VARCHAR, email VARCHAR, coins INTEGER)"))
+        conn.execute(
+            text("INSERT INTO users (id, nome, coins) VALUES (1, 'Ana', 300), (2, 'Bia', NULL), (3, 'Caio', 0)")
+        )
+        conn.execute(
+            text(
+                "INSERT INTO palpites (id, usuario_id, partida_id, palpite, acertou, processado, created_at) VALUES "
+                "(1, 1, '10', '2x1', 1, 1, '2025-05-30 10:00:00'), (2, 2, '10', '1x1', 1, 1, '2025-06-02 10:00:00'), "
+                "(3, 2, '11', '0x0', 0, 1, '2025-06-03 10:00:00')"
+            )
+        )
+
+    rodar_migracoes(engine)
+    rodar_cargas(engine)
+
+    with engine.connect() as conn:
+        rows = conn.execute(
+            text(
+                "SELECT tipo, inicio, usuario_id, pontos, acertos, palpites FROM ranking_classificacao "
+                "ORDER BY tipo, inicio, usuario_id"
+            )
+        ).all()
+
+    assert [tuple(r) for r in rows] == [
+        ("geral", "1970-01-01", 1, 300, 1, 1),
+        ("geral", "1970-01-01", 2, 10, 1, 2),
+        ("geral", "1970-01-01", 3, 0, 0, 0),
+        ("mensal", "2025-05-01", 1, 300, 1, 1),
+        ("mensal", "2025-06-01", 2, 10, 1, 2),
+        ("semanal", "2025-05-26", 1, 300, 1, 1),
+        ("semanal", "2025-06-02", 2, 10, 1, 2),
+    ]
+
+
+def test_migracao_replica_classificacao_nos_escopos(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legado.db'}")
+
+    with engine.begin() as conn:
+        conn.execute(text(PALPITES_LEGADO))
+        conn.execute(
+            text(
+                "CREATE TABLE users "
+                "(id INTEGER PRIMARY KEY, nome VARCHAR, email VARCHAR, coins INTEGER, time_do_coracao VARCHAR)"
+            )
+        )
+        conn.execute(
+            text(
+                "INSERT INTO users (id, nome, coins, time_do_coracao) VALUES "
+                "(1, 'Ana', 300, 'Santos'), (2, 'Bia', NULL, 'Santos'), (3, 'Caio', 0, 'Sem time')"
+            )
+        )
+        conn.execute(
+            text(
+                "INSERT INTO palpites (id, usuario_id, partida_id, palpite, acertou, processado, created_at) VALUES "
+                "(1, 2, '10', '1x1', 1, 1, '2025-06-02 10:00:00')"
+            )
+        )
+
+    rodar_migracoes(engine)
+    rodar_cargas(engine)
+
+    with engine.connect() as conn:
+        rows = conn.execute(
+            text(
+                "SELECT escopo, tipo, usuario_id, pontos, palpites FROM ranking_classificacao_escopo "
+                "ORDER BY tipo, usuario_id"
+            )
+        ).all()
+
+    assert [tuple(r) for r in rows] == [
+        ("time:Santos", "geral", 1, 300, 0),
+        ("time:Santos", "geral", 2, 10, 1),
+        ("time:Santos", "mensal", 2, 10, 1),
+        ("time:Santos", "semanal", 2, 10, 1),
+    ]
+
+    # o placeholder antigo do cadastro não vira torcida
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT time_do_coracao FROM users WHERE id = 3")).scalar_one() is None
+
+
+def test_startup_so_migra_o_schema(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legado.db'}")
+
+    with engine.begin() as conn:
+        conn.execute(text(PALPITES_LEGADO))
+        conn.execute(text("INSERT INTO palpites (id, usuario_id, partida_id, palpite) VALUES (1, 1, '10', '2x1')"))
+
+    rodar_migracoes(engine)
+
+    with engine.connect() as conn:
+        gols = conn.execute(text("SELECT gols_casa, gols_fora FROM palpites")).one()
+        distribuicao = conn.execute(text("SELECT count(*) FROM palpites_distribuicao")).scalar_one()
+
+    # colunas e tabelas existem, mas o preenchimento fica para as cargas
+    assert tuple(gols) == (None, None)
+    assert distribuicao == 0
+
+    rodar_cargas(engine)
+    with engine.connect() as conn:
+        assert tuple(conn.execute(text("SELECT gols_casa, gols_fora FROM palpites")).one()) == (2, 1)
+
+
+def test_apuracao_antes_da_carga_nao_perde_palpites_legados(tmp_path):
+    from sqlalchemy.orm import Session
+
+    from src.palpites.repository import liquidar_palpites_da_partida
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'legado.db'}")
+
+    with engine.begin() as conn:
+        conn.execute(text(PALPITES_LEGADO))
+        conn.execute(
+            text(
+                "INSERT INTO palpites (id, usuario_id, partida_id, palpite, processado) VALUES "
+                "(1, 1, '10', '2x1', 0), (2, 2, '10', 'abc', 0)"
+            )
+        )
+
+    rodar_migracoes(engine)
+
+    # worker subiu antes da carga: os palpites sem gols continuam pendentes
+    with Session(engine) as db:
+        assert liquidar_palpites_da_partida(db, "10", 2, 1, 100)["processados"] == 0
+
+    rodar_cargas(engine)
+    with Session(engine) as db:
+        resumo = liquidar_palpites_da_partida(db, "10", 2, 1, 100)
+
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT id, acertou, processado FROM palpites ORDER BY id")).all()
+
+    # o inválido sai da carga já apurado como erro
+    assert (resumo["processados"], resumo["acertos"]) == (1, 1)
+    assert [tuple(r) for r in rows] == [(1, 1, 1), (2, 0, 1)]
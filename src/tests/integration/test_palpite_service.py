@@ -18,3 +18,391 @@ async def test_listar_palpites(async_client, token):
     headers = {"Authorization": f"Bearer {token}"}
     resp = await async_client.get(BASE + "/", headers=headers)
     assert resp.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_listar_palpites_paginado_por_cursor(async_client, token, db):
+    from datetime import datetime
+
+    from src.palpites.model import Palpite
+
+    mesmo_instante = datetime(2025, 5, 1, 12, 0, 0)
+    for i in range(5):
+        db.add(
+            Palpite(
+                usuario_id=1,
+                partida_id=str(100 + i),
+                palpite="1x0",
+                created_at=mesmo_instante if i < 3 else datetime(2025, 5, 2, 12, 0, i),
+                processado=i % 2 == 0,
+                acertou=True if i == 0 else None,
+            )
+        )
+    db.commit()
+
+    headers = {"Authorization": f"Bearer {token}"}
+    vistos, cursor = [], None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        resp = await async_client.get(BASE + "/", params=params, headers=headers)
+        assert resp.status_code == 200
+        corpo = resp.json()
+        vistos += [p["partida_id"] for p in corpo["itens"]]
+        cursor = corpo["proximo_cursor"]
+        if cursor is None:
+            break
+
+    # mais novo primeiro; empate em created_at desempata por id
+    assert vistos == [104, 103, 102, 101, 100]
+
+    resp = await async_client.get(BASE + "/", params={"status": "pendentes"}, headers=headers)
+    assert [p["partida_id"] for p in resp.json()["itens"]] == [103, 101]
+
+    resp = await async_client.get(BASE + "/", params={"status": "acertos", "partida_id": 100}, headers=headers)
+    assert [p["partida_id"] for p in resp.json()["itens"]] == [100]
+
+    resp = await async_client.get(BASE + "/", params={"cursor": "lixo"}, headers=headers)
+    assert resp.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_post_palpite_faz_upsert_sem_duplicar(async_client, token, db):
+    from src.palpites.model import Palpite
+
+    headers = {"Authorization": f"Bearer {token}"}
+
+    primeiro = await async_client.post(
+        BASE + "/", json={"partida_id": 5, "palpite_gols_casa": 1, "palpite_gols_visitante": 0}, headers=headers
+    )
+    segundo = await async_client.post(
+        BASE + "/", json={"partida_id": 5, "palpite_gols_casa": 3, "palpite_gols_visitante": 2}, headers=headers
+    )
+
+    assert primeiro.status_code == segundo.status_code == 200
+    assert segundo.json()["id"] == primeiro.json()["id"]
+    assert (segundo.json()["palpite_gols_casa"], segundo.json()["palpite_gols_visitante"]) == (3, 2)
+
+    palpites = db.query(Palpite).filter(Palpite.partida_id == "5").all()
+    assert len(palpites) == 1
+    assert (palpites[0].palpite, palpites[0].gols_casa, palpites[0].gols_fora) == ("3x2", 3, 2)
+
+
+@pytest.mark.asyncio
+async def test_post_palpite_ja_processado_retorna_409(async_client, token, db):
+    from src.palpites.model import Palpite
+
+    db.add(Palpite(usuario_id=1, partida_id="6", palpite="1x0", processado=True, acertou=False))
+    db.commit()
+
+    resp = await async_client.post(
+        BASE + "/",
+        json={"partida_id": 6, "palpite_gols_casa": 2, "palpite_gols_visitante": 2},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+
+    assert resp.status_code == 409
+    db.expire_all()
+    assert db.query(Palpite).filter(Palpite.partida_id == "6").one().palpite == "1x0"
+
+
+@pytest.mark.asyncio
+async def test_post_lote_faz_upsert_da_rodada(async_client, token, db):
+    from src.palpites.model import Palpite
+
+    db.add(Palpite(usuario_id=1, partida_id="10", palpite="0x0"))
+    db.add(Palpite(usuario_id=1, partida_id="11", palpite="1x1", processado=True, acertou=True))
+    db.commit()
+
+    lote = {
+        "palpites": [
+            {"partida_id": 10, "palpite_gols_casa": 2, "palpite_gols_visitante": 0},
+            {"partida_id": 11, "palpite_gols_casa": 3, "palpite_gols_visitante": 3},
+            {"partida_id": 12, "palpite_gols_casa": 1, "palpite_gols_visitante": 2},
+        ]
+    }
+    resp = await async_client.post(BASE + "/lote", json=lote, headers={"Authorization": f"Bearer {token}"})
+
+    assert resp.status_code == 200
+    corpo = resp.json()
+    assert [(i["partida_id"], i["status"]) for i in corpo["itens"]] == [
+        (10, "atualizado"),
+        (11, "ja_processado"),
+        (12, "criado"),
+    ]
+    assert (corpo["criados"], corpo["atualizados"], corpo["ja_processados"]) == (1, 1, 1)
+    assert corpo["itens"][2]["palpite"]["palpite_gols_visitante"] == 2
+
+    db.expire_all()
+    gravados = {p.partida_id: p.palpite for p in db.query(Palpite).filter(Palpite.usuario_id == 1)}
+    assert gravados == {"10": "2x0", "11": "1x1", "12": "1x2"}
+
+
+@pytest.mark.asyncio
+async def test_post_lote_rejeita_partida_repetida(async_client, token):
+    item = {"partida_id": 10, "palpite_gols_casa": 2, "palpite_gols_visitante": 0}
+
+    resp = await async_client.post(
+        BASE + "/lote", json={"palpites": [item, item]}, headers={"Authorization": f"Bearer {token}"}
+    )
+
+    assert resp.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_placar_negativo_e_recusado_no_post_no_lote_e_na_edicao(async_client, token):
+    headers = {"Authorization": f"Bearer {token}"}
+    negativo = {"partida_id": 10, "palpite_gols_casa": -1, "palpite_gols_visitante": 0}
+
+    assert (await async_client.post(BASE + "/", json=negativo, headers=headers)).status_code == 422
+    assert (await async_client.post(BASE + "/lote", json={"palpites": [negativo]}, headers=headers)).status_code == 422
+    assert (
+        await async_client.put(BASE + "/1", json={"palpite_gols_visitante": -2}, headers=headers)
+    ).status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_distribuicao_acompanha_criacao_e_edicao(async_client, token, db):
+    from src.usuario.auth import create_access_token
+    from src.usuario.models.user import User
+
+    for uid in (2, 3):
+        db.add(User(id=uid, nome=f"U{uid}", email=f"u{uid}@example.com", password_hash="x", coins=0))
+    db.commit()
+
+    def headers(uid):
+        return {"Authorization": f"Bearer {token if uid == 1 else create_access_token({'sub': str(uid)})}"}
+
+    async def palpitar(uid, casa, fora):
+        body = {"partida_id": 50, "palpite_gols_casa": casa, "palpite_gols_visitante": fora}
+        return await async_client.post(BASE + "/", json=body, headers=headers(uid))
+
+    await palpitar(1, 2, 1)
+    await palpitar(2, 2, 1)
+    resp = await palpitar(3, 0, 0)
+
+    # edição via PUT tira do placar antigo e soma no novo
+    await async_client.put(BASE + f"/{resp.json()['id']}", json={"palpite_gols_visitante": 3}, headers=headers(3))
+    # edição via POST (upsert) também
+    await palpitar(2, 1, 1)
+
+    resp = await async_client.get(BASE + "/distribuicao/50", headers=headers(1))
+
+    assert resp.status_code == 200
+    corpo = resp.json()
+    assert corpo["total"] == 3
+    assert corpo["resultado"] == {"casa": 33.3, "empate": 33.3, "fora": 33.3}
+    assert {(p["gols_casa"], p["gols_fora"], p["total"]) for p in corpo["placares"]} == {
+        (2, 1, 1),
+        (1, 1, 1),
+        (0, 3, 1),
+    }
+
+
+@pytest.mark.asyncio
+async def test_processar_teste_apura_em_massa(async_client, token, db):
+    from src.palpites.model import Palpite
+    from src.usuario.models.user import User
+
+    db.add(User(id=2, nome="Outro", email="outro@example.com", password_hash="x", coins=50))
+    db.add(User(id=3, nome="Terceiro", email="terceiro@example.com", password_hash="x", coins=0))
+    db.add_all(
+        [
+            Palpite(usuario_id=1, partida_id="77", palpite="2x1"),
+            Palpite(usuario_id=2, partida_id="77", palpite="2 - 1"),
+            Palpite(usuario_id=3, partida_id="77", palpite="0x0"),
+            Palpite(usuario_id=1, partida_id="78", palpite="2x1"),
+        ]
+    )
+    db.commit()
+
+    headers = {"Authorization": f"Bearer {token}"}
+    resp = await async_client.post(
+        BASE + "/processar-teste", json={"partida_id": "77", "resultado": "2x1"}, headers=headers
+    )
+
+    assert resp.status_code == 200
+    assert resp.json()["processados"] == 3
+
+    assert db.get(User, 1).coins == 100
+    assert db.get(User, 2).coins == 150
+    assert db.get(User, 3).coins == 0
+
+    apurados = db.query(Palpite).filter(Palpite.partida_id == "77").order_by(Palpite.id).all()
+    assert [p.acertou for p in apurados] == [True, True, False]
+    assert all(p.processado for p in apurados)
+
+    outro = db.query(Palpite).filter(Palpite.partida_id == "78").one()
+    assert outro.processado is False and outro.acertou is None
+
+
+@pytest.mark.asyncio
+async def test_apuracao_em_lotes_e_retomavel(async_client, token, db, monkeypatch):
+    from src.config import settings
+    from src.palpites.model import Palpite
+    from src.usuario.models.user import User
+
+    monkeypatch.setattr(settings, "PARTIDAS_APURACAO_LOTE", 2)
+
+    for uid in range(2, 7):
+        db.add(User(id=uid, nome=f"U{uid}", email=f"u{uid}@example.com", password_hash="x", coins=0))
+    db.flush()
+    # o palpite do usuário 2 já foi apurado por uma execução anterior
+    db.add(Palpite(usuario_id=2, partida_id="90", palpite="1x0", processado=True, acertou=True))
+    db.add_all([Palpite(usuario_id=uid, partida_id="90", palpite="1x0" if uid % 2 else "0x0") for uid in range(3, 7)])
+    db.commit()
+
+    headers = {"Authorization": f"Bearer {token}"}
+    resp = await async_client.post(
+        BASE + "/processar-teste", json={"partida_id": "90", "resultado": "1x0"}, headers=headers
+    )
+    assert resp.json()["processados"] == 4
+
+    # só os pendentes são creditados; o já apurado não recebe de novo
+    assert [db.get(User, uid).coins for uid in range(2, 7)] == [0, 100, 0, 100, 0]
+
+    # nova execução não tem o que fazer
+    resp = await async_client.post(
+        BASE + "/processar-teste", json={"partida_id": "90", "resultado": "1x0"}, headers=headers
+    )
+    assert resp.json()["processados"] == 0
+
+    # progresso: só admin consulta
+    resp = await async_client.get(BASE + "/apuracoes", params={"partida_id": "90"}, headers=headers)
+    assert resp.status_code == 403
+
+    db.get(User, 1).is_admin = True
+    db.commit()
+
+    resp = await async_client.get(BASE + "/apuracoes", params={"partida_id": "90"}, headers=headers)
+    assert resp.status_code == 200
+    segunda, primeira = resp.json()
+    assert (primeira["status"], primeira["lotes"], primeira["processados"], primeira["acertos"]) == (
+        "concluida",
+        2,
+        4,
+        2,
+    )
+    assert primeira["moedas_creditadas"] == 200 and primeira["placar"] == "1x0"
+    assert (segunda["status"], segunda["lotes"], segunda["processados"]) == ("concluida", 0, 0)
+
+    resp = await async_client.get(f"{BASE}/apuracoes/{primeira['id']}", headers=headers)
+    assert resp.json()["processados"] == 4
+    assert (await async_client.get(BASE + "/apuracoes/999", headers=headers)).status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_palpites_fecham_no_inicio_da_partida(async_client, token, db, calendario_de_teste):
+    from datetime import datetime, timedelta
+
+    from src.palpites.model import Palpite
+
+    agora = datetime.utcnow()
+    calendario_de_teste.update({"10": agora - timedelta(minutes=1), "11": agora + timedelta(hours=2)})
+    db.add(Palpite(usuario_id=1, partida_id="10", palpite="1x1"))
+    db.commit()
+    existente = db.query(Palpite).one().id
+
+    headers = {"Authorization": f"Bearer {token}"}
+    resp = await async_client.post(
+        BASE + "/", json={"partida_id": 10, "palpite_gols_casa": 2, "palpite_gols_visitante": 0}, headers=headers
+    )
+    assert resp.status_code == 409
+
+    resp = await async_client.put(f"{BASE}/{existente}", json={"palpite_gols_casa": 3}, headers=headers)
+    assert resp.status_code == 409
+
+    lote = {
+        "palpites": [
+            {"partida_id": 10, "palpite_gols_casa": 2, "palpite_gols_visitante": 0},
+            {"partida_id": 11, "palpite_gols_casa": 1, "palpite_gols_visitante": 0},
+        ]
+    }
+    corpo = (await async_client.post(BASE + "/lote", json=lote, headers=headers)).json()
+    assert (corpo["criados"], corpo["encerrados"]) == (1, 1)
+    assert [i["status"] for i in corpo["itens"]] == ["encerrado", "criado"]
+
+    db.expire_all()
+    assert db.get(Palpite, existente).palpite == "1x1"
+
+
+@pytest.mark.asyncio
+async def test_palpite_em_partida_desconhecida_ou_antiga_e_recusado(async_client, token, calendario_de_teste):
+    from datetime import datetime, timedelta
+
+    from src.partidas.inicios import inicio_partidas
+
+    calendario_de_teste.update({"20": datetime.utcnow() - timedelta(days=60), "21": None})
+
+    headers = {"Authorization": f"Bearer {token}"}
+    for partida_id in (20, 21):  # já jogada / inexistente
+        palpite = {"partida_id": partida_id, "palpite_gols_casa": 1, "palpite_gols_visitante": 0}
+        resp = await async_client.post(BASE + "/", json=palpite, headers=headers)
+        assert resp.status_code == 409
+
+    # a desconhecida fica na fila do lookup em background
+    assert inicio_partidas._pendentes == {"21"}
+    assert (await async_client.get(BASE + "/", headers=headers)).json()["itens"] == []
+
+
+def test_primeiro_palpite_duplo_conta_uma_vez(db):
+    from src.palpites.model import DistribuicaoPalpite
+    from src.palpites.repository import inserir_palpites_novos, salvar_placares
+    from src.ranking.model import ClassificacaoRanking
+    from src.tests.conftest import TestingSessionLocal
+
+    # o "outro toque" grava primeiro, em outra sessão
+    outra = TestingSessionLocal()
+    salvar_placares(outra, 1, [("60", 1, 0)])
+    outra.commit()
+    outra.close()
+
+    # o INSERT não vê este como novo: vira edição do placar gravado
+    assert [p.partida_id for p in inserir_palpites_novos(db, 1, [("60", 2, 0), ("61", 0, 0)])] == ["61"]
+    db.rollback()
+
+    salvar_placares(db, 1, [("60", 2, 0)])
+    db.commit()
+
+    totais = {(d.gols_casa, d.gols_fora): d.total for d in db.query(DistribuicaoPalpite).filter_by(partida_id="60")}
+    assert totais == {(1, 0): 0, (2, 0): 1}
+    assert {c.tipo: c.palpites for c in db.query(ClassificacaoRanking).filter_by(usuario_id=1)} == {
+        "geral": 1,
+        "mensal": 1,
+        "semanal": 1,
+    }
+
+
+def test_palpite_novo_e_um_insert_so(db):
+    from sqlalchemy import event
+
+    from src.palpites.repository import salvar_placares
+
+    engine = db.get_bind()
+    statements = []
+
+    def registrar(conn, cursor, sql, *args):
+        statements.append(sql)
+
+    event.listen(engine, "before_cursor_execute", registrar)
+
+    def em_palpites(verbo):
+        return [s for s in statements if s.startswith(verbo) and ("INTO palpites " in s or "FROM palpites " in s)]
+
+    try:
+        salvos, anteriores = salvar_placares(db, 1, [("70", 1, 0), ("71", 2, 2)])
+        # novos: o RETURNING do primeiro INSERT já é a resposta, sem trava nem upsert
+        assert [(p.partida_id, p.gols_casa, p.gols_fora) for p in salvos] == [("70", 1, 0), ("71", 2, 2)]
+        assert anteriores == {}
+        assert len(em_palpites("INSERT")) == 1
+        assert em_palpites("SELECT") == []
+        db.commit()
+
+        statements.clear()
+        editados, anteriores = salvar_placares(db, 1, [("71", 0, 1), ("72", 3, 0)])
+        # edição: o INSERT cria o 72; só o 71 é lido e passa pelo upsert
+        assert [(p.partida_id, p.gols_casa, p.gols_fora) for p in editados] == [("71", 0, 1), ("72", 3, 0)]
+        assert anteriores == {"71": (2, 2)}
+        assert len(em_palpites("INSERT")) == 2
+        assert len(em_palpites("SELECT")) == 1
+    finally:
+        event.remove(engine, "before_cursor_execute", registrar)
@@ -9,3 +9,225 @@ async def test_ranking_semanal(async_client, token):
     resp = await async_client.get(f"{BASE}/semanal", headers=headers)
     assert resp.status_code == 200
     assert "ranking" in resp.json()
+
+
+@pytest.mark.asyncio
+async def test_ranking_materializado_acompanha_palpites_e_apuracao(async_client, token, db):
+    from src.ranking.repository import sincronizar_pontos
+    from src.usuario.models.user import User
+    from src.usuario.repository.user_repository import create_user
+
+    create_user(db, "Bia", "bia@example.com", "x", "Santos")
+    caio = create_user(db, "Caio", "caio@example.com", "x", "Santos")
+
+    headers = {"Authorization": f"Bearer {token}"}
+    lote = {
+        "palpites": [
+            {"partida_id": 50, "palpite_gols_casa": 2, "palpite_gols_visitante": 1},
+            {"partida_id": 51, "palpite_gols_casa": 0, "palpite_gols_visitante": 0},
+        ]
+    }
+    await async_client.post("/palpites/lote", json=lote, headers=headers)
+    # reenviar o mesmo palpite não conta de novo
+    await async_client.post(
+        "/palpites/", json={"partida_id": 50, "palpite_gols_casa": 2, "palpite_gols_visitante": 1}, headers=headers
+    )
+    await async_client.post("/palpites/processar-teste", json={"partida_id": "50", "resultado": "2x1"}, headers=headers)
+
+    geral = (await async_client.get(f"{BASE}/geral", headers=headers)).json()
+    assert [(r["nome"], r["pontos"], r["palpites"], r["precisao"]) for r in geral["ranking"]] == [
+        ("Teste", 100, 2, 50.0),
+        ("Bia", 0, 0, 0),
+        ("Caio", 0, 0, 0),
+    ]
+    assert geral["voce"]["nome"] == "Teste"
+
+    # só quem palpitou no período aparece no mensal/semanal
+    for periodo in ("mensal", "semanal"):
+        corpo = (await async_client.get(f"{BASE}/{periodo}", headers=headers)).json()
+        assert [(r["nome"], r["pontos"]) for r in corpo["ranking"]] == [("Teste", 100)]
+
+    # mudança de moedas reordena o geral
+    db.get(User, caio.id).coins = 500
+    sincronizar_pontos(db, [caio.id])
+    db.commit()
+
+    geral = (await async_client.get(f"{BASE}/geral", headers=headers)).json()
+    assert [r["nome"] for r in geral["ranking"]] == ["Caio", "Teste", "Bia"]
+
+
+@pytest.mark.asyncio
+async def test_ranking_paginado_e_ao_redor_do_usuario(async_client, token, db):
+    from src.ranking.repository import incluir_no_ranking_geral, sincronizar_pontos
+    from src.usuario.models.user import User
+    from src.usuario.repository.user_repository import create_user
+
+    ids = [create_user(db, f"U{i}", f"u{i}@example.com", "x", "Santos").id for i in range(5)]
+    incluir_no_ranking_geral(db, 1)
+    for user_id, coins in zip([*ids, 1], [500, 400, 400, 200, 100, 300]):
+        db.get(User, user_id).coins = coins
+    sincronizar_pontos(db, [*ids, 1])
+    db.commit()
+
+    headers = {"Authorization": f"Bearer {token}"}
+    vistos, cursor = [], None
+    while True:
+        params = {"limit": 4, **({"cursor": cursor} if cursor else {})}
+        corpo = (await async_client.get(f"{BASE}/geral", params=params, headers=headers)).json()
+        assert corpo["total"] == 6
+        vistos += [(r["nome"], r["posicao"]) for r in corpo["ranking"]]
+        cursor = corpo["proximo_cursor"]
+        if cursor is None:
+            break
+
+    # empate em pontos divide a posição (RANK)
+    assert vistos == [("U0", 1), ("U1", 2), ("U2", 2), ("Teste", 4), ("U3", 5), ("U4", 6)]
+
+    corpo = (await async_client.get(f"{BASE}/geral", params={"limit": 2, "offset": 2}, headers=headers)).json()
+    assert [r["nome"] for r in corpo["ranking"]] == ["U2", "Teste"]
+    # a página começa no meio do empate: a posição vem do COUNT, não da página
+    assert [r["posicao"] for r in corpo["ranking"]] == [2, 4]
+
+    corpo = (await async_client.get(f"{BASE}/geral", params={"ao_redor": 1}, headers=headers)).json()
+    assert [r["nome"] for r in corpo["ranking"]] == ["U2", "Teste", "U3"]
+    assert [r["posicao"] for r in corpo["ranking"]] == [2, 4, 5]
+    assert (corpo["voce"]["nome"], corpo["voce"]["posicao"]) == ("Teste", 4)
+    assert corpo["proximo_cursor"] is None
+
+    # fora do período (sem palpites no mês) a vizinhança é vazia
+    corpo = (await async_client.get(f"{BASE}/mensal", params={"ao_redor": 3}, headers=headers)).json()
+    assert corpo == {"total": 0, "ranking": [], "proximo_cursor": None, "voce": None}
+
+    # o usuário fora da página ainda recebe a própria linha em `voce`
+    corpo = (await async_client.get(f"{BASE}/geral", params={"limit": 1}, headers=headers)).json()
+    assert [r["nome"] for r in corpo["ranking"]] == ["U0"]
+    assert corpo["voce"]["posicao"] == 4
+
+    resp = await async_client.get(f"{BASE}/geral", params={"cursor": "x"}, headers=headers)
+    assert resp.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_recalcular_periodo_usa_faixa_de_created_at(async_client, token, db):
+    from datetime import datetime, timedelta
+
+    from sqlalchemy import select, text
+
+    from src.palpites.model import Palpite
+    from src.ranking.periodos import MENSAL, inicio_do_periodo
+    from src.ranking.repository import filtro_do_periodo
+    from src.usuario.models.user import User
+
+    agora = datetime.utcnow()
+    inicio = inicio_do_periodo(MENSAL, agora)
+    db.add_all(
+        [
+            Palpite(usuario_id=1, partida_id="1", palpite="1x0", acertou=True, created_at=agora),
+            Palpite(usuario_id=1, partida_id="2", palpite="1x0", acertou=False, created_at=agora),
+            # mesmo mês do ano passado não entra
+            Palpite(usuario_id=1, partida_id="3", palpite="1x0", acertou=True, created_at=agora - timedelta(days=365)),
+        ]
+    )
+    db.commit()
+
+    headers = {"Authorization": f"Bearer {token}"}
+    assert (await async_client.post(f"{BASE}/recalcular/mensal", headers=headers)).status_code == 403
+
+    db.get(User, 1).is_admin = True
+    db.commit()
+
+    resp = await async_client.post(f"{BASE}/recalcular/mensal", headers=headers)
+    assert resp.json() == {"periodo": "mensal", "inicio": inicio.isoformat(), "usuarios": 1}
+
+    corpo = (await async_client.get(f"{BASE}/mensal", headers=headers)).json()
+    assert [(r["nome"], r["palpites"], r["precisao"]) for r in corpo["ranking"]] == [("Teste", 2, 50.0)]
+
+    consulta = select(Palpite.usuario_id).where(filtro_do_periodo(MENSAL, inicio))
+    sql = str(consulta.compile(db.bind, compile_kwargs={"literal_binds": True}))
+    plano = " ".join(str(r[-1]) for r in db.execute(text(f"EXPLAIN QUERY PLAN {sql}")))
+    assert "ix_palpites_criacao_usuario" in plano
+
+
+@pytest.mark.asyncio
+async def test_ranking_servido_do_retrato_em_memoria(async_client, token, db, monkeypatch):
+    from src.palpites.model import Palpite
+    from src.ranking.repository import incluir_no_ranking_geral, sincronizar_pontos
+    from src.ranking.snapshot import SnapshotsRanking
+    from src.tests.conftest import TestingSessionLocal
+    from src.usuario.models.user import User
+    from src.usuario.repository.user_repository import create_user
+
+    outro = create_user(db, "Bia", "bia@example.com", "x", "Santos")
+    incluir_no_ranking_geral(db, 1)
+    db.get(User, outro.id).coins = 70
+    sincronizar_pontos(db, [outro.id])
+    db.commit()
+
+    snapshots = SnapshotsRanking(intervalo=30, session_factory=TestingSessionLocal)
+    snapshots.atualizar()
+    monkeypatch.setattr("src.ranking.service.ranking_snapshots", snapshots)
+    monkeypatch.setattr("src.palpites.service.ranking_snapshots", snapshots)
+
+    # depois do retrato, o banco muda mas a leitura vem da memória
+    db.get(User, 1).coins = 500
+    sincronizar_pontos(db, [1])
+    db.commit()
+
+    headers = {"Authorization": f"Bearer {token}"}
+    corpo = (await async_client.get(f"{BASE}/geral", params={"ao_redor": 1}, headers=headers)).json()
+    assert [(r["nome"], r["pontos"]) for r in corpo["ranking"]] == [("Bia", 70), ("Teste", 0)]
+    assert corpo["voce"]["pontos"] == 0
+
+    # mesma versão do retrato: 304 sem corpo
+    resp = await async_client.get(f"{BASE}/geral", headers=headers)
+    etag = resp.headers["etag"]
+    resp = await async_client.get(f"{BASE}/geral", headers={**headers, "If-None-Match": etag})
+    assert resp.status_code == 304
+    assert resp.content == b""
+
+    # uma apuração marca o retrato para ser refeito
+    await async_client.post("/palpites/processar-teste", json={"partida_id": "1", "resultado": "1x0"}, headers=headers)
+    assert snapshots._pendente is False  # nada processado, nada muda
+
+    db.add(Palpite(usuario_id=1, partida_id="2", palpite="1x0"))
+    db.commit()
+    await async_client.post("/palpites/processar-teste", json={"partida_id": "2", "resultado": "1x0"}, headers=headers)
+    assert snapshots._pendente is True
+
+    snapshots.atualizar()
+    resp = await async_client.get(f"{BASE}/geral", headers={**headers, "If-None-Match": etag})
+    assert resp.status_code == 200
+    assert resp.headers["etag"] != etag
+    assert [r["nome"] for r in resp.json()["ranking"]] == ["Teste", "Bia"]
+
+
+@pytest.mark.asyncio
+async def test_ranking_da_torcida_so_le_o_proprio_time(async_client, token, db):
+    from src.ranking.model import ClassificacaoEscopo
+    from src.ranking.repository import incluir_no_ranking_geral
+    from src.usuario.repository.user_repository import create_user
+
+    incluir_no_ranking_geral(db, 1)
+    create_user(db, "Bia", "bia@example.com", "x", "Palmeiras")
+    create_user(db, "Caio", "caio@example.com", "x", "Santos")
+    db.commit()
+
+    headers = {"Authorization": f"Bearer {token}"}
+    await async_client.post(
+        "/palpites/", json={"partida_id": 7, "palpite_gols_casa": 1, "palpite_gols_visitante": 0}, headers=headers
+    )
+    await async_client.post("/palpites/processar-teste", json={"partida_id": "7", "resultado": "1x0"}, headers=headers)
+
+    corpo = (await async_client.get(f"{BASE}/time/geral", headers=headers)).json()
+    assert [(r["nome"], r["pontos"], r["palpites"]) for r in corpo["ranking"]] == [("Teste", 100, 1), ("Bia", 0, 0)]
+    assert corpo["total"] == 2
+    assert corpo["voce"]["posicao"] == 1
+
+    corpo = (await async_client.get(f"{BASE}/time/mensal", headers=headers)).json()
+    assert [r["nome"] for r in corpo["ranking"]] == ["Teste"]
+
+    # linhas por escopo, mantidas junto com a global
+    escopos = {e for (e,) in db.query(ClassificacaoEscopo.escopo).distinct()}
+    assert escopos == {"time:Palmeiras", "time:Santos"}
+
+    assert (await async_client.get(f"{BASE}/time/anual", headers=headers)).status_code == 422
@@ -25,3 +25,39 @@ async def test_get_me(async_client, token):
     assert resp.status_code == 200
     body = resp.json()
     assert body["email"] == "test@example.com"
+
+
+@pytest.mark.asyncio
+async def test_criar_usuario_sem_time_nao_entra_em_torcida(async_client, db):
+    from src.ranking.model import ClassificacaoEscopo
+
+    data = {"nome": "Ana", "email": "ana@test.com", "password": "123"}
+    resp = await async_client.post(f"{BASE}/", json=data)
+    assert resp.status_code == 201
+    assert resp.json()["time_do_coracao"] is None
+    assert db.query(ClassificacaoEscopo).filter(ClassificacaoEscopo.usuario_id == resp.json()["id"]).count() == 0
+
+
+@pytest.mark.asyncio
+async def test_trocar_time_move_as_linhas_do_ranking(async_client, token, db):
+    from src.ranking.model import ClassificacaoEscopo
+    from src.ranking.repository import incluir_no_ranking_geral
+
+    incluir_no_ranking_geral(db, 1)
+    db.commit()
+
+    def escopos():
+        db.expire_all()
+        return {e for (e,) in db.query(ClassificacaoEscopo.escopo).filter(ClassificacaoEscopo.usuario_id == 1)}
+
+    assert escopos() == {"time:Palmeiras"}
+
+    headers = {"Authorization": f"Bearer {token}"}
+    resp = await async_client.put(f"{BASE}/me/time", json={"time_do_coracao": "Santos"}, headers=headers)
+    assert resp.status_code == 200
+    assert resp.json()["time_do_coracao"] == "Santos"
+    assert escopos() == {"time:Santos"}
+
+    resp = await async_client.put(f"{BASE}/me/time", json={"time_do_coracao": None}, headers=headers)
+    assert resp.status_code == 200
+    assert escopos() == set()
@@ -0,0 +1,184 @@
+"""
+Teste de carga de toda a API (partidas, palpites, ranking, coleção, usuários).
+
+Suba o fake da TheSportsDB e o backend apontando para ele:
+
+    uvicorn src.tests.mocks.fake_thesportsdb:app --port 9000
+    THESPORTSDB_BASE_URL=http://localhost:9000/api/v1/json uvicorn src.main:app --port 8000 --workers 4
+
+e rode:
+
+    python -m src.tests.load.carga --base-url http://localhost:8000 --duracao 60 --concorrencia 100
+
+Ao final é impresso, por endpoint: requisições, throughput, erros e p50/p95/p99.
+Com --json o relatório também é salvo em arquivo, para comparar execuções.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+# (peso, método, rótulo, montador do path/corpo)
+CENARIOS = [
+    (20, "GET", "/partidas/ao-vivo", lambda ctx: ("/partidas/ao-vivo", None)),
+    (15, "GET", "/partidas/proximas", lambda ctx: ("/partidas/proximas", None)),
+    (8, "GET", "/partidas/ultimos-resultados", lambda ctx: ("/partidas/ultimos-resultados", None)),
+    (8, "GET", "/partidas/tabela", lambda ctx: ("/partidas/tabela", None)),
+    (5, "GET", "/partidas/elenco/{team_id}", lambda ctx: (f"/partidas/elenco/{random.choice(ctx['times'])}", None)),
+    (
+        5,
+        "GET",
+        "/partidas/resultado/{event_id}",
+        lambda ctx: (f"/partidas/resultado/{random.choice(ctx['partidas'])}", None),
+    ),
+    (2, "GET", "/partidas/ligas", lambda ctx: ("/partidas/ligas?pais=Brazil", None)),
+    (10, "POST", "/palpites/", lambda ctx: ("/palpites/", _palpite_aleatorio(ctx))),
+    (5, "GET", "/palpites/", lambda ctx: ("/palpites/", None)),
+    (8, "GET", "/ranking/geral", lambda ctx: ("/ranking/geral", None)),
+    (3, "GET", "/ranking/mensal", lambda ctx: ("/ranking/mensal", None)),
+    (3, "GET", "/ranking/semanal", lambda ctx: ("/ranking/semanal", None)),
+    (3, "GET", "/colecao/album", lambda ctx: ("/colecao/album", None)),
+    (2, "GET", "/colecao/pacotes", lambda ctx: ("/colecao/pacotes", None)),
+    (3, "GET", "/usuarios/me", lambda ctx: ("/usuarios/me", None)),
+]
+
+
+def _palpite_aleatorio(ctx) -> dict:
+    return {
+        "partida_id": int(random.choice(ctx["partidas"])),
+        "palpite_gols_casa": random.randint(0, 3),
+        "palpite_gols_visitante": random.randint(0, 3),
+    }
+
+
+def percentil(valores: List[float], p: float) -> Optional[float]:
+    if not valores:
+        return None
+    ordenados = sorted(valores)
+    indice = min(len(ordenados) - 1, max(0, int(round(p / 100 * len(ordenados) + 0.5)) - 1))
+    return ordenados[indice]
+
+
+class Coletor:
+    def __init__(self):
+        self.latencias: Dict[str, List[float]] = defaultdict(list)
+        self.erros: Dict[str, int] = defaultdict(int)
+        self.status: Dict[str, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+
+    def registrar(self, rotulo: str, segundos: float, status: Optional[int]):
+        self.latencias[rotulo].append(segundos)
+        if status is None or status >= 400:
+            self.erros[rotulo] += 1
+        self.status[rotulo][status or 0] += 1
+
+    def relatorio(self, duracao: float) -> List[dict]:
+        linhas = []
+        for rotulo, valores in sorted(self.latencias.items()):
+            linhas.append(
+                {
+                    "endpoint": rotulo,
+                    "requisicoes": len(valores),
+                    "rps": round(len(valores) / duracao, 2),
+                    "erros": self.erros[rotulo],
+                    "p50_ms": round(percentil(valores, 50) * 1000, 1),
+                    "p95_ms": round(percentil(valores, 95) * 1000, 1),
+                    "p99_ms": round(percentil(valores, 99) * 1000, 1),
+                    "status": dict(self.status[rotulo]),
+                }
+            )
+        return linhas
+
+
+async def preparar(client: httpx.AsyncClient, usuarios: int) -> Tuple[List[dict], dict]:
+    """Cria/loga os usuários de carga e descobre partidas e times reais."""
+    headers = []
+    for i in range(usuarios):
+        email = f"carga{i}@hub.com"
+        cadastro = {"nome": f"Carga {i}", "email": email, "password": "carga123", "time_do_coracao": "Palmeiras"}
+        await client.post("/usuarios/", json=cadastro)
+        resp = await client.post("/usuarios/login", data={"username": email, "password": "carga123"})
+        resp.raise_for_status()
+        headers.append({"Authorization": f"Bearer {resp.json()['access_token']}"})
+
+    resp = await client.get("/partidas/proximas")
+    proximas = resp.json() if resp.status_code == 200 else []
+
+    ctx = {
+        "partidas": [p["id_partida"] for p in proximas] or ["2382001"],
+        "times": sorted({p["time_casa"]["id"] for p in proximas}) or ["134000"],
+    }
+    return headers, ctx
+
+
+async def trabalhador(client: httpx.AsyncClient, fim: float, headers: List[dict], ctx: dict, coletor: Coletor):
+    pesos = [c[0] for c in CENARIOS]
+
+    while time.monotonic() < fim:
+        _, metodo, rotulo, montar = random.choices(CENARIOS, weights=pesos)[0]
+        path, corpo = montar(ctx)
+
+        inicio = time.perf_counter()
+        try:
+            resp = await client.request(metodo, path, json=corpo, headers=random.choice(headers))
+            status = resp.status_code
+        except httpx.HTTPError:
+            status = None
+        coletor.registrar(rotulo, time.perf_counter() - inicio, status)
+
+
+async def executar(base_url: str, duracao: float, concorrencia: int, usuarios: int, timeout: float) -> List[dict]:
+    limites = httpx.Limits(max_connections=concorrencia, max_keepalive_connections=concorrencia)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limites) as client:
+        headers, ctx = await preparar(client, usuarios)
+
+        coletor = Coletor()
+        inicio = time.monotonic()
+        fim = inicio + duracao
+        await asyncio.gather(*[trabalhador(client, fim, headers, ctx, coletor) for _ in range(concorrencia)])
+
+        return coletor.relatorio(time.monotonic() - inicio)
+
+
+def imprimir(linhas: List[dict]):
+    cabecalho = f"{'endpoint':<34}{'reqs':>8}{'rps':>9}{'erros':>7}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+    print(cabecalho)
+    print("-" * len(cabecalho))
+    for ln in linhas:
+        print(
+            f"{ln['endpoint']:<34}{ln['requisicoes']:>8}{ln['rps']:>9}{ln['erros']:>7}"
+            f"{ln['p50_ms']:>9}{ln['p95_ms']:>9}{ln['p99_ms']:>9}"
+        )
+    total = sum(ln["requisicoes"] for ln in linhas)
+    print("-" * len(cabecalho))
+    print(f"{'TOTAL':<34}{total:>8}{round(sum(ln['rps'] for ln in linhas), 2):>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga do backend")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--duracao", type=float, default=30, help="segundos de carga")
+    parser.add_argument("--concorrencia", type=int, default=50, help="clientes simultâneos")
+    parser.add_argument("--usuarios", type=int, default=20, help="usuários distintos autenticados")
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--seed", type=int, default=42, help="semente do sorteio de cenários")
+    parser.add_argument("--json", dest="saida_json", help="salva o relatório neste arquivo")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    linhas = asyncio.run(executar(args.base_url, args.duracao, args.concorrencia, args.usuarios, args.timeout))
+
+    imprimir(linhas)
+    if args.saida_json:
+        with open(args.saida_json, "w", encoding="utf-8") as f:
+            json.dump(linhas, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,364 @@
+"""
+Servidor local que imita a TheSportsDB (V1 e V2) para benchmarks e testes de carga.
+
+Uso:
+    uvicorn src.tests.mocks.fake_thesportsdb:app --port 9000
+
+e no backend:
+    THESPORTSDB_BASE_URL=http://localhost:9000/api/v1/json
+
+Variáveis de ambiente (também alteráveis em runtime via POST /_config):
+    FAKE_TSDB_LATENCIA_MS   latência média por resposta (padrão 80)
+    FAKE_TSDB_JITTER_MS     variação aleatória da latência (padrão 40)
+    FAKE_TSDB_TAXA_ERRO     fração de respostas 503 (padrão 0)
+    FAKE_TSDB_TAXA_TIMEOUT  fração de respostas que "travam" 30 s (padrão 0)
+    FAKE_TSDB_V2_VAZIO      ids de liga (separados por vírgula) em que a V2 vem vazia
+"""
+
+import asyncio
+import os
+import random
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+LIGA_ID = "4351"
+LIGA_NOME = "Brazilian Serie A"
+OUTRA_LIGA_ID = "4328"
+OUTRA_LIGA_NOME = "English Premier League"
+TEMPORADA = str(date.today().year)
+
+TIMES: List[str] = [
+    "Flamengo",
+    "Palmeiras",
+    "São Paulo",
+    "Corinthians",
+    "Santos",
+    "Botafogo",
+    "Fluminense",
+    "Vasco da Gama",
+    "Grêmio",
+    "Internacional",
+    "Athletico-PR",
+    "Atlético-MG",
+    "Cruzeiro",
+    "Bahia",
+    "Fortaleza",
+    "Vitória",
+    "Cuiabá",
+    "RB Bragantino",
+    "Juventude",
+    "Criciúma",
+]
+TIMES_OUTRA_LIGA: List[str] = ["Arsenal", "Chelsea", "Liverpool", "Everton"]
+
+POSICOES = ["Goalkeeper", "Defender", "Midfielder", "Forward"]
+
+
+# ---------------------------------------------------
+# CONFIGURAÇÃO (latência / erros)
+# ---------------------------------------------------
+
+config = {
+    "latencia_ms": float(os.environ.get("FAKE_TSDB_LATENCIA_MS", 80)),
+    "jitter_ms": float(os.environ.get("FAKE_TSDB_JITTER_MS", 40)),
+    "taxa_erro": float(os.environ.get("FAKE_TSDB_TAXA_ERRO", 0)),
+    "taxa_timeout": float(os.environ.get("FAKE_TSDB_TAXA_TIMEOUT", 0)),
+    "v2_vazio": [x for x in os.environ.get("FAKE_TSDB_V2_VAZIO", "").split(",") if x],
+}
+
+contadores: Dict[str, int] = {}
+
+
+# ---------------------------------------------------
+# DADOS GERADOS (determinísticos)
+# ---------------------------------------------------
+
+
+def _badge(nome: str) -> str:
+    slug = nome.lower().replace(" ", "-")
+    return f"https://r2.thesportsdb.com/images/media/team/badge/{slug}.png"
+
+
+def _team_id(nome: str) -> str:
+    return str(134000 + (TIMES + TIMES_OUTRA_LIGA).index(nome))
+
+
+def _rodadas(times: List[str]) -> List[List[tuple]]:
+    """Turno e returno pelo método do círculo."""
+    n = len(times)
+    fixos = list(times)
+    rodadas = []
+    for r in range(n - 1):
+        jogos = []
+        for i in range(n // 2):
+            casa, fora = fixos[i], fixos[n - 1 - i]
+            jogos.append((casa, fora) if r % 2 == 0 else (fora, casa))
+        rodadas.append(jogos)
+        fixos = [fixos[0]] + [fixos[-1]] + fixos[1:-1]
+    return rodadas + [[(f, c) for c, f in jogos] for jogos in rodadas]
+
+
+def _gerar_eventos(liga_id: str, liga_nome: str, times: List[str], base_id: int) -> List[dict]:
+    hoje = date.today()
+    rodadas = _rodadas(times)
+    rodada_atual = len(rodadas) // 2 + 1
+
+    eventos = []
+    for numero, jogos in enumerate(rodadas, start=1):
+        dia = hoje + timedelta(days=(numero - rodada_atual) * 7)
+        for i, (casa, fora) in enumerate(jogos):
+            id_evento = str(base_id + numero * 100 + i)
+            rnd = random.Random(id_evento)
+            terminado = dia < hoje
+
+            eventos.append(
+                {
+                    "idEvent": id_evento,
+                    "idLeague": liga_id,
+                    "strLeague": liga_nome,
+                    "strSeason": TEMPORADA,
+                    "intRound": str(numero),
+                    "dateEvent": dia.isoformat(),
+                    "strTime": f"{16 + i % 6:02d}:00:00",
+                    "strVenue": f"Estádio {casa}",
+                    "strStatus": "Match Finished" if terminado else "Not Started",
+                    "idHomeTeam": _team_id(casa),
+                    "strHomeTeam": casa,
+                    "strHomeTeamBadge": _badge(casa),
+                    "idAwayTeam": _team_id(fora),
+                    "strAwayTeam": fora,
+                    "strAwayTeamBadge": _badge(fora),
+                    "intHomeScore": str(rnd.randint(0, 4)) if terminado else None,
+                    "intAwayScore": str(rnd.randint(0, 3)) if terminado else None,
+                }
+            )
+    return eventos
+
+
+EVENTOS = _gerar_eventos(LIGA_ID, LIGA_NOME, TIMES, 2380000) + _gerar_eventos(
+    OUTRA_LIGA_ID, OUTRA_LIGA_NOME, TIMES_OUTRA_LIGA, 2390000
+)
+EVENTOS_POR_ID = {ev["idEvent"]: ev for ev in EVENTOS}
+
+
+def _da_liga(liga_id: str) -> List[dict]:
+    return [ev for ev in EVENTOS if ev["idLeague"] == str(liga_id)]
+
+
+def _proximos(liga_id: str) -> List[dict]:
+    hoje = date.today().isoformat()
+    return [ev for ev in _da_liga(liga_id) if ev["dateEvent"] >= hoje][:15]
+
+
+def _anteriores(liga_id: str) -> List[dict]:
+    hoje = date.today().isoformat()
+    return [ev for ev in _da_liga(liga_id) if ev["dateEvent"] < hoje][-15:][::-1]
+
+
+def _ao_vivo() -> List[dict]:
+    """Jogos da próxima data de cada liga, com placar que muda com o relógio."""
+    agora = datetime.utcnow()
+    minuto = agora.minute + 1
+    ao_vivo = []
+
+    for liga_id in (LIGA_ID, OUTRA_LIGA_ID):
+        proximos = _proximos(liga_id)
+        if not proximos:
+            continue
+        data_rodada = proximos[0]["dateEvent"]
+
+        for ev in proximos:
+            if ev["dateEvent"] != data_rodada:
+                break
+            rnd = random.Random(f"{ev['idEvent']}-{agora.hour}")
+            ao_vivo.append(
+                dict(
+                    ev,
+                    strStatus="1H" if minuto <= 45 else "2H",
+                    strProgress=str(min(minuto, 90)),
+                    intHomeScore=str(sum(rnd.random() < 0.02 for _ in range(minuto))),
+                    intAwayScore=str(sum(rnd.random() < 0.015 for _ in range(minuto))),
+                )
+            )
+    return ao_vivo
+
+
+def _tabela(liga_id: str, temporada: Optional[str]) -> List[dict]:
+    linhas: Dict[str, dict] = {}
+
+    for ev in _da_liga(liga_id):
+        if ev["intHomeScore"] is None:
+            continue
+        gc, gf = int(ev["intHomeScore"]), int(ev["intAwayScore"])
+
+        for time_id, nome, pro, contra in (
+            (ev["idHomeTeam"], ev["strHomeTeam"], gc, gf),
+            (ev["idAwayTeam"], ev["strAwayTeam"], gf, gc),
+        ):
+            linha = linhas.setdefault(
+                time_id,
+                {
+                    "idTeam": time_id,
+                    "strTeam": nome,
+                    "strTeamBadge": _badge(nome),
+                    "intPlayed": 0,
+                    "intWin": 0,
+                    "intDraw": 0,
+                    "intLoss": 0,
+                    "intGoalsFor": 0,
+                    "intGoalsAgainst": 0,
+                    "intPoints": 0,
+                },
+            )
+            linha["intPlayed"] += 1
+            linha["intGoalsFor"] += pro
+            linha["intGoalsAgainst"] += contra
+            if pro > contra:
+                linha["intWin"] += 1
+                linha["intPoints"] += 3
+            elif pro == contra:
+                linha["intDraw"] += 1
+                linha["intPoints"] += 1
+            else:
+                linha["intLoss"] += 1
+
+    ordenadas = sorted(
+        linhas.values(),
+        key=lambda x: (x["intPoints"], x["intGoalsFor"] - x["intGoalsAgainst"], x["intGoalsFor"]),
+        reverse=True,
+    )
+    tabela = []
+    for posicao, linha in enumerate(ordenadas, start=1):
+        saldo = linha["intGoalsFor"] - linha["intGoalsAgainst"]
+        tabela.append(
+            {k: str(v) for k, v in linha.items()}
+            | {"intRank": str(posicao), "intGoalDifference": str(saldo), "strSeason": temporada or TEMPORADA}
+        )
+    return tabela
+
+
+def _jogadores(team_id: str) -> List[dict]:
+    nomes = {_team_id(t): t for t in TIMES + TIMES_OUTRA_LIGA}
+    time = nomes.get(str(team_id))
+    if time is None:
+        return []
+
+    return [
+        {
+            "idPlayer": f"{team_id}{n:02d}",
+            "strPlayer": f"Jogador {n} {time}",
+            "strTeam": time,
+            "strTeamBadge": _badge(time),
+            "strPosition": POSICOES[min(n // 7, 3)] if n > 1 else POSICOES[0],
+            "strNumber": str(n),
+            "strNationality": "Brazil",
+            "strCutout": f"https://r2.thesportsdb.com/images/media/player/cutout/{team_id}{n:02d}.png",
+        }
+        for n in range(1, 26)
+    ]
+
+
+# ---------------------------------------------------
+# APP
+# ---------------------------------------------------
+
+app = FastAPI(title="Fake TheSportsDB")
+
+
+@app.middleware("http")
+async def latencia_e_erros(request: Request, call_next):
+    if request.url.path.startswith("/_"):
+        return await call_next(request)
+
+    contadores[request.url.path] = contadores.get(request.url.path, 0) + 1
+
+    atraso = max(0.0, config["latencia_ms"] + random.uniform(-1, 1) * config["jitter_ms"]) / 1000
+    await asyncio.sleep(atraso)
+
+    sorteio = random.random()
+    if sorteio < config["taxa_timeout"]:
+        await asyncio.sleep(30)
+    if sorteio < config["taxa_erro"] + config["taxa_timeout"]:
+        return JSONResponse({"error": "Service Unavailable"}, status_code=503)
+
+    return await call_next(request)
+
+
+@app.get("/_config")
+def ver_config():
+    return {"config": config, "requisicoes": contadores}
+
+
+@app.post("/_config")
+def alterar_config(novos: dict):
+    config.update({k: v for k, v in novos.items() if k in config})
+    return config
+
+
+# -------------------- V1 (chave na URL) --------------------
+
+
+@app.get("/api/v1/json/{api_key}/search_all_leagues.php")
+def v1_ligas(api_key: str, c: str = "", s: str = ""):
+    ligas = [
+        {"idLeague": LIGA_ID, "strLeague": LIGA_NOME, "strCountry": "Brazil", "strSport": "Soccer"},
+        {"idLeague": OUTRA_LIGA_ID, "strLeague": OUTRA_LIGA_NOME, "strCountry": "England", "strSport": "Soccer"},
+    ]
+    return {"countries": [lg for lg in ligas if not c or lg["strCountry"].lower() == c.lower()]}
+
+
+@app.get("/api/v1/json/{api_key}/eventsnextleague.php")
+def v1_proximos(api_key: str, id: str):
+    return {"events": _proximos(id) or None}
+
+
+@app.get("/api/v1/json/{api_key}/eventslast.php")
+def v1_ultimos(api_key: str, id: str):
+    return {"results": _anteriores(id) or None}
+
+
+@app.get("/api/v1/json/{api_key}/lookuptable.php")
+def v1_tabela(api_key: str, l: str, s: Optional[str] = None):  # noqa: E741
+    return {"table": _tabela(l, s) or None}
+
+
+@app.get("/api/v1/json/{api_key}/lookup_all_teams.php")
+def v1_times(api_key: str, id: str):
+    times = TIMES if str(id) == LIGA_ID else TIMES_OUTRA_LIGA
+    return {"teams": [{"idTeam": _team_id(t), "strTeam": t, "strTeamBadge": _badge(t)} for t in times]}
+
+
+# -------------------- V2 (header X-API-KEY) --------------------
+
+
+@app.get("/api/v2/json/schedule/next/league/{liga_id}")
+def v2_proximos(liga_id: str):
+    if liga_id in config["v2_vazio"]:
+        return {"events": []}
+    return {"events": _proximos(liga_id)}
+
+
+@app.get("/api/v2/json/schedule/previous/league/{liga_id}")
+def v2_anteriores(liga_id: str):
+    if liga_id in config["v2_vazio"]:
+        return {"events": []}
+    return {"events": _anteriores(liga_id)}
+
+
+@app.get("/api/v2/json/livescore/soccer")
+def v2_ao_vivo():
+    return {"livescore": _ao_vivo()}
+
+
+@app.get("/api/v2/json/lookup/event/{event_id}")
+def v2_evento(event_id: str):
+    ev = EVENTOS_POR_ID.get(str(event_id))
+    return {"lookup": [ev] if ev else []}
+
+
+@app.get("/api/v2/json/list/players/{team_id}")
+def v2_jogadores(team_id: str):
+    return {"players": _jogadores(team_id)}
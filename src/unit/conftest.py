@@ -7,3 +7,17 @@ ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 sys.path.insert(0, ROOT_DIR)
 
 # Nada de fixtures async ou banco aqui!
+
+
+import pytest  # noqa: E402
+
+
+# Snapshots da TheSportsDB num arquivo temporário por teste, nunca no diretório atual
+@pytest.fixture(autouse=True)
+def snapshots_em_tmp(tmp_path, monkeypatch):
+    from src.partidas.snapshot import snapshots
+
+    snapshots.close()
+    monkeypatch.setattr(snapshots, "caminho", str(tmp_path / "snapshots.db"))
+    yield snapshots
+    snapshots.close()
@@ -0,0 +1,42 @@
+import pytest
+from pydantic import ValidationError
+
+from src.config import Settings
+
+OBRIGATORIAS = {
+    "DATABASE_URL": "sqlite://",
+    "JWT_SECRET": "x",
+    "THESPORTSDB_API_KEY": "123",
+    "THESPORTSDB_DEFAULT_LEAGUE_ID": 4351,
+    "THESPORTSDB_DEFAULT_SEASON": "2024",
+}
+
+
+def _settings(**kwargs) -> Settings:
+    return Settings(_env_file=None, **OBRIGATORIAS, **kwargs)
+
+
+def test_base_v2_derivada_da_v1():
+    s = _settings(THESPORTSDB_BASE_URL="http://localhost:9000/api/v1/json/")
+
+    assert s.THESPORTSDB_BASE_URL == "http://localhost:9000/api/v1/json"
+    assert s.THESPORTSDB_V2_BASE_URL == "http://localhost:9000/api/v2/json"
+
+
+def test_base_v2_explicita_vence():
+    s = _settings(
+        THESPORTSDB_BASE_URL="http://fake/v1",
+        THESPORTSDB_V2_BASE_URL="http://fake/v2/",
+    )
+
+    assert s.THESPORTSDB_V2_BASE_URL == "http://fake/v2"
+
+
+def test_base_v1_fora_do_padrao_exige_v2():
+    with pytest.raises(ValidationError, match="THESPORTSDB_V2_BASE_URL"):
+        _settings(THESPORTSDB_BASE_URL="http://fake/v1")
+
+
+def test_base_v2_precisa_ser_url():
+    with pytest.raises(ValidationError, match="http"):
+        _settings(THESPORTSDB_BASE_URL="http://fake/api/v1/json", THESPORTSDB_V2_BASE_URL="fake/v2")
@@ -19,6 +19,7 @@ class MockPalpite:
         self.usuario_id = usuario_id
         self.partida_id = partida_id
         self.palpite = palpite
+        self.gols_casa, self.gols_fora = (int(g) for g in palpite.split("x"))
         self.acertou = None
         self.created_at = datetime.utcnow()
 
@@ -152,3 +153,17 @@ def test_processar_automatico(mocker, db_session):
     assert result == []  # backend real sempre retorna []
 
 
+def test_processar_automatico_resolve_placares_em_lote(mocker, db_session):
+    placar = DummyPartida(99, "Finished", 2, 1)
+    mocker.patch("src.palpites.service.get_partidas_com_palpites_pendentes", return_value=["99", "100"])
+    mock_resolver = mocker.patch("src.palpites.service.resolver_resultados", return_value={"99": placar})
+    mock_avaliar = mocker.patch(
+        "src.palpites.service.avaliar_palpites_da_partida",
+        return_value={"partida_id": "99", "processados": 2, "acertos": 1, "moedas_creditadas": 100},
+    )
+
+    result = processar_palpites_automaticamente(db_session)
+
+    mock_resolver.assert_called_once_with(["99", "100"])
+    mock_avaliar.assert_called_once_with(db_session, "99", resultado=placar)
+    assert result == [{"partida": "99", "processados": 2}]
@@ -0,0 +1,140 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from src.partidas.breaker import CircuitBreaker, CircuitoAbertoError, ProtecaoUpstream, familia_do_endpoint
+
+
+@pytest.fixture
+def protecao():
+    return ProtecaoUpstream(limite_falhas=3, tempo_aberto=30, timeout_min=1.0, timeout_max=15.0, fator=2.0)
+
+
+def _falhar(timeout):
+    raise ConnectionError("upstream fora")
+
+
+def test_familias_de_endpoint():
+    assert familia_do_endpoint("schedule/next/league/4351") == "schedule"
+    assert familia_do_endpoint("eventslast.php") == "schedule"
+    assert familia_do_endpoint("lookup/event/1") == "lookup"
+    assert familia_do_endpoint("livescore/soccer") == "livescore"
+    assert familia_do_endpoint("list/players/134") == "list/players"
+    assert familia_do_endpoint("search_all_leagues.php") == "outros"
+
+
+def test_abre_apos_falhas_seguidas_e_falha_rapido(protecao):
+    for _ in range(3):
+        with pytest.raises(ConnectionError):
+            protecao.executar("livescore/soccer", _falhar)
+
+    chamada = MagicMock()
+    with pytest.raises(CircuitoAbertoError):
+        protecao.executar("livescore/soccer", chamada)
+
+    chamada.assert_not_called()
+    assert protecao.stats()["livescore"]["estado"] == CircuitBreaker.ABERTO
+
+    # outras famílias não são afetadas
+    assert protecao.executar("lookuptable.php", lambda timeout: {"table": []}) == {"table": []}
+
+
+def test_meio_aberto_deixa_uma_requisicao_de_teste(mocker):
+    agora = [100.0]
+    mocker.patch("src.partidas.breaker.time.monotonic", side_effect=lambda: agora[0])
+    breaker = CircuitBreaker(limite_falhas=1, tempo_aberto=10)
+
+    breaker.falha()
+    assert breaker.permitir() is False
+
+    agora[0] += 11
+    assert breaker.permitir() is True
+    assert breaker.permitir() is False
+
+    breaker.sucesso()
+    assert breaker.estado == CircuitBreaker.FECHADO
+    assert breaker.permitir() is True
+
+
+def test_erro_4xx_nao_abre_circuito(protecao):
+    erro = Exception("404")
+    erro.response = MagicMock(status_code=404)
+
+    def nao_encontrado(timeout):
+        raise erro
+
+    for _ in range(5):
+        with pytest.raises(Exception):
+            protecao.executar("lookup/event/1", nao_encontrado)
+
+    assert protecao.stats()["lookup"]["estado"] == CircuitBreaker.FECHADO
+
+
+def test_timeout_se_adapta_ao_p99(protecao):
+    familia = protecao.familia("lookuptable.php")
+    assert familia.timeout_leitura() == 15.0
+
+    for _ in range(30):
+        familia.latencia.registrar(0.8)
+
+    assert familia.timeout_leitura() == pytest.approx(1.6)
+    assert familia.latencia.histograma()["<=1000ms"] == 30
+
+
+def test_executar_repassa_timeout_adaptativo(protecao):
+    familia = protecao.familia("livescore/soccer")
+    for _ in range(30):
+        familia.latencia.registrar(2.0)
+
+    recebido = []
+    protecao.executar("livescore/soccer", lambda timeout: recebido.append(timeout))
+
+    assert recebido == [pytest.approx(4.0)]
+
+
+@pytest.mark.asyncio
+async def test_aexecutar_registra_latencia(protecao):
+    async def chamada(timeout):
+        return {"events": []}
+
+    assert await protecao.aexecutar("schedule/next/league/1", chamada) == {"events": []}
+    assert len(protecao.familia("schedule/").latencia.amostras) == 1
+
+
+def test_timeout_volta_a_crescer_quando_o_upstream_fica_lento(mocker):
+    relogio = {"perf": 0.0, "mono": 100.0}
+    mocker.patch("src.partidas.breaker.time.perf_counter", side_effect=lambda: relogio["perf"])
+    mocker.patch("src.partidas.breaker.time.monotonic", side_effect=lambda: relogio["mono"])
+    protecao = ProtecaoUpstream(limite_falhas=2, tempo_aberto=30, timeout_min=1.0, timeout_max=15.0, fator=2.0)
+
+    latencia = {"atual": 0.05}
+
+    def chamada(timeout):
+        # simula o upstream: responde em `latencia`, ou estoura o timeout
+        if latencia["atual"] > timeout:
+            relogio["perf"] += timeout
+            raise TimeoutError("read timeout")
+        relogio["perf"] += latencia["atual"]
+        return "ok"
+
+    for _ in range(30):
+        protecao.executar("lookup/event/1", chamada)
+    familia = protecao.familia("lookup/")
+    assert familia.timeout_leitura() == 1.0
+
+    # upstream passa de 50 ms para 3 s: as chamadas estouram e abrem o circuito
+    latencia["atual"] = 3.0
+    for timeout in (1.0, 2.0):
+        assert familia.timeout_leitura() == pytest.approx(timeout)
+        with pytest.raises(TimeoutError):
+            protecao.executar("lookup/event/1", chamada)
+    assert familia.breaker.estado == CircuitBreaker.ABERTO
+
+    # o teste do meio-aberto usa timeout_max, passa e fecha o circuito
+    relogio["mono"] += 31
+    assert protecao.executar("lookup/event/1", chamada) == "ok"
+    assert familia.breaker.estado == CircuitBreaker.FECHADO
+
+    # as amostras lentas (timeouts + sucesso de 3 s) levaram o p99 junto
+    assert familia.timeout_leitura() == pytest.approx(6.0)
+    assert protecao.executar("lookup/event/1", chamada) == "ok"
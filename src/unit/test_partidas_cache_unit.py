@@ -0,0 +1,135 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+import src.partidas.repository as repository
+from src.partidas.cache import TTLCache
+from src.partidas.snapshot import SnapshotStore
+
+
+# ----------------------------------------------------------
+# TTL / LRU
+# ----------------------------------------------------------
+def test_cache_expira_apos_ttl(mocker):
+    agora = [1000.0]
+    mocker.patch("src.partidas.cache.time.monotonic", side_effect=lambda: agora[0])
+
+    cache = TTLCache(maxsize=10)
+    cache.set("a", 1, ttl=5)
+
+    assert cache.get("a") == 1
+
+    agora[0] += 6
+    assert cache.get("a") is None
+
+
+def test_cache_lru_remove_mais_antigo():
+    cache = TTLCache(maxsize=2)
+    cache.set("a", 1, ttl=60)
+    cache.set("b", 2, ttl=60)
+
+    # "a" passa a ser o mais recente
+    cache.get("a")
+    cache.set("c", 3, ttl=60)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+
+def test_cache_nao_guarda_excecao():
+    cache = TTLCache()
+    chamadas = []
+
+    def loader():
+        chamadas.append(1)
+        raise RuntimeError("upstream fora")
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_load("k", 60, loader)
+    with pytest.raises(RuntimeError):
+        cache.get_or_load("k", 60, loader)
+
+    assert len(chamadas) == 2
+
+
+# ----------------------------------------------------------
+# SINGLE-FLIGHT
+# ----------------------------------------------------------
+def test_cache_coalesce_chamadas_concorrentes():
+    cache = TTLCache()
+    chamadas = []
+    liberar = threading.Event()
+
+    def loader():
+        chamadas.append(1)
+        liberar.wait(timeout=5)
+        return {"events": []}
+
+    resultados = []
+    threads = [
+        threading.Thread(target=lambda: resultados.append(cache.get_or_load("k", 60, loader))) for _ in range(10)
+    ]
+    for t in threads:
+        t.start()
+
+    time.sleep(0.1)
+    liberar.set()
+    for t in threads:
+        t.join()
+
+    assert len(chamadas) == 1
+    assert resultados == [{"events": []}] * 10
+
+
+def test_get_v1_usa_cache(mocker):
+    mocker.patch.object(repository, "_cache", TTLCache())
+    mocker.patch.object(repository, "snapshots", SnapshotStore("", max_idade=0, ttl_stale=0))
+    mock_req = mocker.patch("src.partidas.repository._requisitar", return_value={"table": []})
+
+    repository._get_v1("lookuptable.php", {"l": "4351", "s": "2024"})
+    repository._get_v1("lookuptable.php", {"s": "2024", "l": "4351"})
+
+    mock_req.assert_called_once()
+
+
+def test_get_v2_usa_cache(mocker):
+    mocker.patch.object(repository, "_cache", TTLCache())
+    mocker.patch.object(repository, "snapshots", SnapshotStore("", max_idade=0, ttl_stale=0))
+    mock_req = mocker.patch("src.partidas.repository._requisitar", return_value={"schedule": []})
+
+    repository._get_v2("schedule/next/league/4351")
+    repository._get_v2("/schedule/next/league/4351")
+
+    mock_req.assert_called_once()
+    url, params, headers, _ = mock_req.call_args.args
+    assert url == f"{repository.V2_BASE_URL}/schedule/next/league/4351"
+    assert headers == {"X-API-KEY": repository.API_KEY}
+
+    # outro path é outra chave
+    repository._get_v2("schedule/next/league/4328")
+    assert mock_req.call_count == 2
+
+
+def test_ttl_por_endpoint():
+    assert repository._ttl_para("livescore/soccer") < repository._ttl_para("lookuptable.php")
+    assert repository._ttl_para("list/players/134") > repository._ttl_para("schedule/next/league/1")
+
+
+@pytest.mark.asyncio
+async def test_aget_or_load_coalesce_chamadas_concorrentes():
+    cache = TTLCache()
+    chamadas = []
+
+    async def loader():
+        chamadas.append(1)
+        await asyncio.sleep(0.05)
+        return {"players": []}
+
+    resultados = await asyncio.gather(*[cache.aget_or_load("k", 60, loader) for _ in range(20)])
+
+    assert len(chamadas) == 1
+    assert all(r == {"players": []} for r in resultados)
+    assert cache.get("k") == {"players": []}
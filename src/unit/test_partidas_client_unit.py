@@ -0,0 +1,35 @@
+from unittest.mock import MagicMock
+
+from src.partidas.client import TheSportsDBClient
+
+
+def _client():
+    return TheSportsDBClient(pool_connections=2, pool_maxsize=20, connect_timeout=1.5, read_timeout=9)
+
+
+def test_client_reaproveita_session():
+    client = _client()
+
+    assert client.session is client.session
+
+    adapter = client.session.get_adapter("https://www.thesportsdb.com")
+    assert adapter._pool_maxsize == 20
+
+
+def test_client_usa_timeouts_separados(mocker):
+    client = _client()
+    resp = MagicMock()
+    resp.json.return_value = {"events": []}
+    mock_get = mocker.patch.object(client.session, "get", return_value=resp)
+
+    assert client.get_json("https://x/api", params={"id": 1}) == {"events": []}
+    assert mock_get.call_args.kwargs["timeout"] == (1.5, 9)
+
+
+def test_client_close_descarta_session():
+    client = _client()
+    antiga = client.session
+
+    client.close()
+
+    assert client.session is not antiga
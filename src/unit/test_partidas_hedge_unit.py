@@ -0,0 +1,95 @@
+import asyncio
+
+import pytest
+
+import src.partidas.async_repository as async_repository
+from src.partidas.hedge import EstatisticasHedge
+
+
+@pytest.fixture
+def stats(mocker):
+    stats = EstatisticasHedge(janela=10, min_amostras=3, limiar=0.8, explorar_a_cada=100)
+    mocker.patch.object(async_repository, "hedge_stats", stats)
+    return stats
+
+
+def _fontes(chamadas, v2_eventos, v1_eventos, atraso_v2=0.0, atraso_v1=0.0):
+    async def v2():
+        chamadas.append("v2")
+        await asyncio.sleep(atraso_v2)
+        return v2_eventos
+
+    async def v1():
+        chamadas.append("v1")
+        await asyncio.sleep(atraso_v1)
+        return v1_eventos
+
+    return {"v2": v2, "v1": v1}
+
+
+@pytest.mark.asyncio
+async def test_corrida_fica_com_primeira_resposta_nao_vazia(stats):
+    chamadas = []
+    fontes = _fontes(chamadas, [], [{"idEvent": "1"}], atraso_v2=0.0, atraso_v1=0.01)
+
+    events = await async_repository._corrida("proximas", "4351", fontes)
+
+    assert events == [{"idEvent": "1"}]
+    assert sorted(chamadas) == ["v1", "v2"]
+    assert stats.stats()[0]["vitorias"]["v1"] == 1
+
+
+@pytest.mark.asyncio
+async def test_corrida_cancela_a_mais_lenta(stats):
+    cancelada = asyncio.Event()
+
+    async def v2():
+        return [{"idEvent": "2"}]
+
+    async def v1():
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelada.set()
+            raise
+
+    events = await async_repository._corrida("proximas", "4351", {"v2": v2, "v1": v1})
+    await asyncio.sleep(0)
+
+    assert events == [{"idEvent": "2"}]
+    assert cancelada.is_set()
+
+
+@pytest.mark.asyncio
+async def test_aprende_versao_vencedora_e_pula_a_outra(stats):
+    for _ in range(3):
+        await async_repository._corrida("resultados", "4351", _fontes([], [], [{"idEvent": "1"}]))
+
+    chamadas = []
+    await async_repository._corrida("resultados", "4351", _fontes(chamadas, [], [{"idEvent": "1"}]))
+
+    assert chamadas == ["v1"]
+    assert stats.stats()[0]["preferida"] == "v1"
+    assert stats.stats()[0]["chamadas_evitadas"] == 1
+
+
+@pytest.mark.asyncio
+async def test_preferida_vazia_cai_para_a_outra(stats):
+    for _ in range(3):
+        stats.registrar("proximas", "1", "v2")
+
+    chamadas = []
+    events = await async_repository._corrida("proximas", "1", _fontes(chamadas, [], [{"idEvent": "9"}]))
+
+    assert chamadas == ["v2", "v1"]
+    assert events == [{"idEvent": "9"}]
+
+
+def test_ordem_sequencial_segue_aprendizado():
+    stats = EstatisticasHedge(min_amostras=2)
+    assert stats.ordem("proximas", "1") == ["v2", "v1"]
+
+    stats.registrar("proximas", "1", "v1")
+    stats.registrar("proximas", "1", "v1")
+
+    assert stats.ordem("proximas", "1") == ["v1", "v2"]
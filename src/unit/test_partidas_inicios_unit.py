@@ -0,0 +1,109 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from src.partidas.inicios import InicioPartidas
+
+AGORA = datetime(2025, 6, 1, 18, 0, 0)
+
+
+def _cache(**kwargs):
+    return InicioPartidas(intervalo=60, fechamento=timedelta(minutes=kwargs.pop("fechamento", 0)), **kwargs)
+
+
+def test_fecha_no_inicio_da_partida():
+    cache = _cache(fechamento=5, buscar=lambda partida_id: None)
+    cache.registrar([("1", AGORA + timedelta(minutes=10)), ("2", AGORA + timedelta(minutes=3))], agora=AGORA)
+
+    assert cache.aceita_palpite(1, agora=AGORA) is True
+    assert cache.aceita_palpite("2", agora=AGORA) is False
+
+
+def _sem_upstream(partida_id):
+    raise AssertionError("lookup no caminho de escrita")
+
+
+def test_partida_desconhecida_e_recusada_sem_consultar_o_upstream():
+    cache = _cache(buscar=_sem_upstream)
+
+    assert cache.aceita_palpite("999", agora=AGORA) is False
+    assert cache.aceita_palpite(999, agora=AGORA) is False
+    assert cache.stats()["pendentes"] == 1
+
+
+def test_pendente_resolvida_em_background_entra_no_indice():
+    inicios = {"passada": AGORA - timedelta(days=30), "futura": AGORA + timedelta(days=2)}
+    cache = _cache(buscar=inicios.get)
+    assert cache.aceita_palpite("passada", agora=AGORA) is False
+    assert cache.aceita_palpite("futura", agora=AGORA) is False
+
+    assert cache.resolver_pendentes(agora=AGORA) == 2
+
+    # partida antiga (já terminou) continua sem aceitar palpite
+    assert cache.aceita_palpite("passada", agora=AGORA) is False
+    assert cache.aceita_palpite("futura", agora=AGORA) is True
+    assert cache.stats()["pendentes"] == 0
+
+
+def test_resposta_negativa_fica_em_cache_ate_a_espera():
+    buscas = []
+
+    def buscar(partida_id):
+        buscas.append(partida_id)
+        return None
+
+    cache = _cache(buscar=buscar, espera_desconhecida=timedelta(minutes=10))
+    cache.aceita_palpite("999", agora=AGORA)
+    cache.resolver_pendentes(agora=AGORA)
+
+    # dentro da espera, nem volta para a fila
+    assert cache.aceita_palpite("999", agora=AGORA + timedelta(minutes=5)) is False
+    assert cache.resolver_pendentes(agora=AGORA + timedelta(minutes=5)) == 0
+    assert buscas == ["999"]
+
+    # passada a espera, consulta de novo
+    assert cache.aceita_palpite("999", agora=AGORA + timedelta(minutes=11)) is False
+    cache.resolver_pendentes(agora=AGORA + timedelta(minutes=11))
+    assert buscas == ["999", "999"]
+
+
+def test_falha_no_upstream_mantem_a_partida_na_fila():
+    def fora(partida_id):
+        raise ConnectionError("upstream fora")
+
+    cache = _cache(buscar=fora)
+    cache.aceita_palpite("5", agora=AGORA)
+
+    assert cache.resolver_pendentes(agora=AGORA) == 0
+    assert cache.stats()["desconhecidas"] == 0
+    assert cache.stats()["pendentes"] == 1
+
+
+def test_registrar_mantem_partidas_iniciadas_ate_a_retencao():
+    cache = _cache(retencao=timedelta(days=1))
+    cache.registrar([("1", AGORA - timedelta(hours=2)), ("2", AGORA - timedelta(days=2))], agora=AGORA)
+
+    # "1" saiu do calendário (já começou), mas continua bloqueada
+    cache.registrar([("3", AGORA + timedelta(days=1)), ("4", None)], agora=AGORA)
+
+    assert cache.inicio("1") == AGORA - timedelta(hours=2)
+    assert cache.inicio("2") is None
+    assert cache.inicio("3") == AGORA + timedelta(days=1)
+    assert cache.inicio("4") is None
+    assert cache.aceita_palpite("1", agora=AGORA) is False
+
+
+def test_atualizar_le_o_calendario_das_ligas(mocker):
+    mocker.patch("src.partidas.inicios.ligas_monitoradas", return_value=["4351", "4328"])
+    proximas = mocker.patch(
+        "src.partidas.inicios.get_proximas_partidas_league",
+        side_effect=lambda liga, limit: [
+            SimpleNamespace(id_partida=f"{liga}-1", data="2030-06-01", horario="19:30:00+00:00")
+        ],
+    )
+
+    cache = _cache()
+    cache.atualizar()
+
+    assert proximas.call_count == 2
+    assert cache.inicio("4351-1") == datetime(2030, 6, 1, 19, 30)
+    assert cache.stats()["partidas"] == 2
@@ -0,0 +1,100 @@
+import pytest
+
+import src.partidas.service as service
+from src.partidas.live import LivePoller, calcular_diff
+
+EVENTOS = [
+    {"idLeague": "4351", "idEvent": "1", "strHomeTeam": "Bahia", "intHomeScore": 1, "intAwayScore": 0},
+    {"idLeague": "4351", "idEvent": "2", "strHomeTeam": "Vasco", "intHomeScore": 0, "intAwayScore": 0},
+    {"idLeague": "4328", "idEvent": "3", "strHomeTeam": "Arsenal", "intHomeScore": 2, "intAwayScore": 2},
+]
+
+
+@pytest.mark.asyncio
+async def test_poller_indexa_eventos_por_liga(mocker):
+    mock_fetch = mocker.patch(
+        "src.partidas.live.async_repository.fetch_live_matches",
+        new=mocker.AsyncMock(return_value=EVENTOS),
+    )
+    poller = LivePoller(intervalo=60)
+
+    assert poller.pronto is False
+
+    await poller.atualizar()
+
+    mock_fetch.assert_awaited_once_with(forcar=True)
+    assert poller.pronto is True
+    assert [p["idEvent"] for p in poller.partidas("4351")] == ["1", "2"]
+    assert poller.partidas(4328)[0]["placar"] == "2 - 2"
+    assert poller.partidas("999") == []
+
+
+@pytest.mark.asyncio
+async def test_ao_vivo_async_le_do_poller_sem_chamar_api(mocker):
+    poller = LivePoller(intervalo=60)
+    mocker.patch(
+        "src.partidas.live.async_repository.fetch_live_matches",
+        new=mocker.AsyncMock(return_value=EVENTOS),
+    )
+    await poller.atualizar()
+
+    mocker.patch.object(service, "live_poller", poller)
+    mock_api = mocker.patch(
+        "src.partidas.service.async_repository.fetch_live_matches",
+        new=mocker.AsyncMock(return_value=[]),
+    )
+
+    result = await service.get_partidas_ao_vivo_async("4328")
+
+    assert [p["idEvent"] for p in result] == ["3"]
+    mock_api.assert_not_awaited()
+
+
+# ----------------------------------------------------------
+# diffs / SSE
+# ----------------------------------------------------------
+def test_calcular_diff_so_o_que_mudou():
+    antes = [
+        {"idEvent": "1", "placar": "0 - 0", "status": "1H"},
+        {"idEvent": "2", "placar": "1 - 1", "status": "2H"},
+        {"idEvent": "3", "placar": "2 - 0", "status": "2H"},
+    ]
+    depois = [
+        {"idEvent": "1", "placar": "1 - 0", "status": "1H"},
+        {"idEvent": "2", "placar": "1 - 1", "status": "2H"},
+        {"idEvent": "4", "placar": "0 - 0", "status": "1H"},
+    ]
+
+    diff = calcular_diff(antes, depois)
+
+    assert [(d["tipo"], d["partida"]["idEvent"]) for d in diff] == [
+        ("atualizado", "1"),
+        ("novo", "4"),
+        ("encerrado", "3"),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_diff_calculado_uma_vez_e_entregue_a_todos(mocker):
+    poller = LivePoller(intervalo=60)
+    mock_fetch = mocker.patch("src.partidas.live.async_repository.fetch_live_matches", new=mocker.AsyncMock())
+
+    mock_fetch.return_value = EVENTOS
+    await poller.atualizar()
+
+    fila_a = poller.assinar("4351")
+    fila_b = poller.assinar("4351")
+    fila_outra = poller.assinar("4328")
+
+    mock_fetch.return_value = [dict(EVENTOS[0], intHomeScore=2)] + EVENTOS[1:]
+    await poller.atualizar()
+
+    msg_a = fila_a.get_nowait()
+    assert msg_a is fila_b.get_nowait()
+    assert msg_a.startswith("event: diff")
+    assert '"2 - 0"' in msg_a
+    assert fila_outra.empty()
+
+    poller.cancelar("4351", fila_a)
+    poller.cancelar("4351", fila_b)
+    assert poller.stats()["assinantes"] == 1
@@ -115,3 +115,81 @@ def test_obter_resultado_partida_por_id(mocker):
 
     assert result == fake_partida
     mock_repo.assert_called_once_with("55")
+
+
+# ----------------------------------------------------------
+# versões assíncronas
+# ----------------------------------------------------------
+@pytest.mark.asyncio
+async def test_get_partidas_ao_vivo_async(mocker):
+    fake_events = [
+        {"idLeague": "999", "idEvent": "1", "strHomeTeam": "Bahia", "intHomeScore": 2, "intAwayScore": 2},
+        {"idLeague": "111", "idEvent": "2", "strHomeTeam": "Outro"},
+    ]
+    mocker.patch(
+        "src.partidas.service.async_repository.fetch_live_matches",
+        new=mocker.AsyncMock(return_value=fake_events),
+    )
+
+    result = await service.get_partidas_ao_vivo_async("999")
+
+    assert [r["idEvent"] for r in result] == ["1"]
+    assert result[0]["placar"] == "2 - 2"
+
+
+@pytest.mark.asyncio
+async def test_get_proximas_partidas_league_async(mocker):
+    mock_repo = mocker.patch(
+        "src.partidas.service.async_repository.get_proximas_partidas_league",
+        new=mocker.AsyncMock(return_value=["p1", "p2", "p3"]),
+    )
+
+    result = await service.get_proximas_partidas_league_async("1234", limit=2)
+
+    assert result == ["p1", "p2"]
+    mock_repo.assert_awaited_once_with("1234")
+
+
+# ----------------------------------------------------------
+# resolver_resultados (apuração em lote)
+# ----------------------------------------------------------
+def _resultado(event_id, casa=None, fora=None):
+    return MagicMock(id_partida=event_id, placar_casa=casa, placar_fora=fora)
+
+
+def test_resolver_resultados_usa_feed_da_liga_e_lookup_so_do_que_falta(mocker):
+    feed = [_resultado("1", 2, 1), _resultado("2", None, None), _resultado("99", 0, 0)]
+    mock_feed = mocker.patch("src.partidas.service.repository.get_ultimos_resultados", return_value=feed)
+    mock_lookup = mocker.patch(
+        "src.partidas.service.get_partida_por_id",
+        side_effect=lambda event_id: _resultado(event_id, 1, 1) if event_id == "3" else None,
+    )
+
+    resolvidos = service.resolver_resultados(["1", "2", "3", "4"], ligas=["4351"])
+
+    assert sorted(resolvidos) == ["1", "3"]
+    mock_feed.assert_called_once_with("4351", limit=None)
+    # "2" apareceu no feed (ainda sem placar): não precisa de lookup
+    assert sorted(c.args[0] for c in mock_lookup.call_args_list) == ["3", "4"]
+
+
+def test_resolver_resultados_lookup_com_erro_nao_derruba_o_lote(mocker):
+    mocker.patch("src.partidas.service.repository.get_ultimos_resultados", return_value=[])
+
+    def lookup(event_id):
+        if event_id == "1":
+            raise ConnectionError("timeout")
+        return _resultado(event_id, 3, 0)
+
+    mocker.patch("src.partidas.service.get_partida_por_id", side_effect=lookup)
+
+    resolvidos = service.resolver_resultados(["1", "2"], ligas=["4351"], concorrencia=2)
+
+    assert list(resolvidos) == ["2"]
+
+
+def test_resolver_resultados_vazio_nao_chama_api(mocker):
+    mock_feed = mocker.patch("src.partidas.service.repository.get_ultimos_resultados")
+
+    assert service.resolver_resultados([]) == {}
+    mock_feed.assert_not_called()
@@ -0,0 +1,76 @@
+import pytest
+
+import src.partidas.repository as repository
+from src.partidas.cache import TTLCache
+from src.partidas.snapshot import SnapshotStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = SnapshotStore(str(tmp_path / "snapshots.db"), max_idade=3600, ttl_stale=5)
+    yield store
+    store.close()
+
+
+@pytest.fixture
+def repo(mocker, store):
+    mocker.patch.object(repository, "snapshots", store)
+    mocker.patch.object(repository, "_cache", TTLCache())
+    return repository
+
+
+def test_resposta_gravada_e_usada_por_worker_novo(repo, mocker):
+    mock_req = mocker.patch("src.partidas.repository._requisitar", return_value={"table": [{"idTeam": "1"}]})
+
+    repo._get_v1("lookuptable.php", {"l": "4351", "s": "2024"})
+
+    # worker novo: cache em memória vazio, mas o snapshot está dentro do TTL
+    mocker.patch.object(repository, "_cache", TTLCache())
+    data = repo._get_v1("lookuptable.php", {"l": "4351", "s": "2024"})
+
+    assert data == {"table": [{"idTeam": "1"}]}
+    mock_req.assert_called_once()
+    assert repo.snapshots.stats()["servidos_do_disco"] == 1
+
+
+def test_api_fora_serve_snapshot_vencido(repo, store, mocker):
+    chave = repository._chave_cache(repository._url_v2("livescore/soccer"), {})
+    store.put(chave, {"events": [{"idEvent": "7"}]})
+
+    mocker.patch("src.partidas.snapshot.time.time", return_value=store.get(chave).salvo_em + 600)
+    mocker.patch("src.partidas.repository._requisitar", side_effect=TimeoutError("upstream lento"))
+
+    assert repo.fetch_live_matches() == [{"idEvent": "7"}]
+    assert store.stats()["servidos_stale"] == 1
+
+
+def test_api_fora_sem_snapshot_propaga_erro(repo, mocker):
+    mocker.patch("src.partidas.repository._requisitar", side_effect=TimeoutError("upstream lento"))
+
+    with pytest.raises(TimeoutError):
+        repo.fetch_live_matches()
+
+
+@pytest.mark.asyncio
+async def test_acarregar_serve_stale_quando_api_falha(store, mocker):
+    store.put("k", {"players": []})
+    mocker.patch("src.partidas.snapshot.time.time", return_value=store.get("k").salvo_em + 600)
+
+    async def buscar():
+        raise ConnectionError("fora do ar")
+
+    resultado = await store.acarregar("k", 60, buscar)
+
+    assert resultado.valor == {"players": []}
+    assert resultado.ttl == 5
+
+
+def test_caminho_relativo_vem_da_raiz_do_projeto(monkeypatch, tmp_path):
+    from src.partidas import snapshot
+
+    monkeypatch.setattr(snapshot.settings, "PARTIDAS_SNAPSHOT_PATH", "snaps.db")
+    monkeypatch.chdir(tmp_path)
+    assert SnapshotStore.from_settings().caminho == str(snapshot.RAIZ_DO_PROJETO / "snaps.db")
+
+    monkeypatch.setattr(snapshot.settings, "PARTIDAS_SNAPSHOT_PATH", "")
+    assert not SnapshotStore.from_settings().ativo
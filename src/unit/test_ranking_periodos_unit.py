@@ -0,0 +1,48 @@
+from datetime import date, datetime
+
+import pytest
+
+from src.config import settings
+from src.ranking import periodos
+
+
+@pytest.fixture
+def sao_paulo_domingo(monkeypatch):
+    monkeypatch.setattr(settings, "RANKING_FUSO", "America/Sao_Paulo")
+    monkeypatch.setattr(settings, "RANKING_INICIO_SEMANA", 6)
+
+
+def test_periodo_em_utc_com_semana_na_segunda():
+    # quarta-feira
+    momento = datetime(2025, 6, 4, 12, 0)
+
+    assert periodos.periodos_de(momento) == [
+        ("geral", date(1970, 1, 1)),
+        ("mensal", date(2025, 6, 1)),
+        ("semanal", date(2025, 6, 2)),
+    ]
+
+
+def test_fuso_e_inicio_da_semana_configuraveis(sao_paulo_domingo):
+    # 1º de junho, 02:00 UTC ainda é 31 de maio (sábado) em São Paulo
+    momento = datetime(2025, 6, 1, 2, 0)
+
+    assert periodos.inicio_do_periodo("mensal", momento) == date(2025, 5, 1)
+    assert periodos.inicio_do_periodo("semanal", momento) == date(2025, 5, 25)
+
+
+def test_intervalo_utc_e_meio_aberto_no_fuso(sao_paulo_domingo):
+    desde, ate = periodos.intervalo_utc("mensal", date(2025, 12, 1))
+
+    assert (desde, ate) == (datetime(2025, 12, 1, 3, 0), datetime(2026, 1, 1, 3, 0))
+    assert periodos.intervalo_utc("semanal", date(2025, 5, 25)) == (
+        datetime(2025, 5, 25, 3, 0),
+        datetime(2025, 6, 1, 3, 0),
+    )
+    assert periodos.intervalo_utc("geral", periodos.INICIO_GERAL) == (None, None)
+
+
+def test_mesmo_mes_de_anos_diferentes_sao_periodos_distintos():
+    assert periodos.inicio_do_periodo("mensal", datetime(2024, 6, 10)) != periodos.inicio_do_periodo(
+        "mensal", datetime(2025, 6, 10)
+    )
@@ -1,20 +1,26 @@
+import json
+from datetime import date
+
 import pytest
 from unittest.mock import MagicMock
 
 import src.ranking.service as service
+from src.ranking.repository import PONTOS_POR_ACERTO
 from src.ranking.schema import RankingItem
+from src.ranking.snapshot import LinhaRanking, RetratoRanking, SnapshotsRanking
 
 
 # -------------------------------------------------------
 # Helpers para montar rows simulados do banco
 # -------------------------------------------------------
 class DummyRow:
-    def __init__(self, id, nome, coins, total, acertos):
+    def __init__(self, id, nome, coins, total, acertos, posicao=1):
         self.id = id
         self.nome = nome
-        self.coins = coins
+        self.pontos = coins if coins is not None else acertos * PONTOS_POR_ACERTO
         self.total_palpites = total
         self.acertos = acertos
+        self.posicao = posicao
 
 
 # -------------------------------------------------------
@@ -40,20 +46,19 @@ def test_medalha_para_posicao():
 # -------------------------------------------------------
 def test_montar_ranking():
     rows = [
-        DummyRow(1, "Lucas", 50, 10, 7),
-        DummyRow(2, "Marcos", 20, 5, 2),
+        DummyRow(1, "Lucas", 50, 10, 7, posicao=1),
+        DummyRow(2, "Marcos", 20, 5, 2, posicao=2),
     ]
 
-    ranking = service._montar_ranking(rows, usuario_id=1)
+    ranking = service._montar_ranking(rows)
 
     assert len(ranking) == 2
 
-    # Ranking ordenado por pontos (coins)
+    # Ordem vem do keyset da consulta e posição do `_posicionar` no repositório
     assert ranking[0].nome == "Lucas"
     assert ranking[0].pontos == 50
     assert ranking[0].posicao == 1
     assert ranking[0].medalha == "ouro"
-    assert ranking[0].is_you is True
 
     assert ranking[1].nome == "Marcos"
     assert ranking[1].posicao == 2
@@ -67,17 +72,18 @@ def test_ranking_geral(mocker):
     db = MagicMock()
 
     rows = [
-        DummyRow(10, "Ana", 30, 10, 5),
-        DummyRow(20, "João", 10, 4, 2),
+        DummyRow(10, "Ana", 30, 10, 5, posicao=1),
+        DummyRow(20, "João", 10, 4, 2, posicao=2),
     ]
 
-    mocker.patch("src.ranking.service._query_base", return_value=rows)
+    mocker.patch("src.ranking.service._query_classificacao", return_value=(2, rows))
 
     result = service.ranking_geral(db, usuario_id=20)
 
     assert result.total == 2
     assert result.ranking[0].nome == "Ana"
-    assert result.ranking[1].is_you is True
+    assert result.voce.nome == "João"
+    assert result.voce.posicao == 2
 
 
 # -------------------------------------------------------
@@ -89,11 +95,12 @@ def test_ranking_semanal(mocker):
 
     rows = [DummyRow(1, "Carlos", 15, 5, 3)]
 
-    mocker.patch("src.ranking.service._query_base", return_value=rows)
+    mocker.patch("src.ranking.service._query_classificacao", return_value=(1, rows))
 
     result = service.ranking_semanal(db, usuario_id=None)
 
     assert result.total == 1
+    assert result.voce is None
     assert result.ranking[0].pontos == 15
 
 
@@ -106,10 +113,101 @@ def test_ranking_mensal(mocker):
 
     rows = [DummyRow(1, "Juliana", 80, 12, 9)]
 
-    mocker.patch("src.ranking.service._query_base", return_value=rows)
+    mocker.patch("src.ranking.service._query_classificacao", return_value=(1, rows))
 
     result = service.ranking_mensal(db, usuario_id=1)
 
     assert result.total == 1
     assert result.ranking[0].nome == "Juliana"
-    assert result.ranking[0].is_you is True
+    assert result.voce.nome == "Juliana"
+
+
+# -------------------------------------------------------
+# Paginação por cursor
+# -------------------------------------------------------
+def test_ranking_devolve_cursor_quando_a_pagina_enche(mocker):
+    rows = [DummyRow(1, "Ana", 30, 3, 1, posicao=1), DummyRow(2, "Bia", 30, 3, 1, posicao=1)]
+    consulta = mocker.patch("src.ranking.service._query_classificacao", return_value=(5, rows))
+
+    result = service.ranking_geral(MagicMock(), usuario_id=2, limite=2)
+
+    assert result.total == 5
+    assert [r.posicao for r in result.ranking] == [1, 1]
+    assert service._decodificar_cursor(result.proximo_cursor) == (30, 2)
+
+    service.ranking_geral(MagicMock(), usuario_id=2, limite=2, cursor=result.proximo_cursor)
+    assert consulta.call_args.args[5] == (30, 2)
+
+
+def test_ranking_cursor_invalido():
+    with pytest.raises(ValueError):
+        service.ranking_geral(MagicMock(), usuario_id=1, cursor="@@@")
+
+
+# -------------------------------------------------------
+# Resposta serializada do retrato (ETag / 304)
+# -------------------------------------------------------
+def _snapshots(*linhas):
+    snapshots = SnapshotsRanking(intervalo=30)
+    snapshots._retratos = {"geral": RetratoRanking("geral", date(1970, 1, 1), list(linhas))}
+    return snapshots
+
+
+def test_ranking_serializado_sem_retrato(mocker):
+    mocker.patch("src.ranking.service.ranking_snapshots", SnapshotsRanking(intervalo=30))
+
+    assert service.ranking_serializado("geral", 1) is None
+
+
+def test_ranking_serializado_compartilha_a_pagina_e_separa_voce(mocker):
+    mocker.patch(
+        "src.ranking.service.ranking_snapshots",
+        _snapshots(LinhaRanking(1, "Ana", 50, 5, 10, 1), LinhaRanking(2, "Bia", 30, 3, 6, 2)),
+    )
+    service._paginas.clear()
+
+    etag_ana, corpo_ana = service.ranking_serializado("geral", 1, limite=1)
+    etag_bia, corpo_bia = service.ranking_serializado("geral", 2, limite=1)
+
+    ana, bia = json.loads(corpo_ana), json.loads(corpo_bia)
+    assert (
+        ana["ranking"]
+        == bia["ranking"]
+        == [
+            {
+                "posicao": 1,
+                "medalha": "ouro",
+                "avatar": "A",
+                "nome": "Ana",
+                "pontos": 50,
+                "precisao": 50.0,
+                "palpites": 10,
+            }
+        ]
+    )
+    assert service._decodificar_cursor(ana["proximo_cursor"]) == (50, 1)
+    assert (ana["voce"]["nome"], bia["voce"]["nome"]) == ("Ana", "Bia")
+    assert etag_ana != etag_bia
+
+    # a página foi serializada uma vez só
+    assert service._paginas.stats()["entradas"] == 1
+    assert service._paginas.stats()["hits"] == 1
+
+    # fora do ranking
+    assert json.loads(service.ranking_serializado("geral", 99, limite=1)[1])["voce"] is None
+
+
+def test_ranking_serializado_responde_304_ate_a_versao_mudar(mocker):
+    mocker.patch("src.ranking.service.ranking_snapshots", _snapshots(LinhaRanking(1, "Ana", 50, 5, 10, 1)))
+
+    etag, _ = service.ranking_serializado("geral", 1)
+    assert service.ranking_serializado("geral", 1, if_none_match=etag) == (etag, None)
+    assert service.ranking_serializado("geral", 1, if_none_match=f'W/{etag}, "outro"') == (etag, None)
+    # outra página, outro ETag
+    assert service.ranking_serializado("geral", 1, if_none_match=etag, offset=1)[1] is not None
+
+    # a apuração mudou os pontos: nova versão do retrato
+    mocker.patch("src.ranking.service.ranking_snapshots", _snapshots(LinhaRanking(1, "Ana", 60, 6, 10, 1)))
+    novo_etag, corpo = service.ranking_serializado("geral", 1, if_none_match=etag)
+    assert novo_etag != etag
+    assert json.loads(corpo)["voce"]["pontos"] == 60
@@ -0,0 +1,50 @@
+from datetime import date, datetime
+
+from src.ranking.snapshot import LinhaRanking, RetratoRanking, SnapshotsRanking
+
+
+def _retrato():
+    linhas = [
+        LinhaRanking(10, "Ana", 50, 5, 8, 1),
+        LinhaRanking(20, "Bia", 30, 3, 6, 2),
+        LinhaRanking(30, "Caio", 30, 3, 4, 2),
+        LinhaRanking(40, "Duda", 10, 1, 2, 4),
+    ]
+    return RetratoRanking("geral", date(1970, 1, 1), linhas)
+
+
+def test_pagina_por_offset_e_por_cursor():
+    retrato = _retrato()
+
+    assert [linha.id for linha in retrato.pagina(2)] == [10, 20]
+    assert [linha.id for linha in retrato.pagina(2, offset=1)] == [20, 30]
+    # cursor = (pontos, usuario_id) da última linha vista
+    assert [linha.id for linha in retrato.pagina(2, apos=(30, 20))] == [30, 40]
+    assert retrato.pagina(2, apos=(10, 40)) == []
+    assert retrato.total == 4
+
+
+def test_vizinhanca_do_usuario():
+    retrato = _retrato()
+
+    assert [linha.id for linha in retrato.vizinhanca(10, 1)] == [10, 20]
+    assert [linha.id for linha in retrato.vizinhanca(30, 1)] == [20, 30, 40]
+    assert retrato.vizinhanca(99, 1) == []
+
+
+def test_retrato_de_periodo_que_ja_virou_e_ignorado():
+    snapshots = SnapshotsRanking(intervalo=30)
+    snapshots._retratos = {"mensal": RetratoRanking("mensal", date(2025, 5, 1), [])}
+
+    assert snapshots.retrato("mensal", agora=datetime(2025, 5, 20)) is not None
+    assert snapshots.retrato("mensal", agora=datetime(2025, 6, 1)) is None
+    assert snapshots.retrato("semanal") is None
+
+
+def test_marcar_alteracao_vence_o_retrato():
+    snapshots = SnapshotsRanking(intervalo=3600)
+    snapshots._ultima_atualizacao = 10**12
+
+    assert snapshots._vencido() is False
+    snapshots.marcar_alteracao()
+    assert snapshots._vencido() is True
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean
+from sqlalchemy import Column, Integer, String, Boolean, false
 from sqlalchemy.orm import relationship
 from src.db.session import Base
 from passlib.context import CryptContext
@@ -20,6 +20,7 @@ class User(Base):
 
     coins = Column(Integer, default=0)
     is_active = Column(Boolean, default=True)
+    is_admin = Column(Boolean, default=False, nullable=False, server_default=false())
 
     figurinhas = relationship("UsuarioFigurinha", cascade="all, delete-orphan")
     albuns = relationship("UsuarioAlbum", cascade="all, delete-orphan")
@@ -1,5 +1,8 @@
+from typing import Optional
+
 from sqlalchemy.orm import Session
 
+from src.ranking.repository import entrar_no_escopo, escopo_do_time, incluir_no_ranking_geral, sair_do_escopo
 from src.usuario.models.user import User
 
 
@@ -16,7 +19,7 @@ def create_user(
     nome: str,
     email: str,
     password_hash: str,
-    time_do_coracao: str,
+    time_do_coracao: Optional[str],
 ):
     user = User(
         nome=nome,
@@ -27,6 +30,8 @@ def create_user(
     )
 
     db.add(user)
+    db.flush()
+    incluir_no_ranking_geral(db, user.id)
     db.commit()
     db.refresh(user)
     return user
@@ -40,3 +45,26 @@ def update_user_password(db: Session, user_id: int, new_password_hash: str):
     db.commit()
     db.refresh(user)
     return user
+
+
+def update_user_time(db: Session, user_id: int, time_do_coracao: Optional[str]):
+    """Troca o time do coração e leva as linhas do ranking para a torcida nova."""
+    user = get_user_by_id(db, user_id)
+    if not user:
+        return None
+    if user.time_do_coracao == time_do_coracao:
+        return user
+
+    try:
+        if user.time_do_coracao:
+            sair_do_escopo(db, escopo_do_time(user.time_do_coracao), user.id)
+        user.time_do_coracao = time_do_coracao
+        db.flush()
+        if time_do_coracao:
+            entrar_no_escopo(db, escopo_do_time(time_do_coracao), user.id)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    db.refresh(user)
+    return user
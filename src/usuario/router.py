@@ -7,6 +7,7 @@ from src.usuario.auth import get_current_user
 # <-- AGORA IMPORTA!
 from src.usuario.schema import (
     ChangePasswordRequest,
+    ChangeTimeRequest,
     ForgotPasswordRequest,
     PerfilResponse,
     TokenResponse,
@@ -15,6 +16,7 @@ from src.usuario.schema import (
 )
 from src.usuario.service.user_service import (
     change_password,
+    change_time_do_coracao,
     get_user_profile,
     login_user,
     register_user,
@@ -73,6 +75,17 @@ def alterar_senha(data: ChangePasswordRequest, db: Session = Depends(get_db), us
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 
+# -----------------------------
+# TROCAR O TIME DO CORAÇÃO (usuário logado)
+# -----------------------------
+@router.put("/me/time", response_model=UserResponse)
+def alterar_time(data: ChangeTimeRequest, db: Session = Depends(get_db), usuario=Depends(get_current_user)):
+    try:
+        return change_time_do_coracao(db, usuario.id, data.time_do_coracao)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+
+
 # -----------------------------
 # ESQUECI A SENHA
 # -----------------------------
@@ -13,7 +13,7 @@ class UserResponse(BaseModel):
     id: int
     nome: str
     email: EmailStr
-    time_do_coracao: str
+    time_do_coracao: Optional[str] = None
     coins: int
 
     class Config:
@@ -29,7 +29,7 @@ class PerfilResponse(BaseModel):
     id: int
     nome: str
     email: EmailStr
-    time_do_coracao: str
+    time_do_coracao: Optional[str] = None
 
     total_figurinhas: int
     progresso_album: float
@@ -48,6 +48,11 @@ class ChangePasswordRequest(BaseModel):
     nova_senha: str
 
 
+class ChangeTimeRequest(BaseModel):
+    # None (ou vazio) tira o usuário de qualquer torcida
+    time_do_coracao: Optional[str] = None
+
+
 class ForgotPasswordRequest(BaseModel):
     email: EmailStr
     nova_senha: str
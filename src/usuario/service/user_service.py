@@ -14,6 +14,7 @@ from src.usuario.repository.user_repository import (
     get_user_by_email,
     get_user_by_id,
     update_user_password,
+    update_user_time,
 )
 from src.usuario.schema import (
     PerfilResponse,
@@ -55,10 +56,8 @@ def register_user(db: Session, data: UserRegister) -> User:
     if existing:
         raise ValueError("E-mail já cadastrado.")
 
-    time = getattr(data, "time_do_coracao", None)
-
-    if not time:
-        time = "Sem time"
+    # sem time fica None: um placeholder viraria uma torcida compartilhada no ranking
+    time = getattr(data, "time_do_coracao", None) or None
 
     hashed = get_password_hash(data.password)
 
@@ -141,6 +140,16 @@ def change_password(
     return {"mensagem": "Senha alterada com sucesso."}
 
 
+# -----------------------------
+# TROCAR O TIME DO CORAÇÃO
+# -----------------------------
+def change_time_do_coracao(db: Session, usuario_id: int, time_do_coracao: Optional[str]) -> User:
+    user = update_user_time(db, usuario_id, time_do_coracao or None)
+    if not user:
+        raise ValueError("Usuário não encontrado.")
+    return user
+
+
 # -----------------------------
 # ESQUECI A SENHA (reset simplificado)
 # -----------------------------